@@ -0,0 +1,85 @@
+"""
+ベンチマーク用の合成データ生成
+
+マネージャーの保存処理を通して書き込むため、ファイル配置（STORAGE_BACKEND）・
+暗号化・インデックスは本番と同じになる。乱数のシードを固定しているので、
+同じ件数を指定すれば同じ内容のデータができる。
+"""
+import random
+from typing import Any, Dict, List
+
+from managers.like_manager import LikeManager
+from managers.post_manager import PostManager
+from managers.reply_manager import ReplyManager
+
+# 本文の組み立てに使う語彙（キーワード検索で適度に一致するよう偏りを持たせる）
+WORDS = [
+    "今日", "明日", "昨日", "朝", "夜", "仕事", "学校", "勉強", "読書", "映画",
+    "音楽", "散歩", "料理", "カフェ", "電車", "天気", "雨", "晴れ", "桜", "海",
+    "猫", "犬", "友達", "家族", "旅行", "週末", "休み", "ゲーム", "写真", "コーヒー",
+    "眠い", "楽しい", "疲れた", "嬉しい", "悲しい", "考え事", "新しい", "懐かしい", "静か", "忙しい",
+]
+ENDINGS = ["。", "！", "…", "な。", "だった。", "かもしれない。", "と思う。"]
+CATEGORIES = ["日常", "仕事", "趣味", "雑談", "悩み", None]
+
+# 投稿の種類の割合
+PRIVATE_RATIO = 0.2
+ANONYMOUS_RATIO = 0.3
+
+# 投稿者・リアクションするユーザーの数
+USER_COUNT = 50
+
+def user_id(n: int) -> str:
+    """合成ユーザーのID（Discordのユーザーと同じ桁数の数字）"""
+    return str(100000000000000000 + n)
+
+def make_text(rng: random.Random, min_words: int = 3, max_words: int = 20) -> str:
+    """語彙を並べて日本語の本文を作る"""
+    words = rng.choices(WORDS, weights=range(len(WORDS), 0, -1), k=rng.randint(min_words, max_words))
+    return "、".join(words) + rng.choice(ENDINGS)
+
+def generate_dataset(base_dir: str, posts: int, likes: int, replies: int, seed: int = 0) -> Dict[str, Any]:
+    """base_dirに投稿・いいね・リプライを生成し、生成した内容の概要を返す
+
+    いいねは(投稿, ユーザー)の組が重複しないように作る。
+    """
+    rng = random.Random(seed)
+    post_manager = PostManager(base_dir)
+    like_manager = LikeManager(base_dir)
+    reply_manager = ReplyManager(base_dir)
+    
+    public_ids: List[int] = []
+    private_ids: List[int] = []
+    for _ in range(posts):
+        is_private = rng.random() < PRIVATE_RATIO
+        post_id = post_manager.save_post(
+            user_id=user_id(rng.randrange(USER_COUNT)),
+            content=make_text(rng),
+            category=rng.choice(CATEGORIES),
+            is_anonymous=rng.random() < ANONYMOUS_RATIO,
+            is_private=is_private,
+            display_name=None
+        )
+        (private_ids if is_private else public_ids).append(post_id)
+    
+    # いいね・リプライは公開投稿にのみ付く
+    pairs: set = set()
+    like_target = min(likes, len(public_ids) * USER_COUNT)
+    while len(pairs) < like_target:
+        pairs.add((rng.choice(public_ids), user_id(rng.randrange(USER_COUNT))))
+    for post_id, liker_id in sorted(pairs):
+        like_manager.save_like(post_id, liker_id, f"user{liker_id[-4:]}")
+    
+    for _ in range(replies if public_ids else 0):
+        replier_id = user_id(rng.randrange(USER_COUNT))
+        reply_manager.save_reply(rng.choice(public_ids), replier_id, make_text(rng, 2, 10), f"user{replier_id[-4:]}")
+    
+    post_manager.access_logger.close()
+    return {
+        "posts": posts,
+        "public_posts": len(public_ids),
+        "private_posts": len(private_ids),
+        "likes": len(pairs),
+        "replies": replies if public_ids else 0,
+        "seed": seed
+    }
@@ -0,0 +1,179 @@
+"""
+マネージャーと検索のベンチマークを実行する
+
+Discordに接続せず、一時ディレクトリに生成した合成データに対してシナリオを実行する。
+
+    python -m benchmarks.run --scales 100,1000,5000 --output bench.json
+    python -m benchmarks.run --scales 1000 --baseline bench.json
+
+--baselineを指定すると保存済みの結果と中央値を比較し、--thresholdを超えて
+遅くなったシナリオがあれば終了コード1を返す。
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.datagen import generate_dataset
+from benchmarks.scenarios import SCENARIOS, BenchContext, scenarios_by_name
+
+def _git_revision() -> Optional[str]:
+    """実行時のコミット（取得できなければNone）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """1回ごとの所要ミリ秒を統計値にまとめる"""
+    ordered = sorted(samples)
+    return {
+        "ops": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "min_ms": round(ordered[0], 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+def run_scale(scale: int, scenario_names: List[str], likes_per_post: float, replies_per_post: float,
+              seed: int, data_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """1つの規模のデータを生成して全シナリオを実行"""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{scale}_") as tmp_dir:
+        base_dir = os.path.join(data_dir, f"scale_{scale}") if data_dir else tmp_dir
+        
+        started = time.perf_counter()
+        dataset = generate_dataset(base_dir, scale, int(scale * likes_per_post), int(scale * replies_per_post), seed)
+        dataset["generate_s"] = round(time.perf_counter() - started, 3)
+        print(f"[{scale}] データを生成しました: {dataset}", file=sys.stderr)
+        
+        ctx = BenchContext(base_dir, seed)
+        scenarios = scenarios_by_name()
+        results = []
+        try:
+            for name in scenario_names:
+                scenario = scenarios[name]
+                op = scenario.prepare(ctx)
+                samples = []
+                gc.collect()
+                for _ in range(scenario.ops):
+                    op_started = time.perf_counter()
+                    op()
+                    samples.append((time.perf_counter() - op_started) * 1000)
+                
+                result = {"scenario": name, "scale": scale, **_summarize(samples)}
+                results.append(result)
+                print(f"[{scale}] {name}: median={result['median_ms']:.3f}ms p95={result['p95_ms']:.3f}ms",
+                      file=sys.stderr)
+        finally:
+            ctx.close()
+        
+        for result in results:
+            result["dataset"] = dataset
+        return results
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[Tuple[str, int, float]]:
+    """保存済みの結果と中央値を比較して表を出力し、閾値を超えて遅くなったものを返す"""
+    base = {(r["scenario"], r["scale"]): r for r in baseline.get("results", [])}
+    regressions = []
+    
+    print(f"{'scenario':<28} {'scale':>7} {'base_ms':>10} {'now_ms':>10} {'ratio':>7}")
+    for result in results:
+        key = (result["scenario"], result["scale"])
+        before = base.get(key)
+        if before is None or not before.get("median_ms"):
+            print(f"{key[0]:<28} {key[1]:>7} {'-':>10} {result['median_ms']:>10.3f} {'new':>7}")
+            continue
+        
+        ratio = result["median_ms"] / before["median_ms"]
+        mark = ""
+        if ratio > 1 + threshold:
+            regressions.append((key[0], key[1], ratio))
+            mark = "  性能低下"
+        print(f"{key[0]:<28} {key[1]:>7} {before['median_ms']:>10.3f} {result['median_ms']:>10.3f} {ratio:>7.2f}{mark}")
+    
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="マネージャーと検索のベンチマーク（オフライン）")
+    parser.add_argument("--scales", default="100,1000,5000", help="投稿数（カンマ区切り）")
+    parser.add_argument("--likes-per-post", type=float, default=2.0, help="投稿あたりのいいね数")
+    parser.add_argument("--replies-per-post", type=float, default=1.0, help="投稿あたりのリプライ数")
+    parser.add_argument("--scenario", action="append", help="実行するシナリオ（複数指定可、省略時は全て）")
+    parser.add_argument("--backend", choices=["file", "jsonl"], help="ストレージ（省略時はSTORAGE_BACKEND）")
+    parser.add_argument("--seed", type=int, default=0, help="データ生成の乱数シード")
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    parser.add_argument("--baseline", help="比較する保存済みの結果（JSON）")
+    parser.add_argument("--threshold", type=float, default=0.25, help="性能低下とみなす中央値の増加率")
+    parser.add_argument("--data-dir", help="生成したデータを残すディレクトリ（省略時は一時ディレクトリ）")
+    parser.add_argument("--verbose", action="store_true", help="マネージャーのログを表示")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.backend:
+        os.environ['STORAGE_BACKEND'] = args.backend
+    
+    names = [scenario.name for scenario in SCENARIOS]
+    if args.scenario:
+        unknown = set(args.scenario) - set(names)
+        if unknown:
+            parser.error(f"未知のシナリオです: {', '.join(sorted(unknown))}")
+        selected = set(args.scenario)
+        # いいね解除はいいねで作成したものを削除する
+        if "unlike" in selected:
+            selected.add("like")
+        names = [name for name in names if name in selected]
+    
+    results = []
+    for scale in (int(s) for s in args.scales.split(",") if s.strip()):
+        results.extend(run_scale(scale, names, args.likes_per_post, args.replies_per_post, args.seed, args.data_dir))
+    
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": os.getenv('STORAGE_BACKEND', 'file'),
+            "seed": args.seed,
+            "likes_per_post": args.likes_per_post,
+            "replies_per_post": args.replies_per_post
+        },
+        "results": results
+    }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"結果を書き出しました: {args.output}", file=sys.stderr)
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        base_backend = baseline.get("meta", {}).get("backend")
+        if base_backend and base_backend != report["meta"]["backend"]:
+            print(f"⚠️ 比較元とストレージが異なります: {base_backend} -> {report['meta']['backend']}", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"性能が低下したシナリオ: {len(regressions)}件（閾値 +{args.threshold:.0%}）", file=sys.stderr)
+            return 1
+    elif not args.output:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+ベンチマークのシナリオ
+
+各シナリオは生成済みのデータに対して1回分の操作を返す関数で、ランナーが
+指定回数だけ呼び出して1回ごとの所要時間を計測する。書き込みを伴うシナリオは
+読み込み系のシナリオの後に実行し、いいね解除はいいねで作成したものを消す。
+"""
+import random
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from managers.like_manager import LikeManager
+from managers.post_manager import PostManager
+from managers.post_query import author_is
+from managers.reply_manager import ReplyManager
+
+from benchmarks.datagen import USER_COUNT, WORDS, make_text, user_id
+
+# 一覧・検索で取得する件数（/list・/search の1ページ分）
+PAGE_SIZE = 10
+
+class BenchContext:
+    """シナリオで共有するマネージャーと対象ID"""
+    
+    def __init__(self, base_dir: str, seed: int = 0):
+        self.base_dir = base_dir
+        self.rng = random.Random(seed + 1)
+        self.posts = PostManager(base_dir)
+        self.likes = LikeManager(base_dir)
+        self.replies = ReplyManager(base_dir)
+        
+        entries = self.posts.index.items()
+        self.public_ids = [post_id for post_id, entry in entries if not entry['is_private']]
+        self.private_posts = [(post_id, entry['user_id']) for post_id, entry in entries if entry['is_private']]
+        self.users = [user_id(n) for n in range(USER_COUNT)]
+        # いいねシナリオで作成し、いいね解除シナリオで削除する(投稿ID, ユーザーID)
+        self.created_likes: List[Tuple[int, str]] = []
+        self._bench_users = 0
+    
+    def new_user(self) -> str:
+        """既存のいいねと重複しないベンチマーク専用のユーザーID"""
+        self._bench_users += 1
+        return user_id(USER_COUNT + self._bench_users)
+    
+    def close(self) -> None:
+        """バッファ中のアクセスログなどを書き出す"""
+        self.posts.access_logger.close()
+        self.posts.storage.close()
+
+class Scenario(NamedTuple):
+    """シナリオ名、計測回数、1回分の操作を作る関数"""
+    name: str
+    ops: int
+    prepare: Callable[[BenchContext], Callable[[], Any]]
+
+def _rebuild_indexes(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        ctx.posts.index.build()
+        ctx.posts.search_index.build()
+        ctx.replies.index.build()
+        ctx.replies.search_index.build()
+        ctx.likes.index.build()
+    return op
+
+def _get_post(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.posts.get_post(ctx.rng.choice(ctx.public_ids))
+
+def _get_private_post(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        if ctx.private_posts:
+            post_id, owner_id = ctx.rng.choice(ctx.private_posts)
+            return ctx.posts.get_post(post_id, owner_id)
+    return op
+
+def _get_all_posts(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.posts.get_all_posts(ctx.rng.choice(ctx.users))
+
+def _query_posts(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.posts.query_posts(keyword=ctx.rng.choice(WORDS), limit=PAGE_SIZE)
+
+def _rank_posts(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        keyword = " ".join(ctx.rng.sample(WORDS, 2))
+        return ctx.posts.rank_posts(keyword, limit=PAGE_SIZE)
+    return op
+
+def _list_posts(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        owner_id = ctx.rng.choice(ctx.users)
+        ctx.posts.query_posts([author_is(owner_id)], user_id=owner_id, limit=PAGE_SIZE)
+        return ctx.posts.count_posts([author_is(owner_id)], user_id=owner_id)
+    return op
+
+def _query_replies(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.replies.query_replies(keyword=ctx.rng.choice(WORDS), limit=PAGE_SIZE)
+
+def _get_like_by_user_and_post(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.likes.get_like_by_user_and_post(ctx.rng.choice(ctx.public_ids), ctx.rng.choice(ctx.users))
+
+def _log_access(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.posts._log_access(ctx.rng.choice(ctx.users), ctx.rng.choice(ctx.public_ids), "view")
+
+def _create_post(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        return ctx.posts.save_post(ctx.rng.choice(ctx.users), make_text(ctx.rng),
+                                   category="日常", is_private=ctx.rng.random() < 0.2)
+    return op
+
+def _like(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        post_id, liker_id = ctx.rng.choice(ctx.public_ids), ctx.new_user()
+        ctx.created_likes.append((post_id, liker_id))
+        return ctx.likes.save_like(post_id, liker_id, "bench")
+    return op
+
+def _unlike(ctx: BenchContext) -> Callable[[], Any]:
+    def op():
+        if ctx.created_likes:
+            return ctx.likes.delete_like(*ctx.created_likes.pop())
+    return op
+
+def _reply(ctx: BenchContext) -> Callable[[], Any]:
+    return lambda: ctx.replies.save_reply(ctx.rng.choice(ctx.public_ids), ctx.rng.choice(ctx.users),
+                                          make_text(ctx.rng, 2, 10), "bench")
+
+# 実行順（書き込み系は最後、unlikeはlikeの後）
+SCENARIOS: List[Scenario] = [
+    Scenario("index_build", 3, _rebuild_indexes),
+    Scenario("get_post", 200, _get_post),
+    Scenario("get_post_private", 200, _get_private_post),
+    Scenario("get_all_posts", 5, _get_all_posts),
+    Scenario("query_posts", 50, _query_posts),
+    Scenario("rank_posts", 50, _rank_posts),
+    Scenario("list", 50, _list_posts),
+    Scenario("query_replies", 50, _query_replies),
+    Scenario("get_like_by_user_and_post", 200, _get_like_by_user_and_post),
+    Scenario("log_access", 1000, _log_access),
+    Scenario("create_post", 50, _create_post),
+    Scenario("like", 50, _like),
+    Scenario("unlike", 50, _unlike),
+    Scenario("reply", 50, _reply),
+]
+
+def scenarios_by_name() -> Dict[str, Scenario]:
+    """シナリオ名からシナリオを引く辞書"""
+    return {scenario.name: scenario for scenario in SCENARIOS}
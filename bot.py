@@ -1,10 +1,21 @@
+import asyncio
 import logging
 import os
+import signal
 import sys
+import time
+from typing import Optional
 
 import discord
 from discord.ext import commands
 
+from managers.data_store import DataStore
+from utils.command_sync import sync_commands
+from utils.github_sync import get_sync_queue
+from utils.message_cache import MessageHandleCache
+from utils import metrics
+from utils.startup import StartupReport, load_extensions
+
 # ロガーの設定
 logging.basicConfig(
     level=logging.INFO,
@@ -25,68 +36,144 @@ class ThoughtBot(commands.Bot):
             intents=intents,
             help_command=None,
             application_id=os.getenv('APPLICATION_ID'),
-            activity=discord.Game(name="/help でヘルプを表示")
+            activity=discord.Game(name="/help でヘルプを表示"),
+            # コマンドごとの処理時間を記録する
+            tree_cls=metrics.MetricsCommandTree
         )
+        
+        # 起動処理の所要時間（Cogの読み込み後にログへ出力）
+        self.startup_report = StartupReport()
+        # インデックスを構築するバックグラウンド処理（ゲートウェイ接続後に開始）
+        self._warm_up_task: Optional[asyncio.Task] = None
+        
+        # 全Cogで共有するマネージャー（インデックスの構築はウォームアップまで遅らせる）
+        started = time.perf_counter()
+        self.store = DataStore()
+        self.startup_report.record("managers.data_store", None, (time.perf_counter() - started) * 1000)
+        # 送信済みメッセージのハンドル（fetch_messageを省くため）
+        self.message_cache = MessageHandleCache(self, self.store.message_refs)
+        # /metrics を公開するHTTPサーバー（METRICS_PORT指定時のみ）
+        self._metrics_runner = None
+        # 終了処理（シグナル受信と`async with`の終了の両方から呼ばれても一度だけ行う）
+        self._shutdown_task: Optional[asyncio.Task] = None
     
     async def setup_hook(self):
         """起動時の初期化処理"""
         logger.info("ボットの初期化を開始します...")
         
+        # 応答・Discord API・キャッシュの計測を組み込む
+        self.install_metrics()
+        
         # Cogの読み込み
         await self.load_cogs()
         
+        try:
+            self._metrics_runner = await metrics.start_metrics_server()
+        except OSError as e:
+            logger.error(f"❌ メトリクスの公開に失敗しました: {e}")
+        
         logger.info("ボットの初期化が完了しました")
     
+    def install_metrics(self):
+        """応答・Discord APIの計測を組み込み、キャッシュの統計をゲージとして登録する"""
+        metrics.install(self)
+        metrics.register_stats("query", self.store.posts.query_cache.stats)
+        metrics.register_stats("decrypt", self.store.posts.sync.decrypt_cache.stats)
+        metrics.register_stats("message_handles", self.message_cache.stats)
+        metrics.register_stats("private_threads", self.store.private_threads.sync.stats)
+    
     async def load_cogs(self):
-        """Cogを読み込む"""
-        cogs_dir = "cogs"
-        
-        if not os.path.exists(cogs_dir):
-            logger.warning(f"Cogディレクトリが見つかりません: {cogs_dir}")
+        """マニフェスト（utils.startup.EXTENSIONS）のCogを読み込み、所要時間の表を出力する"""
+        await load_extensions(self, self.startup_report)
+        self.startup_report.log("起動時間（Cogごとのimport・初期化）")
+    
+    async def warm_up(self):
+        """インデックスをバックグラウンドで構築し、所要時間の表を出力する"""
+        report = StartupReport()
+        try:
+            timings = await self.store.warm_up()
+        except Exception as e:
+            logger.error(f"ウォームアップに失敗しました: {e}", exc_info=True)
             return
         
-        # thoughtsサブディレクトリも含めて探索
-        for root, dirs, files in os.walk(cogs_dir):
-            for filename in files:
-                if filename.endswith(".py") and not filename.startswith("__"):
-                    # Cogファイルのみを読み込む（utils, modal, paginationなどは除外）
-                    if any(exclude in filename for exclude in ['utils', 'modal', 'pagination', 'embed', 'validation', 'type_view', 'search_posts', 'search_replies']):
-                        logger.info(f"ユーティリティファイルをスキップ: {filename}")
-                        continue
-                    
-                    # 相対パスをモジュールパスに変換
-                    rel_path = os.path.relpath(root, cogs_dir)
-                    if rel_path == ".":
-                        cog_path = f"cogs.{filename[:-3]}"
-                    else:
-                        cog_path = f"cogs.{rel_path.replace(os.sep, '.')}.{filename[:-3]}"
-                    
-                    try:
-                        await self.load_extension(cog_path)
-                        logger.info(f"Cogを読み込みました: {cog_path}")
-                    except Exception as e:
-                        logger.error(f"Cogの読み込みに失敗しました: {cog_path} - {e}")
+        for name, elapsed_ms in timings.items():
+            report.record(f"warm_up.{name}", None, elapsed_ms)
+        report.log("ウォームアップ時間（インデックス構築）")
+    
+    async def close(self):
+        """終了時の後処理（2回目以降の呼び出しは実行中・完了済みの後処理を待つだけ）"""
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self._shutdown())
+        await self._shutdown_task
+    
+    async def _shutdown(self):
+        """終了時の後処理の本体"""
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+        
+        # 実行中のファイルI/Oを待ってから、バッファ中のデータを書き出す
+        await self.store.close()
+        
+        # 未同期の変更をGitHubへ反映（書き出したアクセスログは変更がなくても同期する）
+        sync_queue = get_sync_queue()
+        if self.store.posts.sync.access_logger.written and not sync_queue.pending_count:
+            sync_queue.enqueue("access log")
+        await sync_queue.close()
+        
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+        
+        await super().close()
+    
+    async def start_until_signal(self, token: str):
+        """SIGTERM・SIGINTを受けたら終了処理（close）を済ませてから止まるようにして起動する"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self._on_signal, sig)
+            except NotImplementedError:
+                # Windowsでは登録できない（Ctrl+CはKeyboardInterruptで止まる）
+                pass
+        
+        async with self:
+            await self.start(token)
+    
+    def _on_signal(self, sig: signal.Signals):
+        """シグナル受信時の処理（2回目以降は無視）"""
+        if self._shutdown_task is not None:
+            return
+        logger.info(f"{sig.name}を受信しました。未同期の変更を保存して終了します")
+        self._shutdown_task = asyncio.create_task(self._shutdown())
     
     async def on_ready(self):
         """ボット準備完了時の処理"""
         logger.info(f"ボットがログインしました: {self.user}")
         logger.info(f"サーバー数: {len(self.guilds)}")
         
-        # スラッシュコマンドを同期
+        # 再接続時は開始しない（インデックスの構築は一度だけ）
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.create_task(self.warm_up())
+        
+        # スラッシュコマンドを同期（再接続でも呼ばれるため、定義が変わったときだけ）
         try:
-            synced = await self.tree.sync()
-            logger.info(f"スラッシュコマンドを同期しました: {len(synced)}個")
+            await sync_commands(self.tree)
         except Exception as e:
             logger.error(f"スラッシュコマンドの同期に失敗しました: {e}")
     
+    async def on_app_command_completion(self, interaction, command):
+        """スラッシュコマンド完了時の処理"""
+        metrics.observe_command(interaction, "ok")
+    
     async def on_guild_join(self, guild):
         """サーバー参加時の処理"""
         logger.info(f"新しいサーバーに参加しました: {guild.name} (ID: {guild.id})")
         
-        # スラッシュコマンドを同期
+        # スラッシュコマンドを同期（定義が変わったときだけ）
         try:
-            synced = await self.tree.sync(guild=guild)
-            logger.info(f"サーバー {guild.name} でスラッシュコマンドを同期しました: {len(synced)}個")
+            synced = await sync_commands(self.tree, guild=guild)
+            if synced is not None:
+                logger.info(f"サーバー {guild.name} でスラッシュコマンドを同期しました: {len(synced)}個")
         except Exception as e:
             logger.error(f"サーバー {guild.name} でのスラッシュコマンド同期に失敗しました: {e}")
     
@@ -125,7 +212,8 @@ def main():
     bot = ThoughtBot()
     
     try:
-        bot.run(os.getenv('DISCORD_TOKEN'))
+        # bot.runはSIGTERMで終了処理をしないため、シグナルを自前で処理する
+        asyncio.run(bot.start_until_signal(os.getenv('DISCORD_TOKEN')))
     except KeyboardInterrupt:
         logger.info("ボットを停止します")
     except Exception as e:
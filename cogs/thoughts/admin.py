@@ -0,0 +1,95 @@
+"""
+管理者用コマンドを提供するCog
+"""
+
+import logging
+from typing import Dict
+
+import discord
+from discord import app_commands, Interaction
+from discord.ext import commands
+
+from utils import metrics
+from utils.command_sync import sync_commands
+
+logger = logging.getLogger(__name__)
+
+# /perf の各欄に表示する行数
+PERF_ROWS = 5
+
+class Admin(commands.Cog):
+    """管理者用コマンドを提供するCog"""
+    
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        logger.info("Admin cog が初期化されました")
+    
+    @app_commands.command(name="sync", description="🔄 スラッシュコマンドを強制的に同期（管理者専用）")
+    @app_commands.describe(scope="同期する範囲")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="グローバル", value="global"),
+        app_commands.Choice(name="このサーバー", value="guild")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def sync(self, interaction: Interaction, scope: str = "global") -> None:
+        """定義の変更の有無にかかわらずスラッシュコマンドを同期するコマンド"""
+        # サーバー側でコマンドの権限設定が変更されていても管理者以外は実行させない
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ このコマンドは管理者のみ実行できます。", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            guild = interaction.guild if scope == "guild" else None
+            synced = await sync_commands(self.bot.tree, guild=guild, force=True)
+            logger.info(f"管理者がスラッシュコマンドを同期しました: user_id={interaction.user.id}, scope={scope}")
+            await interaction.followup.send(f"✅ スラッシュコマンドを同期しました: {len(synced)}個", ephemeral=True)
+        except Exception as e:
+            # 定義ファイルの書き込み失敗なども含め、遅延した応答には必ず結果を返す
+            logger.error(f"❌ スラッシュコマンドの同期に失敗しました: {e}", exc_info=True)
+            await interaction.followup.send(f"❌ スラッシュコマンドの同期に失敗しました: {e}", ephemeral=True)
+
+    @app_commands.command(name="perf", description="📈 コマンド・ストレージ・Discord APIの処理時間を表示（管理者専用）")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def perf(self, interaction: Interaction) -> None:
+        """起動してからの処理時間の集計を表示するコマンド"""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ このコマンドは管理者のみ実行できます。", ephemeral=True)
+            return
+        
+        embed = discord.Embed(title="📈 パフォーマンス", description="起動してからの集計（p95は近似値）", color=discord.Color.blue())
+        sections = [
+            ("⏱️ コマンド", metrics.COMMAND_SECONDS, ("command",)),
+            ("💬 最初の応答", metrics.FIRST_RESPONSE_SECONDS, ("command",)),
+            ("💾 ストレージ", metrics.STORAGE_SECONDS, ("manager", "method")),
+            ("🌐 Discord API", metrics.DISCORD_HTTP_SECONDS, ("method", "route")),
+            ("🔄 Git同期", metrics.GIT_SYNC_SECONDS, ("result",)),
+        ]
+        for name, histogram, group_by in sections:
+            rows = metrics.summarize(histogram, group_by, PERF_ROWS)
+            lines = [
+                f"`{' '.join(row['labels'])}` {row['count']}回 平均{row['mean_ms']:.1f}ms p95 {row['p95_ms']:.1f}ms"
+                for row in rows
+            ]
+            embed.add_field(name=name, value="\n".join(lines)[:1024] or "記録なし", inline=False)
+        
+        # 読み込んだレコード数（コマンドごと、多い順）
+        scanned: Dict[str, float] = {}
+        for (command, collection), value in metrics.RECORDS_SCANNED.values().items():
+            scanned[command] = scanned.get(command, 0) + value
+        lines = [f"`{command}` {int(value)}件" for command, value in sorted(scanned.items(), key=lambda item: -item[1])[:PERF_ROWS]]
+        embed.add_field(name="📚 読み込んだレコード", value="\n".join(lines) or "記録なし", inline=False)
+        
+        stats = self.bot.store.posts.query_cache.stats()
+        embed.add_field(name="🗂️ 検索キャッシュ",
+                        value=f"ヒット率 {stats['hit_rate']:.0%}（{stats['hits']}/{stats['hits'] + stats['misses']}）",
+                        inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot: commands.Bot) -> None:
+    """Cogをセットアップする"""
+    await bot.add_cog(Admin(bot))
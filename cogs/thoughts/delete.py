@@ -10,21 +10,23 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
 
 # ユーティリティをインポート
 from .delete_utils import delete_discord_message, cleanup_message_ref
+from managers.post_query import author_is
 
 logger = logging.getLogger(__name__)
 
+# 選択メニューに表示できる最大件数
+MAX_SELECT_OPTIONS = 25
+
 class Delete(commands.Cog):
     """投稿削除用Cog"""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        self.post_manager = bot.store.posts
+        self.message_ref_manager = bot.store.message_refs
     
     @app_commands.command(name="delete", description="🗑️ 投稿を削除")
     async def delete_post(self, interaction: Interaction) -> None:
@@ -32,8 +34,9 @@ class Delete(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # ユーザーの投稿を取得
-            posts = self.post_manager.search_posts(user_id=str(interaction.user.id))
+            # ユーザーの投稿を新しい順に取得（インデックスで絞り込み、表示する件数だけ読み込む）
+            user_id = str(interaction.user.id)
+            posts = await self.post_manager.query_posts([author_is(user_id)], user_id=user_id, limit=MAX_SELECT_OPTIONS)
             
             if not posts:
                 await interaction.followup.send(
@@ -43,10 +46,6 @@ class Delete(commands.Cog):
                 )
                 return
             
-            # 作成日時でソート
-            posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            posts = posts[:25]  # 最大25件
-            
             # 選択ビューを表示
             view = DeleteSelectView(posts, self)
             embed = discord.Embed(
@@ -154,7 +153,7 @@ class DeleteConfirmModal(ui.Modal, title="🗑️ 投稿削除確認"):
             post_id = self.post_data['id']
             
             # 投稿の存在と権限を確認
-            post = self.cog.post_manager.get_post(post_id, str(interaction.user.id))
+            post = await self.cog.post_manager.get_post(post_id, str(interaction.user.id))
             if not post:
                 logger.error(f"投稿の削除に失敗しました: 投稿ID={post_id}, 権限なしまたは存在しない")
                 await interaction.followup.send(
@@ -165,7 +164,7 @@ class DeleteConfirmModal(ui.Modal, title="🗑️ 投稿削除確認"):
                 return
             
             # 投稿ファイルを削除
-            success = self.cog.post_manager.delete_post(post_id, str(interaction.user.id))
+            success = await self.cog.post_manager.delete_post(post_id, str(interaction.user.id))
             if not success:
                 logger.error(f"投稿の削除に失敗しました: 投稿ID={post_id}")
                 await interaction.followup.send(
@@ -187,7 +186,7 @@ class DeleteConfirmModal(ui.Modal, title="🗑️ 投稿削除確認"):
             # 関連データ削除をバックグラウンドで実行
             
             # Discordメッセージを削除
-            message_ref_data = self.cog.message_ref_manager.get_message_ref(post_id)
+            message_ref_data = await self.cog.message_ref_manager.get_message_ref(post_id)
             if message_ref_data:
                 message_id = message_ref_data.get('message_id')
                 channel_id = message_ref_data.get('channel_id')
@@ -197,7 +196,8 @@ class DeleteConfirmModal(ui.Modal, title="🗑️ 投稿削除確認"):
                 logger.warning(f"⚠️ メッセージ参照が見つかりません: 投稿ID={post_id}")
             
             # メッセージ参照を削除
-            cleanup_message_ref(post_id, self.cog.message_ref_manager)
+            await cleanup_message_ref(post_id, self.cog.message_ref_manager)
+            interaction.client.message_cache.forget_post(post_id)
             
             # GitHubに保存する処理
             from utils.github_sync import sync_to_github
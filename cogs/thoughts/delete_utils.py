@@ -14,8 +14,7 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncPostManager, AsyncMessageRefManager
 
 # ロガー設定
 logger = logging.getLogger(__name__)
@@ -24,7 +23,7 @@ async def delete_discord_message(
     interaction: Interaction,
     message_id: str,
     channel_id: str,
-    message_ref_manager: MessageRefManager
+    message_ref_manager: AsyncMessageRefManager
 ) -> bool:
     """Discordメッセージを削除する"""
     try:
@@ -164,10 +163,10 @@ async def delete_discord_message(
         logger.error(f"❌ 元の投稿メッセージ削除エラー: {e}")
         return False
 
-def cleanup_message_ref(post_id: int, message_ref_manager: MessageRefManager) -> bool:
+async def cleanup_message_ref(post_id: int, message_ref_manager: AsyncMessageRefManager) -> bool:
     """message_refをクリーンアップ"""
     try:
-        message_ref_manager.delete_message_ref(post_id)
+        await message_ref_manager.delete_message_ref(post_id)
         logger.info(f"✅ message_refをクリーンアップしました: 投稿ID={post_id}")
         return True
     except Exception as e:
@@ -12,20 +12,23 @@ from typing import List, Dict, Any
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
 
 # UIとユーティリティをインポート
 from .edit_modal import PostEditModal, PostEditSelectView
 from .edit_utils import update_post_embed, update_post_data
+from managers.post_query import author_is
 
 logger = logging.getLogger(__name__)
 
+# 選択メニューに表示できる最大件数
+MAX_SELECT_OPTIONS = 25
+
 class Edit(commands.Cog):
     """投稿を編集用Cog"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.post_manager = PostManager()
+        self.post_manager = bot.store.posts
     
     @app_commands.command(name='edit', description='📝 投稿を編集')
     async def edit(self, interaction: discord.Interaction):
@@ -33,8 +36,9 @@ class Edit(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # ユーザーの投稿を取得
-            posts = self.post_manager.search_posts(user_id=str(interaction.user.id))
+            # ユーザーの投稿を新しい順に取得（インデックスで絞り込み、表示する件数だけ読み込む）
+            user_id = str(interaction.user.id)
+            posts = await self.post_manager.query_posts([author_is(user_id)], user_id=user_id, limit=MAX_SELECT_OPTIONS)
             
             if not posts:
                 await interaction.followup.send(
@@ -44,9 +48,6 @@ class Edit(commands.Cog):
                 )
                 return
             
-            # 作成日時でソート
-            posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # 選択ビューを表示
             view = PostEditSelectView(posts, self)
             embed = discord.Embed(
@@ -88,10 +89,9 @@ class Edit(commands.Cog):
                 return False
             
             # Discordメッセージを更新
-            from managers.message_ref_manager import MessageRefManager
-            message_ref_manager = MessageRefManager()
+            message_ref_manager = self.bot.store.message_refs
             
-            message_ref_data = message_ref_manager.get_message_ref(post_id)
+            message_ref_data = await message_ref_manager.get_message_ref(post_id)
             if message_ref_data:
                 message_id = message_ref_data.get('message_id')
                 channel_id = message_ref_data.get('channel_id')
@@ -12,7 +12,6 @@ from typing import List, Dict, Any
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.reply_manager import ReplyManager
 
 # UIとユーティリティをインポート
 from .edit_reply_modal import ReplyEditModal, ReplyEditSelectView
@@ -25,7 +24,7 @@ class EditReply(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.reply_manager = ReplyManager()
+        self.reply_manager = bot.store.replies
     
     @app_commands.command(name='edit_reply', description='💬 リプライを編集')
     async def edit_reply(self, interaction: discord.Interaction):
@@ -34,7 +33,7 @@ class EditReply(commands.Cog):
             await interaction.response.defer(ephemeral=True)
             
             # ユーザーのリプライを取得
-            replies = self.reply_manager.get_user_replies(str(interaction.user.id))
+            replies = await self.reply_manager.get_replies_by_user(str(interaction.user.id))
             
             if not replies:
                 await interaction.followup.send(
@@ -84,10 +83,9 @@ class EditReply(commands.Cog):
                 return False
             
             # Discordメッセージを更新
-            from managers.message_ref_manager import MessageRefManager
-            message_ref_manager = MessageRefManager()
+            message_ref_manager = self.bot.store.message_refs
             
-            message_ref_data = message_ref_manager.get_message_ref(reply_id)
+            message_ref_data = await message_ref_manager.get_message_ref(reply_id)
             if message_ref_data:
                 message_id = message_ref_data.get('message_id')
                 channel_id = message_ref_data.get('channel_id')
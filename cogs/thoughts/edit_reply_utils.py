@@ -11,8 +11,7 @@ import logging
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.reply_manager import ReplyManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncReplyManager, AsyncMessageRefManager
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +21,7 @@ async def update_reply_embed(
     channel_id: str,
     message: str,
     reply_id: int,
-    message_ref_manager: MessageRefManager
+    message_ref_manager: AsyncMessageRefManager
 ) -> bool:
     """DiscordのEmbedメッセージを更新"""
     try:
@@ -32,9 +31,9 @@ async def update_reply_embed(
             logger.error(f"❌ チャンネルが見つかりません: channel_id={channel_id}")
             return False
         
-        # 元の投稿メッセージを取得
+        # 元の投稿メッセージを取得（既存のEmbedが必要。送信・編集済みなら保持分を使う）
         try:
-            original_message = await channel.fetch_message(int(message_id))
+            original_message = await interaction.client.message_cache.fetch(channel_id, message_id)
         except discord.NotFound:
             logger.warning(f"⚠️ 元の投稿メッセージが見つかりません: message_id={message_id}")
             return False
@@ -71,7 +70,7 @@ async def update_reply_embed(
                     new_embed.set_footer(text=" | ".join(footer_parts))
                     
                     # Embedを更新
-                    await original_message.edit(embeds=[new_embed])
+                    interaction.client.message_cache.remember(await original_message.edit(embeds=[new_embed]))
                     logger.info(f"✅ リプライEmbedを更新しました: reply_id={reply_id}")
                     return True
         
@@ -91,12 +90,12 @@ async def update_reply_embed(
 async def update_reply_data(
     reply_id: int,
     message: str,
-    reply_manager: ReplyManager
+    reply_manager: AsyncReplyManager
 ) -> bool:
     """リプライデータを更新"""
     try:
         # リプライを更新
-        success = reply_manager.update_reply(
+        success = await reply_manager.update_reply(
             reply_id=reply_id,
             content=message
         )
@@ -12,8 +12,7 @@ from typing import Optional
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncPostManager, AsyncMessageRefManager
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +24,7 @@ async def update_post_embed(
     category: Optional[str],
     image_url: Optional[str],
     post_id: int,
-    message_ref_manager: MessageRefManager
+    message_ref_manager: AsyncMessageRefManager
 ) -> bool:
     """DiscordのEmbedメッセージを更新"""
     try:
@@ -35,9 +34,9 @@ async def update_post_embed(
             logger.error(f"❌ チャンネルが見つかりません: channel_id={channel_id}")
             return False
         
-        # 元の投稿メッセージを取得
+        # 元の投稿メッセージを取得（Embedの投稿者情報が必要。送信・編集済みなら保持分を使う）
         try:
-            original_message = await channel.fetch_message(int(message_id))
+            original_message = await interaction.client.message_cache.fetch(channel_id, message_id)
         except discord.NotFound:
             logger.warning(f"⚠️ 元の投稿メッセージが見つかりません: message_id={message_id}")
             return False
@@ -72,7 +71,7 @@ async def update_post_embed(
         embed.set_footer(text=" | ".join(footer_parts))
         
         # メッセージを更新
-        await original_message.edit(embed=embed)
+        interaction.client.message_cache.remember(await original_message.edit(embed=embed))
         logger.info(f"✅ Embedメッセージを更新しました: message_id={message_id}")
         
         return True
@@ -92,12 +91,12 @@ async def update_post_data(
     message: str,
     category: Optional[str],
     image_url: Optional[str],
-    post_manager: PostManager
+    post_manager: AsyncPostManager
 ) -> bool:
     """投稿データを更新"""
     try:
         # 投稿を更新
-        success = post_manager.update_post(
+        success = await post_manager.update_post(
             post_id=post_id,
             content=message,
             category=category,
@@ -29,8 +29,8 @@ class Help(commands.Cog):
             # コマンド一覧を追加
             commands_list = []
             for cmd in self.bot.tree.get_commands():
-                # helpコマンド自体は表示しない
-                if cmd.name == "help":
+                # helpコマンド自体と管理者用コマンドは表示しない
+                if cmd.name == "help" or cmd.default_permissions is not None:
                     continue
                     
                 # コマンドがグループの場合はサブコマンドも表示
@@ -12,17 +12,19 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.like_manager import LikeManager
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncLikeManager, AsyncPostManager, AsyncMessageRefManager
 from config import get_channel_id, extract_channel_id
+from utils.side_effects import send_in_order
 
 logger = logging.getLogger(__name__)
 
+# Discordのセレクトメニューに表示できる選択肢の上限
+MAX_SELECT_OPTIONS = 25
+
 class LikeModal(ui.Modal, title="❤️ いいねする投稿"):
     """いいねする投稿IDを入力するモーダル"""
     
-    def __init__(self, like_manager: LikeManager, post_manager: PostManager, message_ref_manager: MessageRefManager):
+    def __init__(self, like_manager: AsyncLikeManager, post_manager: AsyncPostManager, message_ref_manager: AsyncMessageRefManager):
         super().__init__(timeout=None)
         self.like_manager = like_manager
         self.post_manager = post_manager
@@ -45,7 +47,7 @@ class LikeModal(ui.Modal, title="❤️ いいねする投稿"):
             post_id = int(self.post_id_input.value.strip())
             
             # 投稿情報を取得
-            post = self.post_manager.get_post(post_id, str(interaction.user.id))
+            post = await self.post_manager.get_post(post_id, str(interaction.user.id))
             
             if not post:
                 await interaction.followup.send(
@@ -57,7 +59,7 @@ class LikeModal(ui.Modal, title="❤️ いいねする投稿"):
                 return
             
             # いいねを保存
-            like_id = self.like_manager.save_like(
+            like_id = await self.like_manager.save_like(
                 post_id=post_id,
                 user_id=str(interaction.user.id),
                 display_name=interaction.user.display_name
@@ -79,40 +81,28 @@ class LikeModal(ui.Modal, title="❤️ いいねする投稿"):
                 likes_channel = interaction.guild.get_channel(likes_channel_id)
                 
                 if likes_channel:
-                    # 元の投稿メッセージ参照を取得
-                    message_ref_data = self.message_ref_manager.get_message_ref(post_id)
-                    if message_ref_data:
-                        message_id = message_ref_data.get('message_id')
-                        channel_id = message_ref_data.get('channel_id')
-                        
-                        if message_id and channel_id:
-                            try:
-                                # 元の投稿メッセージを取得
-                                original_channel = interaction.guild.get_channel(int(channel_id))
-                                if original_channel:
-                                    original_message = await original_channel.fetch_message(int(message_id))
-                                    
-                                    # 元の投稿を転送
-                                    forwarded_message = await original_message.forward(likes_channel)
-                                    
-                                    # いいねしたことを投稿
-                                    like_message = await likes_channel.send(f"❤️ いいね：{interaction.user.display_name}")
-                                    
-                                    # いいねファイルに両方のメッセージIDを保存
-                                    self.like_manager.update_like_message_id(like_id, str(like_message.id), str(likes_channel.id), str(forwarded_message.id))
-                                    logger.info(f"✅ いいねDiscordメッセージ処理完了: like_id={like_id}")
-                                else:
-                                    logger.warning(f"元のチャンネルが見つかりません: channel_id={channel_id}")
-                            except discord.NotFound:
-                                logger.warning(f"メッセージが見つかりません: message_id={message_id}")
-                            except discord.Forbidden:
-                                logger.warning(f"メッセージへのアクセス権限がありません: message_id={message_id}")
-                            except Exception as e:
-                                logger.error(f"メッセージ取得エラー: {e}")
-                        else:
-                            logger.warning(f"メッセージIDまたはチャンネルIDがありません: message_id={message_id}, channel_id={channel_id}")
+                    # 元の投稿メッセージのハンドルを取得（転送に本文は不要なため取得しない）
+                    original_message = await interaction.client.message_cache.post_message(post_id)
+                    if original_message:
+                        try:
+                            # 転送の直後にいいね通知が並ぶよう順に送信（片方が失敗したらもう片方も削除）
+                            forwarded_message, like_message = await send_in_order(
+                                original_message.forward(likes_channel),
+                                likes_channel.send(f"❤️ いいね：{interaction.user.display_name}")
+                            )
+                            
+                            # いいねファイルに両方のメッセージIDを保存
+                            await self.like_manager.update_like_message_id(like_id, post_id, str(interaction.user.id), str(like_message.id), str(likes_channel.id), str(forwarded_message.id))
+                            logger.info(f"✅ いいねDiscordメッセージ処理完了: like_id={like_id}")
+                        except discord.NotFound:
+                            interaction.client.message_cache.forget_post(post_id)
+                            logger.warning(f"メッセージが見つかりません: post_id={post_id}")
+                        except discord.Forbidden:
+                            logger.warning(f"メッセージへのアクセス権限がありません: post_id={post_id}")
+                        except Exception as e:
+                            logger.error(f"メッセージ転送エラー: {e}")
                     else:
-                        logger.warning(f"メッセージ参照が見つかりません: post_id={post_id}")
+                        logger.warning(f"元の投稿メッセージが見つかりません: post_id={post_id}")
                 else:
                     logger.warning(f"likesチャンネルが見つかりません: likes_channel_id={likes_channel_id}")
             except Exception as e:
@@ -144,9 +134,9 @@ class Like(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.like_manager = LikeManager()
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        self.like_manager = bot.store.likes
+        self.post_manager = bot.store.posts
+        self.message_ref_manager = bot.store.message_refs
         logger.info("Like cog が初期化されました")
     
     @app_commands.command(name='like', description='❤️ 投稿にいいねする')
@@ -155,8 +145,8 @@ class Like(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # 全ての投稿を取得
-            posts = self.post_manager.search_posts()
+            # セレクトメニューに表示できる新しい順の投稿だけを取得
+            posts = await self.post_manager.query_posts(limit=MAX_SELECT_OPTIONS)
             
             if not posts:
                 await interaction.followup.send(
@@ -166,9 +156,6 @@ class Like(commands.Cog):
                 )
                 return
             
-            # 作成日時でソート
-            posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # 選択ビューを表示
             from .like_select import LikeSelectView
             view = LikeSelectView(posts, self)
@@ -197,9 +184,9 @@ class Like(commands.Cog):
             user_id = str(interaction.user.id)
             display_name = interaction.user.display_name
             
-            # 既にいいねしているかチェック
-            existing_like = self.like_manager.get_like_by_user_and_post(post_id, user_id)
-            if existing_like:
+            # 既にいいねしていなければ保存（確認と保存は同じロック内で行う）
+            like_id = await self.like_manager.save_like_once(post_id, user_id, display_name)
+            if like_id is None:
                 await interaction.followup.send(
                     "❌ **既にいいねしています**\n\n"
                     f"投稿ID: {post_id} には既にいいねしています。",
@@ -207,9 +194,6 @@ class Like(commands.Cog):
                 )
                 return
             
-            # いいねを保存
-            like_id = self.like_manager.save_like(post_id, user_id, display_name)
-            
             # Discordメッセージ処理
             message_id = post_data.get('message_id')
             channel_id = post_data.get('channel_id')
@@ -221,19 +205,17 @@ class Like(commands.Cog):
                     likes_channel = interaction.guild.get_channel(likes_channel_id)
                     
                     if likes_channel:
-                        # 元のチャンネルを取得
-                        original_channel = interaction.guild.get_channel(int(channel_id))
-                        if original_channel:
-                            original_message = await original_channel.fetch_message(int(message_id))
-                            
-                            # 元の投稿を転送
-                            forwarded_message = await original_message.forward(likes_channel)
-                            
-                            # いいねしたことを投稿
-                            like_message = await likes_channel.send(f"❤️ いいね：{interaction.user.display_name}")
+                        # 元の投稿メッセージのハンドルを取得（転送に本文は不要なため取得しない）
+                        original_message = self.bot.message_cache.partial(channel_id, message_id)
+                        if original_message:
+                            # 転送の直後にいいね通知が並ぶよう順に送信（片方が失敗したらもう片方も削除）
+                            forwarded_message, like_message = await send_in_order(
+                                original_message.forward(likes_channel),
+                                likes_channel.send(f"❤️ いいね：{interaction.user.display_name}")
+                            )
                             
                             # いいねファイルに両方のメッセージIDを保存
-                            self.like_manager.update_like_message_id(like_id, str(like_message.id), str(likes_channel.id), str(forwarded_message.id))
+                            await self.like_manager.update_like_message_id(like_id, post_id, user_id, str(like_message.id), str(likes_channel.id), str(forwarded_message.id))
                             logger.info(f"✅ いいねDiscordメッセージ処理完了: like_id={like_id}")
                         else:
                             logger.warning(f"元のチャンネルが見つかりません: channel_id={channel_id}")
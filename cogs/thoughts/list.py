@@ -10,11 +10,14 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
+from managers.post_query import author_is
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# Embedに追加できるフィールド数の上限
+MAX_LIST_FIELDS = 25
+
 # 型定義
 PostData = Dict[str, Any]  # 投稿データの型
 
@@ -29,7 +32,7 @@ class List(commands.Cog):
             bot: Discord Bot インスタンス
         """
         self.bot: commands.Bot = bot
-        self.post_manager = PostManager()
+        self.post_manager = bot.store.posts
         logger.info("List cog が初期化されました")
 
     @app_commands.command(name='list', description='📋 あなたの投稿一覧を表示')
@@ -43,8 +46,11 @@ class List(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # 自分の投稿を取得
-            my_posts = self.post_manager.search_posts(user_id=str(interaction.user.id))
+            # 自分の投稿のうちEmbedに表示できる新しい順の分だけを取得
+            user_id = str(interaction.user.id)
+            my_posts = await self.post_manager.query_posts(
+                [author_is(user_id)], user_id=user_id, limit=MAX_LIST_FIELDS
+            )
             
             if not my_posts:
                 embed = Embed(
@@ -55,13 +61,13 @@ class List(commands.Cog):
                 await interaction.followup.send(embed=embed, ephemeral=True)
                 return
             
-            # 作成日時でソート
-            my_posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            # 件数はインデックスのメタデータだけで数える
+            total = await self.post_manager.count_posts([author_is(user_id)], user_id=user_id)
             
             # Embedを作成
             embed = Embed(
                 title="📋 あなたの投稿一覧",
-                description=f"全{len(my_posts)}件の投稿",
+                description=f"全{total}件の投稿",
                 color=discord.Color.blue()
             )
             
@@ -12,8 +12,6 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
 from config import get_channel_id, DEFAULT_AVATAR, extract_channel_id
 
 # モーダルとユーティリティをインポート
@@ -26,8 +24,8 @@ logger = logging.getLogger(__name__)
 class Post(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        self.post_manager = bot.store.posts
+        self.message_ref_manager = bot.store.message_refs
         logger.info("Post cog が初期化されました")
 
     @app_commands.command(name="post", description="📝 新規投稿を作成")
@@ -67,7 +65,7 @@ class Post(commands.Cog):
         """投稿を保存する"""
         try:
             # 投稿をデータベースに保存
-            post_id = self.post_manager.save_post(
+            post_id = await self.post_manager.save_post(
                 user_id=str(interaction.user.id),
                 content=message,
                 category=category,
@@ -107,7 +105,7 @@ class Post(commands.Cog):
             if not success:
                 # 投稿データを削除
                 try:
-                    self.post_manager.delete_post(post_id, str(interaction.user.id))
+                    await self.post_manager.delete_post(post_id, str(interaction.user.id))
                     logger.info(f"失敗した投稿を削除しました: 投稿ID={post_id}")
                 except Exception as delete_error:
                     logger.error(f"失敗した投稿の削除中にエラー: {delete_error}")
@@ -11,7 +11,6 @@ import os
 from typing import Optional, Dict, Any
 
 from config import get_channel_id, extract_channel_id, DEFAULT_AVATAR
-from managers.post_manager import PostManager
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +19,7 @@ class PostMessageManager:
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.post_manager = PostManager()
+        self.post_manager = bot.store.posts
     
     def create_embed(self, message: str, category: Optional[str], post_id: int, 
                    is_anonymous: bool, user: discord.User, image_url: Optional[str] = None,
@@ -147,19 +146,19 @@ class PostMessageManager:
                                user_id: str):
         """メッセージ参照を保存する"""
         try:
-            cog.message_ref_manager.save_message_ref(
+            await cog.message_ref_manager.save_message_ref(
                 post_id, 
                 str(sent_message.id), 
                 str(sent_message.channel.id), 
                 user_id
             )
+            # 転送・編集時に取得し直さないよう送信結果を保持
+            self.bot.message_cache.remember_post(post_id, sent_message)
             logger.info(f"メッセージ参照を保存しました: 投稿ID={post_id}")
             
             # 投稿データのmessage_idとchannel_idを更新
             try:
-                from managers.post_manager import PostManager
-                post_cog = PostManager()
-                post_cog.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
+                await self.post_manager.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
             except Exception as e:
                 logger.warning(f"投稿のmessage_ref更新中にエラー: {e}")
                 
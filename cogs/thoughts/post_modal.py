@@ -8,8 +8,7 @@ from discord import app_commands, ui, Interaction, Embed
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncPostManager, AsyncMessageRefManager
 from config import get_channel_id, DEFAULT_AVATAR
 
 # ロガーの設定
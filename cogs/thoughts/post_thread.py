@@ -11,7 +11,7 @@ import os
 from typing import Optional, Dict, Any
 
 from config import get_channel_id, extract_channel_id
-from managers.post_manager import PostManager
+from .private_thread_utils import PRIVATE_THREAD_PREFIX, find_private_thread, thread_owner_id
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,7 @@ class PostThreadManager:
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.post_manager = PostManager()
+        self.post_manager = bot.store.posts
     
     async def create_private_thread(self, interaction: Interaction, user_id: str, post_id: int) -> Optional[discord.Thread]:
         """プライベートスレッドを作成する"""
@@ -44,7 +44,7 @@ class PostThreadManager:
             logger.info(f"✅ 非公開チャンネル取得成功: {private_channel.name} (ID: {private_channel.id})")
             
             # スレッドプレフィックス
-            thread_prefix = f"非公開投稿 - {user_id}"
+            thread_prefix = f"{PRIVATE_THREAD_PREFIX}{user_id}"
             thread_name = f"{thread_prefix} ({interaction.user.name})"
             
             logger.info(f"🔧 プライベートスレッド作成開始:")
@@ -80,7 +80,7 @@ class PostThreadManager:
                 return None
             
             # 既存スレッドを検索
-            target_thread = await self.find_existing_thread(private_channel, thread_prefix)
+            target_thread = await self.find_existing_thread(private_channel, user_id)
             
             if target_thread:
                 thread = target_thread
@@ -100,6 +100,7 @@ class PostThreadManager:
                         invitable=False
                     )
                     logger.info(f"✅ プライベートスレッド作成成功: {thread.name} (ID: {thread.id})")
+                    await self.bot.store.private_threads.set_thread(user_id, thread.id)
                 except discord.Forbidden as e:
                     logger.error(f"❌ プライベートスレッド作成権限なし: {e}")
                     logger.error(f"❌ ボット権限確認:")
@@ -155,27 +156,13 @@ class PostThreadManager:
             logger.error(f"❌ プライベートスレッド作成中にエラー: {e}", exc_info=True)
             return None
     
-    async def find_existing_thread(self, private_channel: discord.TextChannel, thread_prefix: str) -> Optional[discord.Thread]:
-        """既存のスレッドを検索する"""
-        target_thread = None
-        
-        # アクティブスレッドから検索
-        for t in private_channel.threads:
-            if t.name.startswith(thread_prefix):
-                target_thread = t
-                break
-        
-        # アーカイブされたスレッドからも検索
-        if target_thread is None:
-            try:
-                async for t in private_channel.archived_threads(private=True, limit=50):
-                    if t.name.startswith(thread_prefix):
-                        target_thread = t
-                        break
-            except Exception as e:
-                logger.warning(f"アーカイブスレッドの検索中にエラー: {e}")
-        
-        return target_thread
+    async def find_existing_thread(self, private_channel: discord.TextChannel, user_id: str) -> Optional[discord.Thread]:
+        """既存のスレッドを検索する（対応表を優先し、スレッド一覧の走査は初回のみ）"""
+        try:
+            return await find_private_thread(self.bot, private_channel, str(user_id))
+        except Exception as e:
+            logger.warning(f"既存スレッドの検索中にエラー: {e}")
+            return None
     
 class PostThread(commands.Cog):
     """プライベートスレッドCog"""
@@ -184,6 +171,40 @@ class PostThread(commands.Cog):
         self.bot = bot
         self.thread_manager = PostThreadManager(bot)
         logger.info("PostThread cog が初期化されました")
+    
+    @staticmethod
+    def _is_private_channel_thread(thread: discord.Thread) -> bool:
+        """非公開チャンネル配下のプライベートスレッドかどうか"""
+        try:
+            private_channel_id = extract_channel_id(get_channel_id('private'))
+        except Exception:
+            return False
+        return thread.type == discord.ChannelType.private_thread and thread.parent_id == private_channel_id
+    
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent) -> None:
+        """削除されたスレッドを対応表から外す"""
+        try:
+            await self.bot.store.private_threads.remove_thread(payload.thread_id)
+        except Exception as e:
+            logger.error(f"❌ プライベートスレッド対応表の更新エラー: {e}")
+    
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread) -> None:
+        """スレッド名の変更に合わせて対応表を修復する"""
+        if before.name == after.name or not self._is_private_channel_thread(after):
+            return
+        
+        try:
+            thread_map = self.bot.store.private_threads
+            owner_id = thread_owner_id(after)
+            if owner_id is None:
+                # 非公開投稿用の名前でなくなったスレッドは登録を外す
+                await thread_map.remove_thread(after.id)
+            elif thread_map.get_thread_id(owner_id) != after.id:
+                await thread_map.set_thread(owner_id, after.id)
+        except Exception as e:
+            logger.error(f"❌ プライベートスレッド対応表の更新エラー: {e}")
 
 async def setup(bot: commands.Bot) -> None:
     """Cogをセットアップする"""
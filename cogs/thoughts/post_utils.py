@@ -14,8 +14,7 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncPostManager, AsyncMessageRefManager
 from config import get_channel_id, DEFAULT_AVATAR, extract_channel_id
 
 # プライベートスレッドユーティリティをインポート
@@ -77,12 +76,14 @@ async def create_public_post(
         
         # メッセージ送信成功後にmessage_refを更新
         if sent_message:
-            cog.message_ref_manager.save_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id), str(interaction.user.id))
+            await cog.message_ref_manager.save_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id), str(interaction.user.id))
+            # 転送・編集時に取得し直さないよう送信結果を保持
+            interaction.client.message_cache.remember_post(post_id, sent_message)
             logger.info(f"メッセージ参照を保存しました: 投稿ID={post_id}")
             
             # 投稿データのmessage_idとchannel_idを更新
             try:
-                cog.post_manager.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
+                await cog.post_manager.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
             except Exception as e:
                 logger.warning(f"投稿のmessage_ref更新中にエラー: {e}")
         else:
@@ -169,12 +170,14 @@ async def create_private_post(
         
         # 非公開投稿のmessage_refを保存
         if sent_message:
-            cog.message_ref_manager.save_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id), str(interaction.user.id))
+            await cog.message_ref_manager.save_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id), str(interaction.user.id))
+            # 転送・編集時に取得し直さないよう送信結果を保持
+            interaction.client.message_cache.remember_post(post_id, sent_message)
             logger.info(f"メッセージ参照を保存しました: 投稿ID={post_id}")
             
             # 投稿データのmessage_idとchannel_idを更新
             try:
-                cog.post_manager.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
+                await cog.post_manager.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
             except Exception as e:
                 logger.warning(f"投稿のmessage_ref更新中にエラー: {e}")
         else:
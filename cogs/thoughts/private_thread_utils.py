@@ -4,7 +4,7 @@
 
 import logging
 import os
-from typing import Optional
+from typing import Dict, Optional
 
 import discord
 from discord import app_commands, ui, Interaction, Embed
@@ -14,13 +14,90 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncPostManager, AsyncMessageRefManager
 from config import get_channel_id, extract_channel_id
 
 # ロガー設定
 logger = logging.getLogger(__name__)
 
+# 非公開投稿用スレッド名の接頭辞（後ろにユーザーIDと表示名が続く）
+PRIVATE_THREAD_PREFIX = "非公開投稿 - "
+
+def thread_owner_id(thread: discord.Thread) -> Optional[str]:
+    """スレッド名から非公開投稿用スレッドの持ち主のユーザーIDを取得（該当しなければNone）"""
+    if not thread.name.startswith(PRIVATE_THREAD_PREFIX):
+        return None
+    owner_id = thread.name[len(PRIVATE_THREAD_PREFIX):].split(" ", 1)[0]
+    return owner_id if owner_id.isdigit() else None
+
+async def backfill_private_threads(
+    client: discord.Client,
+    private_channel: discord.TextChannel
+) -> Dict[str, discord.Thread]:
+    """対応表ができる前のスレッドを全件走査して対応表に取り込む（初回のみ）
+
+    アーカイブ済みスレッドは最近アーカイブされた順に返るため、重複があれば最近のものを使う。
+    """
+    found: Dict[str, discord.Thread] = {}
+    
+    for t in private_channel.threads:
+        owner_id = thread_owner_id(t)
+        if owner_id and owner_id not in found:
+            found[owner_id] = t
+    
+    async for t in private_channel.archived_threads(private=True, limit=None):
+        owner_id = thread_owner_id(t)
+        if owner_id and owner_id not in found:
+            found[owner_id] = t
+    
+    await client.store.private_threads.merge_threads({owner_id: t.id for owner_id, t in found.items()})
+    return found
+
+async def find_private_thread(
+    client: discord.Client,
+    private_channel: discord.TextChannel,
+    user_id: str
+) -> Optional[discord.Thread]:
+    """ユーザーの非公開投稿用スレッドを検索（見つからなければNone）
+
+    対応表に登録があればゲートウェイのキャッシュから引き、アーカイブ済みでキャッシュに
+    ない場合のみそのスレッドを1件取得する。スレッド一覧のAPIは対応表の初回取り込み時だけ使う。
+    """
+    thread_map = client.store.private_threads
+    
+    thread_id = thread_map.get_thread_id(user_id)
+    if thread_id is not None:
+        thread = private_channel.guild.get_thread(thread_id)
+        if thread is None:
+            try:
+                thread = await client.fetch_channel(thread_id)
+            except discord.NotFound:
+                thread = None
+        
+        if isinstance(thread, discord.Thread) and thread.parent_id == private_channel.id:
+            return thread
+        
+        # 削除済み・別チャンネルのスレッドは登録を外して検索し直す
+        logger.warning(f"⚠️ 登録済みのプライベートスレッドが見つかりません: user_id={user_id}, thread_id={thread_id}")
+        await thread_map.remove_thread(thread_id)
+    
+    # 未登録ならアクティブスレッド（ゲートウェイのキャッシュ）から検索
+    for t in private_channel.threads:
+        if thread_owner_id(t) == user_id:
+            await thread_map.set_thread(user_id, t.id)
+            return t
+    
+    # アーカイブ済みスレッドは対応表の初回取り込み時に一度だけ走査する
+    if not thread_map.backfilled:
+        try:
+            return (await backfill_private_threads(client, private_channel)).get(user_id)
+        except discord.Forbidden:
+            logger.warning(f"⚠️ アーカイブスレッドのアクセス権限がありません")
+        except Exception as e:
+            logger.error(f"❌ アーカイブスレッド検索エラー: {e}")
+    
+    return None
+
 async def find_or_create_private_thread(
     interaction: Interaction,
     private_channel: discord.TextChannel,
@@ -31,31 +108,17 @@ async def find_or_create_private_thread(
         # user_idがなければinteraction.userを使用
         target_user_id = user_id if user_id else str(interaction.user.id)
         
-        # 非公開投稿用の変数を初期化
-        thread_prefix = f"非公開投稿 - {target_user_id}"
-        target_thread: Optional[discord.Thread] = None
+        # 非公開投稿の変数を初期化
+        thread_prefix = f"{PRIVATE_THREAD_PREFIX}{target_user_id}"
         
-        # アクティブスレッドから検索
-        for t in private_channel.threads:
-            if t.name.startswith(thread_prefix):
-                target_thread = t
-                break
-
-        # アーカイブされたスレッドからも検索
-        if target_thread is None:
-            try:
-                async for t in private_channel.archived_threads(private=True, limit=50):
-                    if t.name.startswith(thread_prefix):
-                        target_thread = t
-                        break
-            except discord.Forbidden:
-                logger.warning(f"⚠️ アーカイブスレッドのアクセス権限がありません")
-            except Exception as e:
-                logger.error(f"❌ アーカイブスレッド検索エラー: {e}")
-
-        # スレッドがなければ新しく作成
+        # 対応表・アクティブスレッドから検索
+        target_thread = await find_private_thread(interaction.client, private_channel, target_user_id)
+        
+        # スレッドがなければ新しく作成して対応表に登録
         if target_thread is None:
             target_thread = await create_private_thread(interaction, private_channel, thread_prefix, target_user_id)
+            if target_thread is not None:
+                await interaction.client.store.private_threads.set_thread(target_user_id, target_thread.id)
         else:
             # 既存スレッドをアンアーカイブ
             if target_thread.archived:
@@ -12,17 +12,19 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.reply_manager import ReplyManager
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.async_managers import AsyncReplyManager, AsyncPostManager, AsyncMessageRefManager
 from config import get_channel_id, extract_channel_id
+from utils.side_effects import send_in_order
 
 logger = logging.getLogger(__name__)
 
+# Discordのセレクトメニューに表示できる選択肢の上限
+MAX_SELECT_OPTIONS = 25
+
 class ReplyModal(ui.Modal, title="💬 リプライする投稿"):
     """リプライする投稿IDと内容を入力するモーダル"""
     
-    def __init__(self, reply_manager: ReplyManager, post_manager: PostManager, message_ref_manager: MessageRefManager):
+    def __init__(self, reply_manager: AsyncReplyManager, post_manager: AsyncPostManager, message_ref_manager: AsyncMessageRefManager):
         super().__init__(timeout=None)
         self.reply_manager = reply_manager
         self.post_manager = post_manager
@@ -55,7 +57,7 @@ class ReplyModal(ui.Modal, title="💬 リプライする投稿"):
             reply_content = self.reply_input.value.strip()
             
             # 親投稿の存在確認
-            parent_post = self.post_manager.get_post(post_id, str(interaction.user.id))
+            parent_post = await self.post_manager.get_post(post_id, str(interaction.user.id))
             
             if not parent_post:
                 await interaction.followup.send(
@@ -65,7 +67,7 @@ class ReplyModal(ui.Modal, title="💬 リプライする投稿"):
                 return
             
             # リプライを保存
-            reply_id = self.reply_manager.save_reply(
+            reply_id = await self.reply_manager.save_reply(
                 post_id=post_id,
                 user_id=str(interaction.user.id),
                 content=reply_content,
@@ -88,47 +90,38 @@ class ReplyModal(ui.Modal, title="💬 リプライする投稿"):
                 replies_channel = interaction.guild.get_channel(replies_channel_id)
                 
                 if replies_channel:
-                    # 元の投稿メッセージ参照を取得
-                    message_ref_data = self.message_ref_manager.get_message_ref(post_id)
-                    if message_ref_data:
-                        message_id = message_ref_data.get('message_id')
-                        channel_id = message_ref_data.get('channel_id')
-                        
-                        if message_id and channel_id:
-                            try:
-                                # 元の投稿メッセージを取得
-                                original_channel = interaction.guild.get_channel(int(channel_id))
-                                if original_channel:
-                                    # 元の投稿メッセージを取得
-                                    original_message = await original_channel.fetch_message(int(message_id))
-                                    
-                                    # 元の投稿を転送
-                                    forwarded_message = await original_message.forward(replies_channel)
-                                    
-                                    # リプライを投稿
-                                    reply_embed = discord.Embed(
-                                        title=f"💬 リプライ：{interaction.user.display_name}",
-                                        description=reply_content,
-                                        color=discord.Color.green()
-                                    )
-                                    reply_embed.set_footer(text=f"リプライID: {reply_id}")
-                                    reply_message = await replies_channel.send(embed=reply_embed)
-                                    
-                                    # リプライファイルに両方のメッセージIDを保存
-                                    self.reply_manager.update_reply_message_id(reply_id, str(reply_message.id), str(replies_channel.id), str(forwarded_message.id))
-                                    logger.info(f"✅ リプライDiscordメッセージ処理完了: reply_id={reply_id}")
-                                else:
-                                    logger.warning(f"元のチャンネルが見つかりません: channel_id={channel_id}")
-                            except discord.NotFound:
-                                logger.warning(f"メッセージが見つかりません: message_id={message_id}")
-                            except discord.Forbidden:
-                                logger.warning(f"メッセージへのアクセス権限がありません: message_id={message_id}")
-                            except Exception as e:
-                                logger.error(f"メッセージ取得エラー: {e}")
-                        else:
-                            logger.warning(f"メッセージIDまたはチャンネルIDがありません: message_id={message_id}, channel_id={channel_id}")
+                    # 元の投稿メッセージのハンドルを取得（転送に本文は不要なため取得しない）
+                    original_message = await interaction.client.message_cache.post_message(post_id)
+                    if original_message:
+                        try:
+                            # リプライのEmbedを作成
+                            reply_embed = discord.Embed(
+                                title=f"💬 リプライ：{interaction.user.display_name}",
+                                description=reply_content,
+                                color=discord.Color.green()
+                            )
+                            reply_embed.set_footer(text=f"リプライID: {reply_id}")
+                            
+                            # 転送の直後にリプライが並ぶよう順に送信（片方が失敗したらもう片方も削除）
+                            forwarded_message, reply_message = await send_in_order(
+                                original_message.forward(replies_channel),
+                                replies_channel.send(embed=reply_embed)
+                            )
+                            # 編集時に取得し直さないよう送信結果を保持
+                            interaction.client.message_cache.remember(reply_message)
+                            
+                            # リプライファイルに両方のメッセージIDを保存
+                            await self.reply_manager.update_reply_message_id(reply_id, str(reply_message.id), str(replies_channel.id), str(forwarded_message.id))
+                            logger.info(f"✅ リプライDiscordメッセージ処理完了: reply_id={reply_id}")
+                        except discord.NotFound:
+                            interaction.client.message_cache.forget_post(post_id)
+                            logger.warning(f"メッセージが見つかりません: post_id={post_id}")
+                        except discord.Forbidden:
+                            logger.warning(f"メッセージへのアクセス権限がありません: post_id={post_id}")
+                        except Exception as e:
+                            logger.error(f"メッセージ転送エラー: {e}")
                     else:
-                        logger.warning(f"メッセージ参照が見つかりません: post_id={post_id}")
+                        logger.warning(f"元の投稿メッセージが見つかりません: post_id={post_id}")
                 else:
                     logger.warning(f"repliesチャンネルが見つかりません: replies_channel_id={replies_channel_id}")
             except Exception as e:
@@ -160,9 +153,9 @@ class Reply(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.reply_manager = ReplyManager()
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        self.reply_manager = bot.store.replies
+        self.post_manager = bot.store.posts
+        self.message_ref_manager = bot.store.message_refs
         logger.info("Reply cog が初期化されました")
     
     @app_commands.command(name='reply', description='💬 投稿にリプライする')
@@ -171,8 +164,8 @@ class Reply(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # 全ての投稿を取得
-            posts = self.post_manager.search_posts()
+            # セレクトメニューに表示できる新しい順の投稿だけを取得
+            posts = await self.post_manager.query_posts(limit=MAX_SELECT_OPTIONS)
             
             if not posts:
                 await interaction.followup.send(
@@ -182,9 +175,6 @@ class Reply(commands.Cog):
                 )
                 return
             
-            # 作成日時でソート
-            posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # 選択ビューを表示
             from .reply_select import ReplySelectView
             view = ReplySelectView(posts, self)
@@ -214,7 +204,7 @@ class Reply(commands.Cog):
             display_name = interaction.user.display_name
             
             # リプライを保存
-            reply_id = self.reply_manager.save_reply(post_id, user_id, reply_content, display_name)
+            reply_id = await self.reply_manager.save_reply(post_id, user_id, reply_content, display_name)
             
             # Discordメッセージ処理
             message_id = post_data.get('message_id')
@@ -227,25 +217,27 @@ class Reply(commands.Cog):
                     replies_channel = interaction.guild.get_channel(replies_channel_id)
                     
                     if replies_channel:
-                        # 元のチャンネルを取得
-                        original_channel = interaction.guild.get_channel(int(channel_id))
-                        if original_channel:
-                            original_message = await original_channel.fetch_message(int(message_id))
-                            
-                            # 元の投稿を転送
-                            forwarded_message = await original_message.forward(replies_channel)
-                            
-                            # リプライを投稿
+                        # 元の投稿メッセージのハンドルを取得（転送に本文は不要なため取得しない）
+                        original_message = self.bot.message_cache.partial(channel_id, message_id)
+                        if original_message:
+                            # リプライのEmbedを作成
                             reply_embed = discord.Embed(
                                 title=f"💬 リプライ：{interaction.user.display_name}",
                                 description=reply_content,
                                 color=discord.Color.green()
                             )
                             reply_embed.set_footer(text=f"リプライID: {reply_id}")
-                            reply_message = await replies_channel.send(embed=reply_embed)
+                            
+                            # 転送の直後にリプライが並ぶよう順に送信（片方が失敗したらもう片方も削除）
+                            forwarded_message, reply_message = await send_in_order(
+                                original_message.forward(replies_channel),
+                                replies_channel.send(embed=reply_embed)
+                            )
+                            # 編集時に取得し直さないよう送信結果を保持
+                            self.bot.message_cache.remember(reply_message)
                             
                             # リプライファイルに両方のメッセージIDを保存
-                            self.reply_manager.update_reply_message_id(reply_id, str(reply_message.id), str(replies_channel.id), str(forwarded_message.id))
+                            await self.reply_manager.update_reply_message_id(reply_id, str(reply_message.id), str(replies_channel.id), str(forwarded_message.id))
                             logger.info(f"✅ リプライDiscordメッセージ処理完了: reply_id={reply_id}")
                         else:
                             logger.warning(f"元のチャンネルが見つかりません: channel_id={channel_id}")
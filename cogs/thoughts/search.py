@@ -16,17 +16,13 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.reply_manager import ReplyManager
-from managers.like_manager import LikeManager
-from managers.message_ref_manager import MessageRefManager
-from managers.action_manager import ActionManager
 from config import get_channel_id, extract_channel_id
 
 # モーダルとユーティリティをインポート
 from .search_modal import SearchModal
 from .search_type_view import SearchTypeView
 from .search_pagination import SearchResultsView
+from .search_cursor import SearchCursor, SearchCursorCache
 from .search_utils import search_posts, search_replies, create_search_embed
 
 # ロガー設定
@@ -44,11 +40,13 @@ class Search(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.post_manager = PostManager()
-        self.reply_manager = ReplyManager()
-        self.like_manager = LikeManager()
-        self.message_ref_manager = MessageRefManager()
-        self.action_manager = ActionManager()
+        self.post_manager = bot.store.posts
+        self.reply_manager = bot.store.replies
+        self.like_manager = bot.store.likes
+        self.message_ref_manager = bot.store.message_refs
+        self.action_manager = bot.store.actions
+        # 開いている検索結果ビューのカーソル
+        self.search_cursors = SearchCursorCache()
         logger.info("Search cog が初期化されました")
     
     @app_commands.command(name="search", description="🔍 投稿を検索")
@@ -76,14 +74,16 @@ class Search(commands.Cog):
             )
     
         
-    async def show_search_results(self, interaction: Interaction, results: List[Dict[str, Any]], search_type: str) -> None:
-        """検索結果を表示"""
+    async def show_search_results(self, interaction: Interaction, cursor: SearchCursor,
+                                  results: List[Dict[str, Any]]) -> None:
+        """検索結果の最初のページを表示（cursorは取得済みのページ位置を持つ）"""
         try:
             # Embedを作成
-            embed = create_search_embed(results, search_type)
+            embed = create_search_embed(results, cursor.search_type, cursor.page, cursor.total)
             
-            # ビューを作成
-            view = SearchResultsView(self, results, search_type)
+            # 以降のページはカーソルから取得する
+            self.search_cursors.add(cursor)
+            view = SearchResultsView(self, cursor)
             
             # 結果を送信
             await interaction.followup.send(embed=embed, view=view, ephemeral=True)
@@ -96,10 +96,10 @@ class Search(commands.Cog):
                 ephemeral=True
             )
     
-    def _get_post_stats(self) -> Dict[str, int]:
+    async def _get_post_stats(self) -> Dict[str, int]:
         """投稿統計を取得"""
         try:
-            all_posts = self.post_manager.get_all_posts()
+            all_posts = await self.post_manager.get_all_posts()
             
             stats = {
                 'total': len(all_posts),
@@ -115,14 +115,13 @@ class Search(commands.Cog):
             logger.error(f"投稿統計取得中にエラー: {e}")
             return {}
     
-    def _get_reply_stats(self) -> Dict[str, int]:
+    async def _get_reply_stats(self) -> Dict[str, int]:
         """リプライ統計を取得"""
         try:
-            all_replies = self.reply_manager.get_all_replies()
-            
+            # 件数はインデックスから、直近件数はリプライを1件ずつ読みながら数える
             stats = {
-                'total': len(all_replies),
-                'recent': len([r for r in all_replies if self._is_recent(r.get('created_at'))])
+                'total': await self.reply_manager.get_reply_count(),
+                'recent': sum(1 for r in await self.reply_manager.get_all_replies() if self._is_recent(r.get('created_at')))
             }
             
             return stats
@@ -0,0 +1,183 @@
+"""
+検索結果のサーバー側カーソル
+
+ビューは結果の一覧を保持せず、検索条件と表示中ページの先頭・末尾の並び順キーだけを持つ。
+ページを移動するたびにインデックスから次のITEMS_PER_PAGE件だけを取得する。
+"""
+
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+# マネージャーをインポート
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from managers.post_index import parse_timestamp
+from managers.time_index import TimeOrderedIndex
+
+from .search_embed import ITEMS_PER_PAGE
+from .search_posts import search_posts, count_posts
+from .search_replies import search_replies, count_replies
+
+# ロガー設定
+logger = logging.getLogger(__name__)
+
+# 検索結果ビューの有効期限（秒、最後の操作から数える）
+SEARCH_VIEW_TTL = float(os.getenv('SEARCH_VIEW_TTL', '900'))
+# 保持する検索カーソルの上限（超えたら最も長く使われていないものから破棄）
+SEARCH_CURSOR_CACHE_SIZE = int(os.getenv('SEARCH_CURSOR_CACHE_SIZE', '256'))
+
+# 型定義
+SortKey = Tuple[float, int]
+
+def result_sort_key(item: Dict[str, Any]) -> SortKey:
+    """検索結果の並び順キー（インデックスと同じ作成日時・IDの組）"""
+    return TimeOrderedIndex.sort_key(int(item['id']), parse_timestamp(item.get('created_at')))
+
+class SearchCursor:
+    """1回の検索の条件と表示位置"""
+    
+    __slots__ = ('cursor_id', 'search_type', 'params', 'page', 'first_key', 'last_key',
+                 'has_next', 'total', 'expires_at')
+    
+    def __init__(self, search_type: str, params: Dict[str, Any]):
+        self.cursor_id = uuid.uuid4().hex
+        self.search_type = search_type
+        self.params = params
+        self.page = 0
+        self.first_key: Optional[SortKey] = None
+        self.last_key: Optional[SortKey] = None
+        self.has_next = False
+        # 件数はインデックスのメタデータだけで数える（不明ならNone）
+        self.total: Optional[int] = None
+        self.expires_at = 0.0
+    
+    @property
+    def ranked(self) -> bool:
+        """関連度順の検索か（キーワードがある場合のみ）"""
+        return bool(self.params.get('ranked') and self.params.get('keyword'))
+    
+    @property
+    def total_pages(self) -> Optional[int]:
+        """総ページ数（件数が不明ならNone）"""
+        if self.total is None:
+            return None
+        return max(1, (self.total + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
+    
+    async def _fetch(self, cog, older_than: SortKey = None, newer_than: SortKey = None,
+                     offset: int = 0) -> List[Dict[str, Any]]:
+        """カーソル位置の前後からITEMS_PER_PAGE+1件を取得（1件多く取って続きの有無を判定）
+
+        関連度順は日時のキーで位置を表せないため、offsetで取得する。
+        """
+        limit = ITEMS_PER_PAGE + 1
+        if self.search_type == "リプライ":
+            return await search_replies(
+                **self.params, reply_manager=cog.reply_manager,
+                limit=limit, older_than=older_than, newer_than=newer_than
+            )
+        return await search_posts(
+            **self.params, post_manager=cog.post_manager, like_manager=cog.like_manager,
+            limit=limit, older_than=older_than, newer_than=newer_than, offset=offset
+        )
+    
+    def _set_page(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """表示するページの先頭・末尾のキーを記録"""
+        if items:
+            self.first_key = result_sort_key(items[0])
+            self.last_key = result_sort_key(items[-1])
+        return items
+    
+    async def first_page(self, cog) -> List[Dict[str, Any]]:
+        """最初のページを取得"""
+        if self.search_type == "リプライ":
+            self.total = await count_replies(**self.params, reply_manager=cog.reply_manager)
+        else:
+            self.total = await count_posts(**self.params, post_manager=cog.post_manager)
+        
+        items = await self._fetch(cog)
+        self.page = 1
+        self.has_next = len(items) > ITEMS_PER_PAGE
+        return self._set_page(items[:ITEMS_PER_PAGE])
+    
+    async def next_page(self, cog) -> List[Dict[str, Any]]:
+        """次のページを取得（続きがなければ空）"""
+        if self.ranked:
+            items = await self._fetch(cog, offset=self.page * ITEMS_PER_PAGE)
+        else:
+            items = await self._fetch(cog, older_than=self.last_key)
+        if not items:
+            self.has_next = False
+            return []
+        
+        self.page += 1
+        self.has_next = len(items) > ITEMS_PER_PAGE
+        return self._set_page(items[:ITEMS_PER_PAGE])
+    
+    async def prev_page(self, cog) -> List[Dict[str, Any]]:
+        """前のページを取得（表示中の先頭に近い順に取得して新しい順に並べたもの）"""
+        if self.ranked:
+            if self.page <= 2:
+                return await self.first_page(cog)
+            self.page -= 1
+            self.has_next = True
+            items = await self._fetch(cog, offset=(self.page - 1) * ITEMS_PER_PAGE)
+            return self._set_page(items[:ITEMS_PER_PAGE])
+        
+        items = await self._fetch(cog, newer_than=self.first_key)
+        if not items:
+            return await self.first_page(cog)
+        
+        # 1件多く取れなければ、それより前のページはない
+        self.page = max(2, self.page) - 1 if len(items) > ITEMS_PER_PAGE else 1
+        self.has_next = True
+        return self._set_page(items[-ITEMS_PER_PAGE:])
+
+class SearchCursorCache:
+    """検索カーソルのLRU（期限切れ・上限超過のカーソルを破棄）"""
+    
+    def __init__(self, max_size: int = SEARCH_CURSOR_CACHE_SIZE, ttl: float = SEARCH_VIEW_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cursors: "OrderedDict[str, SearchCursor]" = OrderedDict()
+    
+    def add(self, cursor: SearchCursor) -> None:
+        """カーソルを登録"""
+        cursor.expires_at = time.monotonic() + self.ttl
+        self._cursors[cursor.cursor_id] = cursor
+        self._cursors.move_to_end(cursor.cursor_id)
+        self._evict()
+    
+    def get(self, cursor_id: str) -> Optional[SearchCursor]:
+        """カーソルを取得して有効期限を延長（期限切れ・破棄済みならNone）"""
+        cursor = self._cursors.get(cursor_id)
+        if cursor is None:
+            return None
+        
+        now = time.monotonic()
+        if cursor.expires_at <= now:
+            del self._cursors[cursor_id]
+            return None
+        
+        cursor.expires_at = now + self.ttl
+        self._cursors.move_to_end(cursor_id)
+        return cursor
+    
+    def discard(self, cursor_id: str) -> None:
+        """カーソルを破棄"""
+        self._cursors.pop(cursor_id, None)
+    
+    def _evict(self) -> None:
+        """期限切れのカーソルと上限を超えた分を古い順に破棄"""
+        now = time.monotonic()
+        while self._cursors:
+            cursor_id, cursor = next(iter(self._cursors.items()))
+            if cursor.expires_at > now and len(self._cursors) <= self.max_size:
+                break
+            del self._cursors[cursor_id]
+    
+    def __len__(self) -> int:
+        return len(self._cursors)
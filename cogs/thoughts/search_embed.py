@@ -4,7 +4,7 @@
 
 import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 import discord
 from discord import app_commands, ui, Interaction, Embed
@@ -20,9 +20,12 @@ def create_search_embed(
     results: List[Dict[str, Any]],
     search_type: str,
     page: int = 1,
-    total_pages: int = 1
+    total: Optional[int] = None
 ) -> Embed:
-    """検索結果のEmbedを作成"""
+    """検索結果のEmbedを作成
+
+    resultsは表示するページの分だけを受け取る（totalは件数が分かる場合のみ指定）。
+    """
     embed = discord.Embed(
         title=f"🔍 {search_type}検索結果",
         color=discord.Color.blue()
@@ -39,10 +42,8 @@ def create_search_embed(
     
     # 結果を表示
     start_idx = (page - 1) * ITEMS_PER_PAGE
-    end_idx = start_idx + ITEMS_PER_PAGE
-    page_results = results[start_idx:end_idx]
     
-    for i, item in enumerate(page_results, start=start_idx + 1):
+    for i, item in enumerate(results, start=start_idx + 1):
         if search_type == "投稿":
             content = item.get('content', '')[:200] + "..." if len(item.get('content', '')) > 200 else item.get('content', '')
             category = item.get('category', '未分類')
@@ -71,8 +72,10 @@ def create_search_embed(
         )
     
     # フッター情報
-    embed.set_footer(
-        text=f"ページ {page}/{total_pages} | 全{len(results)}件の結果"
-    )
+    if total is not None:
+        total_pages = max(1, (total + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
+        embed.set_footer(text=f"ページ {page}/{total_pages} | 全{total}件の結果")
+    else:
+        embed.set_footer(text=f"ページ {page}")
     
     return embed
@@ -17,9 +17,13 @@ logger = logging.getLogger(__name__)
 class SearchModal(ui.Modal, title='🔍 詳細検索'):
     """詳細検索用モーダル"""
     
-    def __init__(self, cog) -> None:
+    def __init__(self, cog, ranked: bool = False, search_type: str = "投稿") -> None:
         super().__init__(timeout=None)
         self.cog = cog
+        # 検索対象（"投稿"・"リプライ"）
+        self.search_type = search_type
+        # キーワードとの関連度順で表示するか
+        self.ranked = ranked
         
         self.keyword = ui.TextInput(
             label='🔍 キーワード',
@@ -95,31 +99,33 @@ class SearchModal(ui.Modal, title='🔍 詳細検索'):
             date_from = parse_date_string(date_from_str) if date_from_str else None
             date_to = parse_date_string(date_to_str) if date_to_str else None
             
-            # 匿名フィルター（デフォルトは含まない）
-            is_anonymous = None
+            params = {
+                "keyword": keyword,
+                "category": category,
+                "author_id": author_id,
+                "date_from": date_from,
+                "date_to": date_to
+            }
+            if self.search_type != "リプライ":
+                # 匿名フィルター（デフォルトは含まない）
+                params["is_anonymous"] = None
+                params["ranked"] = self.ranked
             
-            # 検索実行
-            from .search_utils import search_posts
-            results = search_posts(
-                keyword=keyword,
-                category=category,
-                author_id=author_id,
-                date_from=date_from,
-                date_to=date_to,
-                is_anonymous=is_anonymous,
-                post_manager=self.cog.post_manager
-            )
+            # 検索実行（最初のページだけを取得し、以降はカーソルで取得）
+            from .search_cursor import SearchCursor
+            cursor = SearchCursor(self.search_type, params)
+            results = await cursor.first_page(self.cog)
             
             if not results:
                 await interaction.followup.send(
                     "❌ **検索結果がありません**\n\n"
-                    "指定された条件に一致する投稿が見つかりませんでした。",
+                    f"指定された条件に一致する{self.search_type}が見つかりませんでした。",
                     ephemeral=True
                 )
                 return
             
             # 結果を表示
-            await self.cog.show_search_results(interaction, results, "投稿")
+            await self.cog.show_search_results(interaction, cursor, results)
             
         except Exception as e:
             logger.error(f"検索モーダル送信中にエラー: {e}", exc_info=True)
@@ -4,40 +4,40 @@
 
 import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 import discord
 from discord import app_commands, ui, Interaction
 from discord.ext import commands
 
+from .search_cursor import SearchCursor, SEARCH_VIEW_TTL
+
 # ロガー設定
 logger = logging.getLogger(__name__)
 
-# 定数
-ITEMS_PER_PAGE = 3
-
 class SearchResultsView(ui.View):
-    """検索結果表示用ビュー"""
+    """検索結果表示用ビュー
+
+    結果の一覧は保持せず、Cogのカーソルキャッシュに登録したカーソルのIDだけを持つ。
+    """
     
-    def __init__(self, cog, results: List[Dict[str, Any]], search_type: str):
-        super().__init__(timeout=None)
+    def __init__(self, cog, cursor: SearchCursor):
+        super().__init__(timeout=SEARCH_VIEW_TTL)
         self.cog = cog
-        self.results = results
-        self.search_type = search_type
-        self.current_page = 1
-        self.total_pages = (len(results) + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+        self.cursor_id = cursor.cursor_id
+        self.search_type = cursor.search_type
         
         # ボタンを追加
-        self._add_buttons()
+        self._add_buttons(cursor)
     
-    def _add_buttons(self):
+    def _add_buttons(self, cursor: SearchCursor):
         """ボタンを追加"""
-        if self.total_pages > 1:
+        if cursor.page > 1 or cursor.has_next:
             # 前のページボタン
             self.prev_button = ui.Button(
                 label='◀️ 前へ',
                 style=discord.ButtonStyle.secondary,
-                disabled=self.current_page <= 1
+                disabled=cursor.page <= 1
             )
             self.prev_button.callback = self.prev_page_callback
             self.add_item(self.prev_button)
@@ -46,46 +46,73 @@ class SearchResultsView(ui.View):
             self.next_button = ui.Button(
                 label='次へ ▶️',
                 style=discord.ButtonStyle.secondary,
-                disabled=self.current_page >= self.total_pages
+                disabled=not cursor.has_next
             )
             self.next_button.callback = self.next_page_callback
             self.add_item(self.next_button)
             
             # ページ情報ボタン
             self.page_button = ui.Button(
-                label=f'{self.current_page}/{self.total_pages}',
+                label=self._page_label(cursor),
                 style=discord.ButtonStyle.primary,
                 disabled=True
             )
             self.add_item(self.page_button)
     
+    @staticmethod
+    def _page_label(cursor: SearchCursor) -> str:
+        """ページ表示（総ページ数が不明ならページ番号のみ）"""
+        if cursor.total_pages is None:
+            return f'{cursor.page}'
+        return f'{cursor.page}/{cursor.total_pages}'
+    
     async def prev_page_callback(self, interaction: Interaction):
         """前のページ"""
-        if self.current_page > 1:
-            self.current_page -= 1
-            await self._update_page(interaction)
+        cursor = await self._get_cursor(interaction)
+        if cursor:
+            results = await cursor.prev_page(self.cog) if cursor.page > 1 else []
+            await self._update_page(interaction, cursor, results)
     
     async def next_page_callback(self, interaction: Interaction):
         """次のページ"""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            await self._update_page(interaction)
+        cursor = await self._get_cursor(interaction)
+        if cursor:
+            results = await cursor.next_page(self.cog) if cursor.has_next else []
+            await self._update_page(interaction, cursor, results)
+    
+    async def _get_cursor(self, interaction: Interaction) -> Optional[SearchCursor]:
+        """カーソルを取得（期限切れならボタンを外して再検索を促す）"""
+        cursor = self.cog.search_cursors.get(self.cursor_id)
+        if cursor is None:
+            self.stop()
+            await interaction.response.edit_message(
+                content="⌛ 検索結果の有効期限が切れました。もう一度検索してください。",
+                view=None
+            )
+        return cursor
     
-    async def _update_page(self, interaction: Interaction):
-        """ページを更新"""
-        # Embedを再作成
+    async def _update_page(self, interaction: Interaction, cursor: SearchCursor, results: List[Dict[str, Any]]):
+        """ページを更新（取得できなければボタンの状態だけ更新）"""
+        # ボタンの状態を更新
+        self.prev_button.disabled = cursor.page <= 1
+        self.next_button.disabled = not cursor.has_next
+        self.page_button.label = self._page_label(cursor)
+        
+        if not results:
+            await interaction.response.edit_message(view=self)
+            return
+        
+        # 取得したページの分だけでEmbedを作成
         from .search_embed import create_search_embed
         embed = create_search_embed(
-            self.results,
+            results,
             self.search_type,
-            self.current_page,
-            self.total_pages
+            cursor.page,
+            cursor.total
         )
         
-        # ボタンの状態を更新
-        if self.total_pages > 1:
-            self.prev_button.disabled = self.current_page <= 1
-            self.next_button.disabled = self.current_page >= self.total_pages
-            self.page_button.label = f'{self.current_page}/{self.total_pages}'
-        
         await interaction.response.edit_message(embed=embed, view=self)
+    
+    async def on_timeout(self) -> None:
+        """期限切れのビューのカーソルを破棄"""
+        self.cog.search_cursors.discard(self.cursor_id)
@@ -3,146 +3,187 @@
 """
 
 import logging
+import math
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from datetime import datetime
 
 # マネージャーをインポート
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
+from managers.async_managers import AsyncPostManager, AsyncLikeManager
+from managers.post_query import Predicate, author_is, anonymity_is, created_between, category_contains
+from managers.query_cache import make_query_key
+from managers.search_index import normalize_text
+from utils.search_trace import start_trace
 
 # ロガー設定
 logger = logging.getLogger(__name__)
 
 # 定数
 MAX_SEARCH_RESULTS = 50
+# 関連度順検索でいいね数をスコアに反映する強さ（0で無効）
+SEARCH_LIKE_BOOST = float(os.getenv('SEARCH_LIKE_BOOST', '0.5'))
 
 # 型定義
 PostData = Dict[str, Any]
 
-def search_posts(
+def build_post_predicates(
+    category: Optional[str] = None,
+    author_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    is_anonymous: Optional[bool] = None
+) -> List[Predicate]:
+    """検索条件をインデックスのメタデータで判定する条件のリストに変換"""
+    predicates = []
+    if author_id:
+        predicates.append(author_is(author_id))
+    if is_anonymous is not None:
+        predicates.append(anonymity_is(is_anonymous))
+    if date_from or date_to:
+        predicates.append(created_between(date_from, date_to))
+    if category:
+        predicates.append(category_contains(category))
+    return predicates
+
+def post_query_key(
+    kind: str,
     keyword: Optional[str] = None,
     category: Optional[str] = None,
     author_id: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     is_anonymous: Optional[bool] = None,
-    post_manager: Optional[PostManager] = None
+    **extra: Any
+):
+    """投稿検索のキャッシュキー（照合方法と同じくキーワードは正規化、カテゴリーは小文字化）"""
+    return make_query_key(
+        kind,
+        keyword=normalize_text(keyword),
+        category=category.lower() if category else None,
+        author_id=author_id,
+        date_from=date_from,
+        date_to=date_to,
+        is_anonymous=is_anonymous,
+        **extra
+    )
+
+def like_boost(like_manager: Optional[AsyncLikeManager]) -> Optional[Callable[[int], float]]:
+    """いいね数に応じてスコアに掛ける倍率の関数（1 + 強さ × log(1 + いいね数)）"""
+    if not like_manager or SEARCH_LIKE_BOOST <= 0:
+        return None
+    
+    get_like_count = like_manager.like_count_getter()
+    return lambda post_id: 1 + SEARCH_LIKE_BOOST * math.log1p(get_like_count(post_id))
+
+async def max_like_boost(like_manager: Optional[AsyncLikeManager]) -> float:
+    """like_boostの倍率の上限（関連度順の上位取得の打ち切り判定に使う）"""
+    if not like_manager or SEARCH_LIKE_BOOST <= 0:
+        return 1.0
+    
+    return 1 + SEARCH_LIKE_BOOST * math.log1p(await like_manager.get_max_like_count())
+
+async def count_posts(
+    keyword: Optional[str] = None,
+    category: Optional[str] = None,
+    author_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    is_anonymous: Optional[bool] = None,
+    post_manager: Optional[AsyncPostManager] = None,
+    ranked: bool = False
+) -> int:
+    """検索条件に一致する投稿数を取得（結果はキャッシュする）"""
+    if not post_manager:
+        return 0
+    
+    ranked = ranked and bool(keyword)
+    cache = post_manager.query_cache
+    key = post_query_key("count_posts", keyword, category, author_id, date_from, date_to, is_anonymous,
+                         ranked=ranked)
+    hit, total, generation = cache.get(key)
+    if hit:
+        return total
+    
+    predicates = build_post_predicates(category, author_id, date_from, date_to, is_anonymous)
+    total = await post_manager.count_posts(predicates, keyword=keyword, ranked=ranked)
+    cache.put(key, total, generation)
+    return total
+
+async def search_posts(
+    keyword: Optional[str] = None,
+    category: Optional[str] = None,
+    author_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    is_anonymous: Optional[bool] = None,
+    post_manager: Optional[AsyncPostManager] = None,
+    trace: Optional[bool] = None,
+    limit: int = MAX_SEARCH_RESULTS,
+    older_than: Optional[Tuple[float, int]] = None,
+    newer_than: Optional[Tuple[float, int]] = None,
+    ranked: bool = False,
+    offset: int = 0,
+    like_manager: Optional[AsyncLikeManager] = None
 ) -> List[PostData]:
-    """投稿を検索する"""
+    """投稿を検索する
+
+    traceで個別にトレースの有効・無効を指定する。
+    older_than・newer_thanにはページングのカーソル位置（並び順キー）を渡す。
+    rankedの場合はキーワードとの関連度順（BM25）で、like_managerを渡すといいね数で補正する。
+    関連度順のページングはoffsetで行う（キーワードがなければ通常の新しい順）。
+    """
     if not post_manager:
         return []
     
+    search_trace = start_trace(
+        "search_posts", enabled=trace,
+        keyword=keyword, category=category, author_id=author_id,
+        date_from=date_from, date_to=date_to, is_anonymous=is_anonymous
+    )
+    
     try:
-        # 全投稿を取得
-        all_posts = post_manager.get_all_posts()
-        logger.info(f"🔍 検索デバッグ: 全投稿数={len(all_posts)}")
-        
-        if not all_posts:
-            logger.warning("⚠️ 検索デバッグ: 投稿データがありません")
-            return []
+        ranked = ranked and bool(keyword)
+        boost = like_boost(like_manager) if ranked else None
         
-        # 検索条件をログ
-        logger.info(f"🔍 検索条件: keyword={keyword}, category={category}, author_id={author_id}")
-        
-        # 検索条件でフィルタリング
-        filtered_posts = []
-        for i, post in enumerate(all_posts):
-            logger.info(f"🔍 投稿{i+1}: ID={post.get('id')}, content={post.get('content', '')[:50]}...")
-            
-            # キーワード検索
-            if keyword:
-                content = (post.get('content') or '').lower()
-                category_match = (post.get('category') or '').lower()
-                keyword_lower = keyword.lower()
-                
-                content_match = keyword_lower in content
-                category_match_result = keyword_lower in category_match
-                
-                logger.info(f"  - キーワード検索: '{keyword_lower}'")
-                logger.info(f"    * content match: {content_match}")
-                logger.info(f"    * category match: {category_match_result}")
-                
-                if not content_match and not category_match_result:
-                    logger.info(f"  ❌ キーワードに一致しないためスキップ")
-                    continue
-                else:
-                    logger.info(f"  ✅ キーワードに一致")
-            
-            # カテゴリー検索
-            if category:
-                post_category = (post.get('category') or '').lower()
-                category_lower = category.lower()
-                category_match = category_lower in post_category
-                
-                logger.info(f"  - カテゴリー検索: '{category_lower}' in '{post_category}' = {category_match}")
-                
-                if not category_match:
-                    logger.info(f"  ❌ カテゴリーに一致しないためスキップ")
-                    continue
-                else:
-                    logger.info(f"  ✅ カテゴリーに一致")
-            
-            # 著者検索
-            if author_id:
-                post_author = post.get('user_id')
-                author_match = post_author == author_id
-                
-                logger.info(f"  - 著者検索: {post_author} == {author_id} = {author_match}")
-                
-                if not author_match:
-                    logger.info(f"  ❌ 著者に一致しないためスキップ")
-                    continue
-                else:
-                    logger.info(f"  ✅ 著者に一致")
-            
-            # この投稿は全ての条件をクリア
-            logger.info(f"  ✅ 投稿を検索結果に追加: ID={post.get('id')}")
-            filtered_posts.append(post)
-            
-            # 日付検索
-            if date_from or date_to:
-                try:
-                    post_date = datetime.fromisoformat(post.get('created_at', '').replace('Z', '+00:00'))
-                    logger.info(f"  - 日付検索: {post_date}")
-                    
-                    if date_from and post_date < date_from:
-                        logger.info(f"    ❌ 開始日より前のためスキップ: {post_date} < {date_from}")
-                        continue
-                    if date_to and post_date > date_to:
-                        logger.info(f"    ❌ 終了日より後のためスキップ: {post_date} > {date_to}")
-                        continue
-                    
-                    logger.info(f"    ✅ 日付範囲内")
-                except (ValueError, TypeError):
-                    logger.warning(f"    ⚠️ 日付解析エラー: {post.get('created_at')}")
-                    continue
-            
-            # 匿名フィルター
-            if is_anonymous is not None:
-                post_anonymous = post.get('is_anonymous', False)
-                anonymous_match = post_anonymous == is_anonymous
-                
-                logger.info(f"  - 匿名フィルター: {post_anonymous} == {is_anonymous} = {anonymous_match}")
-                
-                if not anonymous_match:
-                    logger.info(f"    ❌ 匿名設定が一致しないためスキップ")
-                    continue
-                else:
-                    logger.info(f"    ✅ 匿名設定が一致")
-        
-        logger.info(f"🔍 検索結果: {len(filtered_posts)}件の投稿が一致")
-        
-        # 作成日でソート（新しい順）
-        filtered_posts.sort(
-            key=lambda x: datetime.fromisoformat(x.get('created_at', '').replace('Z', '+00:00')),
-            reverse=True
+        # 書き込みがなければ同じ条件の結果をキャッシュから返す
+        cache = post_manager.query_cache
+        key = post_query_key(
+            "search_posts", keyword, category, author_id, date_from, date_to, is_anonymous,
+            limit=limit, older_than=older_than, newer_than=newer_than,
+            ranked=ranked, offset=offset, like_boost=boost is not None
         )
+        hit, results, generation = cache.get(key)
+        if hit:
+            search_trace.set(cache_hit=True)
+            search_trace.count("returned", len(results))
+            return list(results)
+        
+        # 条件はインデックスのメタデータで判定し、安い条件から順に評価する
+        predicates = build_post_predicates(category, author_id, date_from, date_to, is_anonymous)
         
-        return filtered_posts[:MAX_SEARCH_RESULTS]
+        if ranked:
+            # 関連度順：スコアの高い順に辿って上位の分だけ採点・読み込む
+            search_trace.set(ranked=True)
+            max_boost = await max_like_boost(like_manager) if boost else 1.0
+            results = await post_manager.rank_posts(
+                keyword, predicates, limit=limit, offset=offset, boost=boost, max_boost=max_boost
+            )
+        else:
+            # 新しい順に走査し、limit件そろった時点で打ち切る
+            results = await post_manager.query_posts(
+                predicates, keyword=keyword, limit=limit,
+                older_than=older_than, newer_than=newer_than
+            )
+        cache.put(key, results, generation)
+        search_trace.count("returned", len(results))
+        return list(results)
         
     except Exception as e:
         logger.error(f"投稿検索中にエラー: {e}")
+        search_trace.set(error=str(e))
         return []
+    finally:
+        search_trace.finish()
\ No newline at end of file
@@ -4,14 +4,18 @@
 
 import logging
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 # マネージャーをインポート
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.reply_manager import ReplyManager
+from managers.async_managers import AsyncReplyManager
+from managers.post_query import Predicate, created_between, category_contains
+from managers.query_cache import make_query_key
+from managers.search_index import normalize_text
+from utils.search_trace import start_trace
 
 # ロガー設定
 logger = logging.getLogger(__name__)
@@ -22,56 +26,121 @@ MAX_SEARCH_RESULTS = 50
 # 型定義
 ReplyData = Dict[str, Any]
 
-def search_replies(
+def build_reply_predicates(
+    category: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> Tuple[List[Predicate], List[Predicate]]:
+    """検索条件をリプライと親投稿のメタデータで判定する条件のリストに変換
+
+    カテゴリーはリプライにはないため、親投稿のカテゴリーで絞り込む。
+    """
+    predicates = []
+    if date_from or date_to:
+        predicates.append(created_between(date_from, date_to))
+    
+    post_predicates = []
+    if category:
+        post_predicates.append(category_contains(category))
+    return predicates, post_predicates
+
+def reply_query_key(
+    kind: str,
+    keyword: Optional[str] = None,
+    category: Optional[str] = None,
+    author_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    **extra: Any
+):
+    """リプライ検索のキャッシュキー（照合方法と同じくキーワードは正規化、カテゴリーは小文字化）"""
+    return make_query_key(
+        kind,
+        keyword=normalize_text(keyword),
+        category=category.lower() if category else None,
+        author_id=author_id,
+        date_from=date_from,
+        date_to=date_to,
+        **extra
+    )
+
+async def count_replies(
+    keyword: Optional[str] = None,
+    category: Optional[str] = None,
+    author_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    reply_manager: Optional[AsyncReplyManager] = None
+) -> int:
+    """検索条件に一致するリプライ数を取得（結果はキャッシュする）"""
+    if not reply_manager:
+        return 0
+    
+    cache = reply_manager.query_cache
+    key = reply_query_key("count_replies", keyword, category, author_id, date_from, date_to)
+    hit, total, generation = cache.get(key)
+    if hit:
+        return total
+    
+    predicates, post_predicates = build_reply_predicates(category, date_from, date_to)
+    total = await reply_manager.count_replies(
+        predicates, keyword=keyword, author_id=author_id, post_predicates=post_predicates
+    )
+    cache.put(key, total, generation)
+    return total
+
+async def search_replies(
     keyword: Optional[str] = None,
+    category: Optional[str] = None,
     author_id: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
-    reply_manager: Optional[ReplyManager] = None
+    reply_manager: Optional[AsyncReplyManager] = None,
+    trace: Optional[bool] = None,
+    limit: int = MAX_SEARCH_RESULTS,
+    older_than: Optional[Tuple[float, int]] = None,
+    newer_than: Optional[Tuple[float, int]] = None
 ) -> List[Dict[str, Any]]:
-    """リプライを検索する"""
+    """リプライを検索する
+
+    categoryは親投稿のカテゴリーで絞り込む。
+    older_than・newer_thanにはページングのカーソル位置（並び順キー）を渡す。
+    """
     if not reply_manager:
         return []
     
+    search_trace = start_trace(
+        "search_replies", enabled=trace,
+        keyword=keyword, category=category, author_id=author_id,
+        date_from=date_from, date_to=date_to
+    )
+    
     try:
-        # 全リプライを取得
-        all_replies = reply_manager.get_all_replies()
-        
-        # 検索条件でフィルタリング
-        filtered_replies = []
-        for reply in all_replies:
-            # キーワード検索
-            if keyword:
-                content = (reply.get('content') or '').lower()
-                if keyword.lower() not in content:
-                    continue
-            
-            # 著者検索
-            if author_id:
-                if reply.get('user_id') != author_id:
-                    continue
-            
-            # 日付検索
-            if date_from or date_to:
-                try:
-                    reply_date = datetime.fromisoformat(reply.get('created_at', '').replace('Z', '+00:00'))
-                    if date_from and reply_date < date_from:
-                        continue
-                    if date_to and reply_date > date_to:
-                        continue
-                except (ValueError, TypeError):
-                    continue
-            
-            filtered_replies.append(reply)
-        
-        # 作成日でソート（新しい順）
-        filtered_replies.sort(
-            key=lambda x: datetime.fromisoformat(x.get('created_at', '').replace('Z', '+00:00')),
-            reverse=True
+        # 書き込みがなければ同じ条件の結果をキャッシュから返す
+        cache = reply_manager.query_cache
+        key = reply_query_key(
+            "search_replies", keyword, category, author_id, date_from, date_to,
+            limit=limit, older_than=older_than, newer_than=newer_than
         )
+        hit, results, generation = cache.get(key)
+        if hit:
+            search_trace.set(cache_hit=True)
+            search_trace.count("returned", len(results))
+            return list(results)
         
-        return filtered_replies[:MAX_SEARCH_RESULTS]
-        
+        # キーワード・投稿者はインデックスで候補を絞り、新しい順にlimit件で打ち切る
+        predicates, post_predicates = build_reply_predicates(category, date_from, date_to)
+        results = await reply_manager.query_replies(
+            predicates, keyword=keyword, author_id=author_id, limit=limit,
+            older_than=older_than, newer_than=newer_than, post_predicates=post_predicates
+        )
+        cache.put(key, results, generation)
+        search_trace.count("returned", len(results))
+        return list(results)
+    
     except Exception as e:
         logger.error(f"リプライ検索中にエラー: {e}")
+        search_trace.set(error=str(e))
         return []
+    finally:
+        search_trace.finish()
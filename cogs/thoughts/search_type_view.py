@@ -36,6 +36,11 @@ class SearchTypeView(ui.View):
                     label="🔍 詳細検索",
                     description="詳細な条件で検索します",
                     emoji="🔍"
+                ),
+                discord.SelectOption(
+                    label="📊 関連度順検索",
+                    description="キーワードとの関連度といいね数の順に並べます",
+                    emoji="📊"
                 )
             ]
         )
@@ -55,13 +60,17 @@ class SearchTypeView(ui.View):
             modal.title = "📝 投稿検索"
             await interaction.response.send_modal(modal)
         elif selected == "💬 リプライ検索":
-            modal = SearchModal(self.cog)
+            modal = SearchModal(self.cog, search_type="リプライ")
             modal.title = "💬 リプライ検索"
             await interaction.response.send_modal(modal)
         elif selected == "🔍 詳細検索":
             modal = SearchModal(self.cog)
             modal.title = "🔍 詳細検索"
             await interaction.response.send_modal(modal)
+        elif selected == "📊 関連度順検索":
+            modal = SearchModal(self.cog, ranked=True)
+            modal.title = "📊 関連度順検索"
+            await interaction.response.send_modal(modal)
 
 # SearchTypeViewをエクスポート
 __all__ = ['SearchTypeView']
@@ -12,16 +12,16 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.like_manager import LikeManager
-from managers.post_manager import PostManager
+from managers.async_managers import AsyncLikeManager, AsyncPostManager
 from config import get_channel_id, extract_channel_id
+from utils.side_effects import delete_messages
 
 logger = logging.getLogger(__name__)
 
 class UnlikeModal(ui.Modal, title="🚫 いいねを削除"):
     """いいねを削除する投稿IDを入力するモーダル"""
     
-    def __init__(self, like_manager: LikeManager, post_manager: PostManager):
+    def __init__(self, like_manager: AsyncLikeManager, post_manager: AsyncPostManager):
         super().__init__(timeout=None)
         self.like_manager = like_manager
         self.post_manager = post_manager
@@ -45,7 +45,7 @@ class UnlikeModal(ui.Modal, title="🚫 いいねを削除"):
             user_id = str(interaction.user.id)
             
             # 投稿の存在確認
-            post = self.post_manager.get_post(post_id, str(interaction.user.id))
+            post = await self.post_manager.get_post(post_id, str(interaction.user.id))
             if not post:
                 await interaction.followup.send(
                     "❌ **投稿が見つかりません**\n\n"
@@ -58,7 +58,7 @@ class UnlikeModal(ui.Modal, title="🚫 いいねを削除"):
             logger.info(f"いいね削除試行: 投稿ID={post_id}, ユーザーID={user_id}")
             
             # like_managerを使っていいねを検索
-            like_data = self.like_manager.get_like_by_user_and_post(post_id, user_id)
+            like_data = await self.like_manager.get_like_by_user_and_post(post_id, user_id)
             
             if not like_data:
                 logger.warning(f"いいねが見つかりませんでした: 投稿ID={post_id}, ユーザーID={user_id}")
@@ -72,7 +72,7 @@ class UnlikeModal(ui.Modal, title="🚫 いいねを削除"):
             logger.info(f"いいねが見つかりました: {like_data}")
             
             # いいねファイルを削除
-            success = self.like_manager.delete_like(post_id, user_id)
+            success = await self.like_manager.delete_like(post_id, user_id)
             
             if not success:
                 logger.error(f"いいねの削除に失敗しました: 投稿ID={post_id}, ユーザーID={user_id}")
@@ -102,34 +102,11 @@ class UnlikeModal(ui.Modal, title="🚫 いいねを削除"):
                 try:
                     likes_channel = interaction.guild.get_channel(int(channel_id))
                     if likes_channel:
-                        deleted_count = 0
-                        
-                        # いいねメッセージを削除
-                        try:
-                            like_message = await likes_channel.fetch_message(int(message_id))
-                            await like_message.delete()
-                            deleted_count += 1
-                            logger.info(f"✅ いいねメッセージを削除しました: メッセージID={message_id}")
-                        except discord.NotFound:
-                            logger.warning(f"⚠️ いいねメッセージが見つかりません: メッセージID={message_id}")
-                        except discord.Forbidden:
-                            logger.error(f"❌ いいねメッセージの削除権限がありません: メッセージID={message_id}")
-                        except Exception as e:
-                            logger.error(f"❌ いいねメッセージ削除エラー: {e}")
-                        
-                        # 転送メッセージも削除
-                        if forwarded_message_id:
-                            try:
-                                forwarded_message = await likes_channel.fetch_message(int(forwarded_message_id))
-                                await forwarded_message.delete()
-                                deleted_count += 1
-                                logger.info(f"✅ 転送メッセージを削除しました: メッセージID={forwarded_message_id}")
-                            except discord.NotFound:
-                                logger.warning(f"⚠️ 転送メッセージが見つかりません: メッセージID={forwarded_message_id}")
-                            except discord.Forbidden:
-                                logger.error(f"❌ 転送メッセージの削除権限がありません: メッセージID={forwarded_message_id}")
-                            except Exception as e:
-                                logger.error(f"❌ 転送メッセージ削除エラー: {e}")
+                        # いいねメッセージと転送メッセージを並行して削除
+                        deleted_count = await delete_messages(
+                            interaction.client.message_cache, likes_channel.id,
+                            [("いいねメッセージ", message_id), ("転送メッセージ", forwarded_message_id)]
+                        )
                         
                         logger.info(f"📊 いいね削除結果: {deleted_count}個のメッセージを削除しました")
                     else:
@@ -164,8 +141,8 @@ class Unlike(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.like_manager = LikeManager()
-        self.post_manager = PostManager()
+        self.like_manager = bot.store.likes
+        self.post_manager = bot.store.posts
         logger.info("Unlike cog が初期化されました")
     
     @app_commands.command(name='unlike', description='❌ いいねを削除する')
@@ -176,7 +153,7 @@ class Unlike(commands.Cog):
             
             # ユーザーのいいねを取得
             user_id = str(interaction.user.id)
-            likes = self.like_manager.get_likes_by_user(user_id)
+            likes = await self.like_manager.get_likes_by_user(user_id)
             
             if not likes:
                 await interaction.followup.send(
@@ -186,9 +163,10 @@ class Unlike(commands.Cog):
                 )
                 return
             
-            # 投稿情報を付加
+            # 投稿情報を付加（いいねした投稿をまとめて取得）
+            posts = await self.post_manager.get_posts([like['post_id'] for like in likes], user_id)
             for like in likes:
-                post = self.post_manager.get_post(like['post_id'], user_id)
+                post = posts.get(int(like['post_id']))
                 if post:
                     like['post_content'] = post.get('content', '内容不明')
                 else:
@@ -226,7 +204,7 @@ class Unlike(commands.Cog):
             user_id = str(interaction.user.id)
             
             # いいねを削除
-            success = self.like_manager.delete_like(post_id, user_id)
+            success = await self.like_manager.delete_like(post_id, user_id)
             
             if not success:
                 await interaction.followup.send(
@@ -245,34 +223,11 @@ class Unlike(commands.Cog):
                 try:
                     likes_channel = interaction.guild.get_channel(int(channel_id))
                     if likes_channel:
-                        deleted_count = 0
-                        
-                        # いいねメッセージを削除
-                        try:
-                            like_message = await likes_channel.fetch_message(int(message_id))
-                            await like_message.delete()
-                            deleted_count += 1
-                            logger.info(f"✅ いいねメッセージを削除しました: メッセージID={message_id}")
-                        except discord.NotFound:
-                            logger.warning(f"⚠️ いいねメッセージが見つかりません: メッセージID={message_id}")
-                        except discord.Forbidden:
-                            logger.error(f"❌ いいねメッセージの削除権限がありません: メッセージID={message_id}")
-                        except Exception as e:
-                            logger.error(f"❌ いいねメッセージ削除エラー: {e}")
-                        
-                        # 転送メッセージも削除
-                        if forwarded_message_id:
-                            try:
-                                forwarded_message = await likes_channel.fetch_message(int(forwarded_message_id))
-                                await forwarded_message.delete()
-                                deleted_count += 1
-                                logger.info(f"✅ 転送メッセージを削除しました: メッセージID={forwarded_message_id}")
-                            except discord.NotFound:
-                                logger.warning(f"⚠️ 転送メッセージが見つかりません: メッセージID={forwarded_message_id}")
-                            except discord.Forbidden:
-                                logger.error(f"❌ 転送メッセージの削除権限がありません: メッセージID={forwarded_message_id}")
-                            except Exception as e:
-                                logger.error(f"❌ 転送メッセージ削除エラー: {e}")
+                        # いいねメッセージと転送メッセージを並行して削除
+                        deleted_count = await delete_messages(
+                            interaction.client.message_cache, likes_channel.id,
+                            [("いいねメッセージ", message_id), ("転送メッセージ", forwarded_message_id)]
+                        )
                         
                         logger.info(f"📊 いいね削除結果: {deleted_count}個のメッセージを削除しました")
                     else:
@@ -12,15 +12,16 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.reply_manager import ReplyManager
+from managers.async_managers import AsyncReplyManager
 from config import get_channel_id, extract_channel_id
+from utils.side_effects import delete_messages
 
 logger = logging.getLogger(__name__)
 
 class UnreplyModal(ui.Modal, title="� リプライを削除"):
     """リプライを削除するリプライIDを入力するモーダル"""
     
-    def __init__(self, reply_manager: ReplyManager):
+    def __init__(self, reply_manager: AsyncReplyManager):
         super().__init__(timeout=None)
         self.reply_manager = reply_manager
         
@@ -48,7 +49,7 @@ class UnreplyModal(ui.Modal, title="� リプライを削除"):
             logger.info(f"リプライ削除試行: リプライID={reply_id}, ユーザーID={user_id}")
             
             # reply_managerを使ってリプライを検索
-            reply_data = self.reply_manager.get_reply_by_id_and_user(reply_id, user_id)
+            reply_data = await self.reply_manager.get_reply_by_id_and_user(reply_id, user_id)
             
             if not reply_data:
                 logger.warning(f"リプライが見つかりませんでした: リプライID={reply_id}, ユーザーID={user_id}")
@@ -62,7 +63,7 @@ class UnreplyModal(ui.Modal, title="� リプライを削除"):
             logger.info(f"リプライが見つかりました: {reply_data}")
             
             # リプライファイルを削除
-            success = self.reply_manager.delete_reply(reply_id, user_id)
+            success = await self.reply_manager.delete_reply(reply_id, user_id)
             
             if not success:
                 logger.error(f"リプライの削除に失敗しました: リプライID={reply_id}, ユーザーID={user_id}")
@@ -91,34 +92,11 @@ class UnreplyModal(ui.Modal, title="� リプライを削除"):
                 try:
                     replies_channel = interaction.guild.get_channel(int(channel_id))
                     if replies_channel:
-                        deleted_count = 0
-                        
-                        # リプライメッセージを削除
-                        try:
-                            reply_message = await replies_channel.fetch_message(int(message_id))
-                            await reply_message.delete()
-                            deleted_count += 1
-                            logger.info(f"✅ リプライメッセージを削除しました: メッセージID={message_id}")
-                        except discord.NotFound:
-                            logger.warning(f"⚠️ リプライメッセージが見つかりません: メッセージID={message_id}")
-                        except discord.Forbidden:
-                            logger.error(f"❌ リプライメッセージの削除権限がありません: メッセージID={message_id}")
-                        except Exception as e:
-                            logger.error(f"❌ リプライメッセージ削除エラー: {e}")
-                        
-                        # 転送メッセージも削除
-                        if forwarded_message_id:
-                            try:
-                                forwarded_message = await replies_channel.fetch_message(int(forwarded_message_id))
-                                await forwarded_message.delete()
-                                deleted_count += 1
-                                logger.info(f"✅ 転送メッセージを削除しました: メッセージID={forwarded_message_id}")
-                            except discord.NotFound:
-                                logger.warning(f"⚠️ 転送メッセージが見つかりません: メッセージID={forwarded_message_id}")
-                            except discord.Forbidden:
-                                logger.error(f"❌ 転送メッセージの削除権限がありません: メッセージID={forwarded_message_id}")
-                            except Exception as e:
-                                logger.error(f"❌ 転送メッセージ削除エラー: {e}")
+                        # リプライメッセージと転送メッセージを並行して削除
+                        deleted_count = await delete_messages(
+                            interaction.client.message_cache, replies_channel.id,
+                            [("リプライメッセージ", message_id), ("転送メッセージ", forwarded_message_id)]
+                        )
                         
                         logger.info(f"📊 リプライ削除結果: {deleted_count}個のメッセージを削除しました")
                     else:
@@ -153,7 +131,7 @@ class Unreply(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.reply_manager = ReplyManager()
+        self.reply_manager = bot.store.replies
         logger.info("Unreply cog が初期化されました")
     
     @app_commands.command(name='unreply', description='🗑️ リプライを削除する')
@@ -164,7 +142,7 @@ class Unreply(commands.Cog):
             
             # ユーザーのリプライを取得
             user_id = str(interaction.user.id)
-            replies = self.reply_manager.get_replies_by_user(user_id)
+            replies = await self.reply_manager.get_replies_by_user(user_id)
             
             if not replies:
                 await interaction.followup.send(
@@ -206,7 +184,7 @@ class Unreply(commands.Cog):
             user_id = str(interaction.user.id)
             
             # リプライを削除
-            success = self.reply_manager.delete_reply(reply_id, user_id)
+            success = await self.reply_manager.delete_reply(reply_id, user_id)
             
             if not success:
                 await interaction.followup.send(
@@ -225,34 +203,11 @@ class Unreply(commands.Cog):
                 try:
                     replies_channel = interaction.guild.get_channel(int(channel_id))
                     if replies_channel:
-                        deleted_count = 0
-                        
-                        # リプライメッセージを削除
-                        try:
-                            reply_message = await replies_channel.fetch_message(int(message_id))
-                            await reply_message.delete()
-                            deleted_count += 1
-                            logger.info(f"✅ リプライメッセージを削除しました: メッセージID={message_id}")
-                        except discord.NotFound:
-                            logger.warning(f"⚠️ リプライメッセージが見つかりません: メッセージID={message_id}")
-                        except discord.Forbidden:
-                            logger.error(f"❌ リプライメッセージの削除権限がありません: メッセージID={message_id}")
-                        except Exception as e:
-                            logger.error(f"❌ リプライメッセージ削除エラー: {e}")
-                        
-                        # 転送メッセージも削除
-                        if forwarded_message_id:
-                            try:
-                                forwarded_message = await replies_channel.fetch_message(int(forwarded_message_id))
-                                await forwarded_message.delete()
-                                deleted_count += 1
-                                logger.info(f"✅ 転送メッセージを削除しました: メッセージID={forwarded_message_id}")
-                            except discord.NotFound:
-                                logger.warning(f"⚠️ 転送メッセージが見つかりません: メッセージID={forwarded_message_id}")
-                            except discord.Forbidden:
-                                logger.error(f"❌ 転送メッセージの削除権限がありません: メッセージID={forwarded_message_id}")
-                            except Exception as e:
-                                logger.error(f"❌ 転送メッセージ削除エラー: {e}")
+                        # リプライメッセージと転送メッセージを並行して削除
+                        deleted_count = await delete_messages(
+                            interaction.client.message_cache, replies_channel.id,
+                            [("リプライメッセージ", message_id), ("転送メッセージ", forwarded_message_id)]
+                        )
                         
                         logger.info(f"📊 リプライ削除結果: {deleted_count}個のメッセージを削除しました")
                     else:
@@ -0,0 +1,192 @@
+import json
+import os
+import atexit
+import logging
+import threading
+from typing import Dict, Any, List, Iterator, Optional
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# バッファがこの件数に達したら書き出す
+FLUSH_MAX_ENTRIES = int(os.getenv('ACCESS_LOG_FLUSH_ENTRIES', '100'))
+# 最初の未書き出しエントリからこの秒数が経過したら書き出す
+FLUSH_INTERVAL_SECONDS = float(os.getenv('ACCESS_LOG_FLUSH_INTERVAL', '5'))
+
+# 同一ログディレクトリのロガーはプロセス内で共有する
+_shared_loggers: Dict[str, "AccessLogger"] = {}
+
+class AccessLogger:
+    """アクセスログをメモリ上にバッファし、日別のNDJSONファイルへまとめて追記する
+
+    書き出し先は access_YYYYMMDD.jsonl（1行1エントリ）。
+    旧形式の access_YYYYMMDD.json（JSON配列）は iter_entries で読み込める。
+    """
+    
+    def __init__(self, log_dir: str, max_entries: int = FLUSH_MAX_ENTRIES,
+                 interval: float = FLUSH_INTERVAL_SECONDS):
+        self.log_dir = log_dir
+        self.max_entries = max_entries
+        self.interval = interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # 起動してからファイルに書き出した件数（終了時に同期が必要かの判定用）
+        self.written = 0
+        
+        os.makedirs(log_dir, exist_ok=True)
+    
+    def log(self, user_id: str, post_id: int, action: str, is_private: bool = False) -> None:
+        """アクセスログをバッファに追加"""
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id,
+            "post_id": post_id,
+            "action": action,
+            "is_private": is_private
+        }
+        
+        with self._lock:
+            self._buffer.append(entry)
+            
+            if len(self._buffer) >= self.max_entries:
+                self._flush_locked()
+            elif self._timer is None:
+                # 時間経過で書き出すタイマーを開始
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self) -> int:
+        """バッファ内のログをファイルへ書き出し、書き出した件数を返す"""
+        with self._lock:
+            return self._flush_locked()
+    
+    def _flush_locked(self) -> int:
+        """ロック取得済みの状態でバッファを書き出す"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        if not self._buffer:
+            return 0
+        
+        entries = self._buffer
+        self._buffer = []
+        
+        # 日付ごとにまとめて追記
+        by_day: Dict[str, List[str]] = {}
+        for entry in entries:
+            day = entry['timestamp'][:10].replace('-', '')
+            by_day.setdefault(day, []).append(json.dumps(entry, ensure_ascii=False))
+        
+        written = 0
+        for day, lines in by_day.items():
+            log_file = os.path.join(self.log_dir, f"access_{day}.jsonl")
+            try:
+                with open(log_file, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+                written += len(lines)
+            except OSError as e:
+                logger.error(f"アクセスログの書き出しに失敗しました: {log_file} - {e}")
+        
+        self.written += written
+        return written
+    
+    def close(self) -> int:
+        """保留中のログを書き出して閉じる"""
+        return self.flush()
+    
+    def iter_entries(self, day: str = None) -> Iterator[Dict[str, Any]]:
+        """アクセスログを古い順に返す（dayはYYYYMMDD、省略時は全期間）
+
+        旧形式のJSON配列ファイルも全体を読み込まずに1件ずつ返す。
+        """
+        self.flush()
+        
+        for filename in sorted(os.listdir(self.log_dir)):
+            if not filename.startswith("access_"):
+                continue
+            
+            stem, ext = os.path.splitext(filename)
+            if day and stem != f"access_{day}":
+                continue
+            
+            path = os.path.join(self.log_dir, filename)
+            if ext == ".jsonl":
+                yield from _iter_ndjson(path)
+            elif ext == ".json":
+                yield from _iter_json_array(path)
+
+def _iter_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    """NDJSON形式のログを1行ずつ読み込む"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"⚠️ 壊れたアクセスログ行をスキップ: {path}")
+
+def _iter_json_array(path: str, chunk_size: int = 65536) -> Iterator[Dict[str, Any]]:
+    """旧形式（JSON配列）のログを要素ごとに読み込む"""
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buf += chunk
+            
+            while True:
+                buf = buf.lstrip()
+                if not started:
+                    if not buf:
+                        break
+                    if buf[0] != '[':
+                        logger.warning(f"⚠️ JSON配列ではないアクセスログをスキップ: {path}")
+                        return
+                    buf = buf[1:]
+                    started = True
+                    continue
+                
+                if buf.startswith(','):
+                    buf = buf[1:]
+                    continue
+                if buf.startswith(']'):
+                    return
+                
+                try:
+                    entry, end = decoder.raw_decode(buf)
+                except json.JSONDecodeError:
+                    # 要素が途中で切れているので続きを読む
+                    break
+                
+                yield entry
+                buf = buf[end:]
+            
+            if not chunk:
+                if buf.strip():
+                    logger.warning(f"⚠️ 途中で途切れたアクセスログ: {path}")
+                return
+
+def get_access_logger(log_dir: str) -> AccessLogger:
+    """ログディレクトリごとに共有されるアクセスロガーを取得"""
+    key = os.path.abspath(log_dir)
+    access_logger = _shared_loggers.get(key)
+    
+    if access_logger is None:
+        access_logger = AccessLogger(log_dir)
+        _shared_loggers[key] = access_logger
+    
+    return access_logger
+
+def flush_all() -> None:
+    """全アクセスロガーのバッファを書き出す（終了時に呼ぶ）"""
+    for access_logger in list(_shared_loggers.values()):
+        access_logger.close()
+
+atexit.register(flush_all)
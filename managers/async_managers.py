@@ -0,0 +1,354 @@
+import os
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, List, Optional, Callable, Hashable, Tuple
+
+from managers.post_manager import PostManager
+from managers.reply_manager import ReplyManager
+from managers.like_manager import LikeManager
+from managers.message_ref_manager import MessageRefManager
+from managers.private_thread_map import PrivateThreadMap
+from managers.post_query import Predicate
+from managers.query_cache import QueryCache
+from utils.metrics import observe_storage
+
+logger = logging.getLogger(__name__)
+
+# マネージャーのファイルI/Oを実行するスレッド数
+MANAGER_IO_WORKERS = int(os.getenv('MANAGER_IO_WORKERS', '4'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """ファイルI/O専用のスレッドプールを取得"""
+    global _executor
+    
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MANAGER_IO_WORKERS, thread_name_prefix="manager-io")
+            logger.info(f"マネージャーI/Oスレッドプールを開始しました: {MANAGER_IO_WORKERS}スレッド")
+        return _executor
+
+def shutdown_io_executor() -> None:
+    """スレッドプールを停止（実行中の処理は完了を待つ）"""
+    global _executor
+    
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+class KeyedLock:
+    """キー（エンティティ）ごとの排他ロック。使われなくなったロックは破棄する"""
+    
+    def __init__(self):
+        self._locks: Dict[Hashable, List[Any]] = {}
+        self._guard = threading.Lock()
+    
+    @contextmanager
+    def hold(self, key: Hashable):
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = [threading.Lock(), 0]
+                self._locks[key] = entry
+            entry[1] += 1
+        
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+# 全マネージャーで共有するエンティティロック
+_entity_locks = KeyedLock()
+
+class AsyncManagerBase:
+    """同期マネージャーの処理をスレッドプールで実行する非同期ラッパーの基底クラス"""
+    
+    def __init__(self, manager: Any):
+        # 同期版のマネージャー（スレッドプール内からのみ呼ぶ）
+        self.sync = manager
+    
+    async def run(self, func: Callable, *args, lock_key: Hashable = None, **kwargs) -> Any:
+        """同期関数をスレッドプールで実行（lock_key指定時は同じキーの処理を直列化）"""
+        submitted = time.perf_counter()
+        
+        def call():
+            started = time.perf_counter()
+            try:
+                if lock_key is None:
+                    return func(*args, **kwargs)
+                with _entity_locks.hold(lock_key):
+                    return func(*args, **kwargs)
+            finally:
+                # 実行中のコマンドごとにマネージャー呼び出しの時間を記録
+                observe_storage(type(self.sync).__name__, getattr(func, '__name__', 'call'),
+                                time.perf_counter() - started, started - submitted)
+        
+        # 検索トレースなどのコンテキスト変数をワーカースレッドへ引き継ぐ
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_io_executor(), context.run, call)
+    
+    async def warm_up(self) -> None:
+        """インデックスなどの構築をスレッドプールで済ませておく（対応していなければ何もしない）"""
+        warm_up = getattr(self.sync, 'warm_up', None)
+        if warm_up is not None:
+            await self.run(warm_up)
+
+class AsyncPostManager(AsyncManagerBase):
+    """PostManagerの非同期版"""
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(PostManager(base_dir))
+    
+    @property
+    def query_cache(self) -> QueryCache:
+        """検索結果のキャッシュ"""
+        return self.sync.query_cache
+    
+    async def save_post(self, user_id: str, content: str, category: str = None,
+                        is_anonymous: bool = False, is_private: bool = False,
+                        display_name: str = None, message_id: str = None,
+                        channel_id: str = None, image_url: str = None) -> int:
+        """投稿を保存"""
+        return await self.run(self.sync.save_post, user_id, content, category,
+                              is_anonymous, is_private, display_name, message_id,
+                              channel_id, image_url)
+    
+    async def get_post(self, post_id: int, user_id: str = None) -> Optional[Dict[str, Any]]:
+        """投稿を取得"""
+        return await self.run(self.sync.get_post, post_id, user_id)
+    
+    async def get_posts(self, post_ids: Iterable[int], user_id: str = None) -> Dict[int, Dict[str, Any]]:
+        """複数の投稿をまとめて取得（スレッドプールへの受け渡しは1回）"""
+        return await self.run(self.sync.get_posts, list(post_ids), user_id)
+    
+    async def get_all_posts(self, user_id: str = None) -> List[Dict[str, Any]]:
+        """全投稿を取得"""
+        return await self.run(self.sync.get_all_posts, user_id)
+    
+    async def query_posts(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                          user_id: str = None, limit: int = None, older_than: Tuple[float, int] = None,
+                          newer_than: Tuple[float, int] = None) -> List[Dict[str, Any]]:
+        """条件に一致する投稿を作成日時の新しい順に取得"""
+        return await self.run(self.sync.query_posts, predicates, keyword, user_id, limit, older_than, newer_than)
+    
+    async def rank_posts(self, keyword: str, predicates: Iterable[Predicate] = (), user_id: str = None,
+                         limit: int = None, offset: int = 0, boost: Callable[[int], float] = None,
+                         max_boost: float = 1.0) -> List[Dict[str, Any]]:
+        """キーワードとの関連度（BM25）が高い順に投稿を取得"""
+        return await self.run(self.sync.rank_posts, keyword, predicates, user_id, limit, offset, boost, max_boost)
+    
+    async def count_posts(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                          user_id: str = None, ranked: bool = False) -> int:
+        """条件に一致するアクセス可能な投稿数を取得"""
+        return await self.run(self.sync.count_posts, predicates, keyword, user_id, ranked)
+    
+    async def update_post(self, post_id: int, content: str = None, category: str = None,
+                          image_url: str = None, user_id: str = None, message_id: str = None,
+                          channel_id: str = None) -> bool:
+        """投稿を更新"""
+        return await self.run(self.sync.update_post, post_id, content, category, image_url,
+                              user_id, message_id, channel_id, lock_key=("post", post_id))
+    
+    async def update_post_message_ref(self, post_id: int, message_id: str, channel_id: str) -> bool:
+        """投稿のmessage_idとchannel_idを更新"""
+        return await self.run(self.sync.update_post_message_ref, post_id, message_id, channel_id,
+                              lock_key=("post", post_id))
+    
+    async def delete_post(self, post_id: int, user_id: str = None) -> bool:
+        """投稿を削除"""
+        return await self.run(self.sync.delete_post, post_id, user_id, lock_key=("post", post_id))
+
+class AsyncReplyManager(AsyncManagerBase):
+    """ReplyManagerの非同期版"""
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(ReplyManager(base_dir))
+    
+    @property
+    def query_cache(self) -> QueryCache:
+        """検索結果のキャッシュ"""
+        return self.sync.query_cache
+    
+    async def save_reply(self, post_id: int, user_id: str, content: str, display_name: str) -> int:
+        """リプライを保存"""
+        return await self.run(self.sync.save_reply, post_id, user_id, content, display_name)
+    
+    async def get_replies(self, post_id: int) -> List[Dict[str, Any]]:
+        """投稿のリプライを取得"""
+        return await self.run(self.sync.get_replies, post_id)
+    
+    async def get_replies_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーのリプライを取得"""
+        return await self.run(self.sync.get_replies_by_user, user_id)
+    
+    async def get_all_replies(self) -> List[Dict[str, Any]]:
+        """全リプライをID順に取得"""
+        return await self.run(lambda: list(self.sync.get_all_replies()))
+    
+    async def query_replies(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                            author_id: str = None, limit: int = None, older_than: Tuple[float, int] = None,
+                            newer_than: Tuple[float, int] = None, post_predicates: Iterable[Predicate] = (),
+                            user_id: str = None) -> List[Dict[str, Any]]:
+        """条件に一致するリプライを作成日時の新しい順に取得"""
+        return await self.run(self.sync.query_replies, predicates, keyword, author_id, limit, older_than,
+                              newer_than, post_predicates, user_id)
+    
+    async def count_replies(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                            author_id: str = None, post_predicates: Iterable[Predicate] = (),
+                            user_id: str = None) -> int:
+        """条件に一致するリプライ数を取得"""
+        return await self.run(self.sync.count_replies, predicates, keyword, author_id, post_predicates, user_id)
+    
+    async def get_reply_count(self, post_id: int = None) -> int:
+        """リプライ数を取得（post_id省略時は全件）"""
+        return await self.run(self.sync.get_reply_count, post_id)
+    
+    async def get_reply_by_id_and_user(self, reply_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """リプライIDとユーザーIDからリプライデータを取得"""
+        return await self.run(self.sync.get_reply_by_id_and_user, reply_id, user_id)
+    
+    async def delete_reply(self, reply_id: str, user_id: str) -> bool:
+        """リプライを削除"""
+        return await self.run(self.sync.delete_reply, reply_id, user_id, lock_key=("reply", str(reply_id)))
+    
+    async def update_reply(self, post_id: int, reply_id: int, content: str) -> bool:
+        """リプライを更新"""
+        return await self.run(self.sync.update_reply, post_id, reply_id, content, lock_key=("reply", str(reply_id)))
+    
+    async def update_reply_message_id(self, reply_id: int, message_id: str, channel_id: str,
+                                      forwarded_message_id: str = None) -> None:
+        """リプライのメッセージIDを更新"""
+        return await self.run(self.sync.update_reply_message_id, reply_id, message_id, channel_id,
+                              forwarded_message_id, lock_key=("reply", str(reply_id)))
+    
+    async def get_reply_message_ref(self, reply_id: int) -> Optional[Dict[str, Any]]:
+        """リプライのmessage_refを取得"""
+        return await self.run(self.sync.get_reply_message_ref, reply_id)
+
+def _like_lock_key(post_id: int, user_id: str) -> Tuple[str, int, str]:
+    """いいね（投稿とユーザーの組）ごとのロックキー。保存・削除・メッセージIDの更新で共通"""
+    return ("like", int(post_id), str(user_id))
+
+class AsyncLikeManager(AsyncManagerBase):
+    """LikeManagerの非同期版"""
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(LikeManager(base_dir))
+    
+    def like_count_getter(self) -> Callable[[int], int]:
+        """インデックスからいいね数を引く同期関数を取得（スレッドプール内の検索処理に渡す用）"""
+        return self.sync.get_like_count
+    
+    async def save_like(self, post_id: int, user_id: str, display_name: str) -> int:
+        """いいねを保存"""
+        return await self.run(self.sync.save_like, post_id, user_id, display_name,
+                              lock_key=_like_lock_key(post_id, user_id))
+    
+    async def save_like_once(self, post_id: int, user_id: str, display_name: str) -> Optional[int]:
+        """未いいねの場合のみいいねを保存（いいね済みならNone）
+
+        確認と保存を同じロック内で行い、同時押しによる重複いいねを防ぐ。
+        """
+        def save_once():
+            if self.sync.has_liked(post_id, user_id):
+                return None
+            return self.sync.save_like(post_id, user_id, display_name)
+        
+        return await self.run(save_once, lock_key=_like_lock_key(post_id, user_id))
+    
+    async def has_liked(self, post_id: int, user_id: str) -> bool:
+        """ユーザーが投稿にいいね済みか判定"""
+        return await self.run(self.sync.has_liked, post_id, user_id)
+    
+    async def get_likes(self, post_id: int) -> List[Dict[str, Any]]:
+        """投稿のいいねを取得"""
+        return await self.run(self.sync.get_likes, post_id)
+    
+    async def get_like_count(self, post_id: int) -> int:
+        """投稿のいいね数を取得"""
+        return await self.run(self.sync.get_like_count, post_id)
+    
+    async def get_max_like_count(self) -> int:
+        """最も多くいいねされた投稿のいいね数を取得"""
+        return await self.run(self.sync.get_max_like_count)
+    
+    async def get_likes_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーのいいねを取得"""
+        return await self.run(self.sync.get_likes_by_user, user_id)
+    
+    async def get_like_by_user_and_post(self, post_id: int, user_id: str) -> Optional[Dict[str, Any]]:
+        """ユーザーといいねされた投稿IDからいいねデータを取得"""
+        return await self.run(self.sync.get_like_by_user_and_post, post_id, user_id)
+    
+    async def delete_like(self, post_id: int, user_id: str) -> bool:
+        """いいねを削除"""
+        return await self.run(self.sync.delete_like, post_id, user_id, lock_key=_like_lock_key(post_id, user_id))
+    
+    async def update_like_message_id(self, like_id: int, post_id: int, user_id: str, message_id: str,
+                                     channel_id: str, forwarded_message_id: str = None) -> None:
+        """いいねのメッセージIDを更新
+
+        読み込みから書き込みまでの間にいいね解除が割り込んで削除済みのファイルを
+        書き戻さないよう、delete_likeと同じ(投稿, ユーザー)のロックで実行する。
+        """
+        return await self.run(self.sync.update_like_message_id, like_id, message_id, channel_id,
+                              forwarded_message_id, lock_key=_like_lock_key(post_id, user_id))
+
+class AsyncMessageRefManager(AsyncManagerBase):
+    """MessageRefManagerの非同期版"""
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(MessageRefManager(base_dir))
+    
+    async def save_message_ref(self, post_id: int, message_id: str, channel_id: str, user_id: str) -> None:
+        """メッセージ参照を保存"""
+        return await self.run(self.sync.save_message_ref, post_id, message_id, channel_id, user_id,
+                              lock_key=("message_ref", post_id))
+    
+    async def get_message_ref(self, post_id: int) -> Optional[Dict[str, Any]]:
+        """メッセージ参照を取得"""
+        return await self.run(self.sync.get_message_ref, post_id)
+    
+    async def delete_message_ref(self, post_id: int) -> bool:
+        """メッセージ参照を削除"""
+        return await self.run(self.sync.delete_message_ref, post_id, lock_key=("message_ref", post_id))
+
+class AsyncPrivateThreadMap(AsyncManagerBase):
+    """PrivateThreadMapの非同期版"""
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(PrivateThreadMap(base_dir))
+    
+    @property
+    def backfilled(self) -> bool:
+        """既存のアーカイブ済みスレッドを取り込み済みか"""
+        return self.sync.backfilled
+    
+    def get_thread_id(self, user_id: str) -> Optional[int]:
+        """ユーザーのスレッドIDを取得（メモリ上の表を引くだけなのでスレッドプールは使わない）"""
+        return self.sync.get_thread_id(user_id)
+    
+    async def set_thread(self, user_id: str, thread_id: int) -> None:
+        """ユーザーのスレッドを登録"""
+        return await self.run(self.sync.set_thread, user_id, thread_id)
+    
+    async def merge_threads(self, threads: Dict[str, int]) -> None:
+        """走査で見つけたスレッドをまとめて登録"""
+        return await self.run(self.sync.merge_threads, threads)
+    
+    async def remove_thread(self, thread_id: int) -> Optional[str]:
+        """削除されたスレッドの登録を外す"""
+        return await self.run(self.sync.remove_thread, thread_id)
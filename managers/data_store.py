@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from managers.async_managers import (
+    AsyncPostManager, AsyncReplyManager, AsyncLikeManager, AsyncMessageRefManager,
+    AsyncPrivateThreadMap, shutdown_io_executor
+)
+from managers.action_manager import ActionManager
+
+logger = logging.getLogger(__name__)
+
+class DataStore:
+    """全Cogで共有するマネージャーのコンテナ（bot.storeとして保持）
+
+    各マネージャーはここで一度だけ生成し、インデックスやキャッシュを全Cogで共有する。
+    """
+    
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+        
+        self.posts = AsyncPostManager(base_dir)
+        self.replies = AsyncReplyManager(base_dir)
+        self.likes = AsyncLikeManager(base_dir)
+        self.message_refs = AsyncMessageRefManager(base_dir)
+        self.private_threads = AsyncPrivateThreadMap(base_dir)
+        self.actions = ActionManager(base_dir)
+        
+        logger.info(f"データストアを初期化しました: {base_dir}")
+    
+    async def warm_up(self) -> Dict[str, float]:
+        """各マネージャーのインデックスを並行して構築し、マネージャーごとの所要ミリ秒を返す
+
+        構築前に届いたコマンドは初回アクセス時の構築（構築中なら完了）を待つため、結果は変わらない。
+        """
+        async def timed(name: str, manager) -> float:
+            started = time.perf_counter()
+            await manager.warm_up()
+            return (time.perf_counter() - started) * 1000
+        
+        managers = {"posts": self.posts, "replies": self.replies, "likes": self.likes}
+        timings = await asyncio.gather(*(timed(name, manager) for name, manager in managers.items()))
+        return dict(zip(managers, timings))
+    
+    async def close(self) -> None:
+        """実行中のファイルI/Oを待ち、バッファ中のデータを書き出す
+
+        スレッドプールの停止待ちと書き出しはイベントループを止めないよう別スレッドで行う。
+        """
+        await asyncio.to_thread(shutdown_io_executor)
+        
+        # バッファ中のアクセスログを書き出す
+        await asyncio.to_thread(self.posts.sync.access_logger.close)
+        
+        # ストレージの保留処理（JSONLの圧縮など）を完了
+        await asyncio.to_thread(self.posts.sync.storage.close)
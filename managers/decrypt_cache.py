@@ -0,0 +1,96 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# キャッシュする復号済み本文の最大件数（0で無効）
+DECRYPT_CACHE_SIZE = int(os.getenv('DECRYPT_CACHE_SIZE', '256'))
+# 復号済み本文を保持する秒数（0以下で無期限）
+DECRYPT_CACHE_TTL = float(os.getenv('DECRYPT_CACHE_TTL', '600'))
+
+# 同一データディレクトリのキャッシュはプロセス内で共有する
+_shared_caches: Dict[str, "DecryptCache"] = {}
+
+class DecryptCache:
+    """非公開投稿の復号済み本文を保持するLRUキャッシュ
+
+    キーは (post_id, updated_at)。メモリ上にのみ保持し、ディスクには書き出さない。
+    """
+    
+    def __init__(self, max_entries: int = DECRYPT_CACHE_SIZE, ttl: float = DECRYPT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, post_id: int, updated_at: str) -> Optional[str]:
+        """復号済み本文を取得（なければNone）"""
+        key = (post_id, updated_at)
+        
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                content, stored_at = cached
+                if self.ttl <= 0 or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return content
+                del self._entries[key]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, post_id: int, updated_at: str, content: str) -> None:
+        """復号済み本文を保存"""
+        if self.max_entries <= 0:
+            return
+        
+        key = (post_id, updated_at)
+        
+        with self._lock:
+            self._entries[key] = (content, time.monotonic())
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, post_id: int) -> None:
+        """投稿の復号済み本文を全て破棄（更新・削除時）"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == post_id]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        """キャッシュを全て破棄"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """ヒット・ミス数などの統計を取得"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+def get_decrypt_cache(base_dir: str = "data") -> DecryptCache:
+    """データディレクトリごとに共有される復号キャッシュを取得"""
+    key = os.path.abspath(base_dir)
+    cache = _shared_caches.get(key)
+    
+    if cache is None:
+        cache = DecryptCache()
+        _shared_caches[key] = cache
+    
+    return cache
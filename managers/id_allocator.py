@@ -0,0 +1,90 @@
+import json
+import os
+import logging
+import threading
+from typing import Dict, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 同一データディレクトリのアロケータはプロセス内で共有する
+_shared_allocators: Dict[str, "IdAllocator"] = {}
+
+class IdAllocator:
+    """エンティティ種別（post / reply / like）ごとの単調増加IDを払い出す
+
+    払い出したIDは返す前にカウンタファイルへ書き込む（先行書き込み）。
+    途中で停止しても同じIDが二度払い出されることはない。
+    """
+    
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+        self.counter_file = os.path.join(base_dir, ".id_counters.json")
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = self._load()
+        # プロセス起動後に既存データと突き合わせ済みのエンティティ
+        self._reconciled = set()
+    
+    def _load(self) -> Dict[str, int]:
+        """カウンタファイルを読み込む"""
+        if not os.path.exists(self.counter_file):
+            return {}
+        
+        try:
+            with open(self.counter_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {str(k): int(v) for k, v in data.items()}
+        except (json.JSONDecodeError, ValueError, AttributeError) as e:
+            # 壊れている場合は既存データから再計算させる
+            logger.warning(f"⚠️ IDカウンタファイルを読み込めません。既存データから再計算します: {e}")
+            return {}
+    
+    def _persist(self) -> None:
+        """カウンタを一時ファイル経由でアトミックに保存"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_file = self.counter_file + ".tmp"
+        
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._counters, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        os.replace(tmp_file, self.counter_file)
+    
+    def allocate(self, entity: str, seed: Optional[Callable[[], int]] = None) -> int:
+        """次のIDを予約して返す
+
+        seedは既存データの最大IDを返す関数。プロセスごとに一度だけ呼ばれ、
+        カウンタが既存データより小さい場合（カウンタ消失・データ復元など）に補正する。
+        """
+        with self._lock:
+            current = self._counters.get(entity, 0)
+            
+            if entity not in self._reconciled:
+                if seed is not None:
+                    existing_max = seed()
+                    if existing_max > current:
+                        logger.info(f"IDカウンタを既存データに合わせて補正します: {entity} {current} -> {existing_max}")
+                        current = existing_max
+                self._reconciled.add(entity)
+            
+            next_id = current + 1
+            self._counters[entity] = next_id
+            self._persist()
+            
+            return next_id
+    
+    def peek(self, entity: str) -> int:
+        """最後に払い出したIDを取得"""
+        with self._lock:
+            return self._counters.get(entity, 0)
+
+def get_id_allocator(base_dir: str = "data") -> IdAllocator:
+    """データディレクトリごとに共有されるIDアロケータを取得"""
+    key = os.path.abspath(base_dir)
+    allocator = _shared_allocators.get(key)
+    
+    if allocator is None:
+        allocator = IdAllocator(base_dir)
+        _shared_allocators[key] = allocator
+    
+    return allocator
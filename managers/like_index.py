@@ -0,0 +1,169 @@
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from managers.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+def _pair(post_id: int, user_id: str) -> Tuple[int, str]:
+    """インデックスのキー（呼び出し元が文字列の投稿IDを渡しても構築時と同じ型にそろえる）"""
+    return int(post_id), str(user_id)
+
+# 同一ストレージのインデックスはプロセス内で共有する
+_shared_indexes: Dict[Tuple[str, str], "LikeIndex"] = {}
+
+class LikeIndex:
+    """投稿ID・ユーザーIDからいいねを引くためのインメモリインデックス"""
+    
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+        self._users_by_post: Dict[int, Set[str]] = {}
+        self._likes_by_user: Dict[str, Set[int]] = {}
+        self._like_by_pair: Dict[Tuple[int, str], int] = {}
+        self._pair_by_like: Dict[int, Tuple[int, str]] = {}
+        # いいね数ごとの投稿数（最大いいね数を走査なしで求めるため）
+        self._posts_by_count: Dict[int, int] = {}
+        self.is_built = False
+        # スレッドプールからの並行更新に備えたロック
+        self._lock = threading.RLock()
+    
+    def build(self) -> None:
+        """ストレージを一度だけ走査してインデックスを構築"""
+        with self._lock:
+            self._users_by_post = {}
+            self._likes_by_user = {}
+            self._like_by_pair = {}
+            self._pair_by_like = {}
+            self._posts_by_count = {}
+            
+            for key, like_data in self.storage.load("likes"):
+                try:
+                    like_id = int(like_data['id'])
+                    post_id = int(like_data['post_id'])
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"⚠️ IDのないいいねをスキップ: {key}")
+                    continue
+                
+                self.add(like_id, post_id, like_data.get('user_id'))
+            
+            self.is_built = True
+            logger.info(f"いいねインデックスを構築しました: {len(self._pair_by_like)}件")
+    
+    def ensure_built(self) -> None:
+        """未構築なら構築（複数のスレッドから同時に呼ばれても構築は一度だけ）"""
+        if self.is_built:
+            return
+        with self._lock:
+            if not self.is_built:
+                self.build()
+    
+    def add(self, like_id: int, post_id: int, user_id: str) -> None:
+        """いいねをインデックスに追加"""
+        with self._lock:
+            like_id = int(like_id)
+            pair = _pair(post_id, user_id)
+            post_id, user_id = pair
+            
+            # 同じ組み合わせの古いいいねがあれば置き換える
+            old_like_id = self._like_by_pair.get(pair)
+            if old_like_id is not None and old_like_id != like_id:
+                self.remove(old_like_id)
+            
+            users = self._users_by_post.setdefault(post_id, set())
+            if user_id not in users:
+                users.add(user_id)
+                self._shift_count(len(users) - 1, len(users))
+            self._likes_by_user.setdefault(user_id, set()).add(like_id)
+            self._like_by_pair[pair] = like_id
+            self._pair_by_like[like_id] = pair
+    
+    def remove(self, like_id: int) -> None:
+        """いいねをインデックスから削除"""
+        with self._lock:
+            like_id = int(like_id)
+            pair = self._pair_by_like.pop(like_id, None)
+            if pair is None:
+                return
+            
+            post_id, user_id = pair
+            if self._like_by_pair.get(pair) == like_id:
+                del self._like_by_pair[pair]
+                
+                users = self._users_by_post.get(post_id)
+                if users is not None and user_id in users:
+                    users.discard(user_id)
+                    self._shift_count(len(users) + 1, len(users))
+                    if not users:
+                        del self._users_by_post[post_id]
+            
+            like_ids = self._likes_by_user.get(user_id)
+            if like_ids is not None:
+                like_ids.discard(like_id)
+                if not like_ids:
+                    del self._likes_by_user[user_id]
+    
+    def _shift_count(self, old: int, new: int) -> None:
+        """投稿のいいね数の変化をいいね数ごとの投稿数に反映（ロック取得済みで呼ぶ）"""
+        if old > 0:
+            remaining = self._posts_by_count.get(old, 0) - 1
+            if remaining > 0:
+                self._posts_by_count[old] = remaining
+            else:
+                self._posts_by_count.pop(old, None)
+        if new > 0:
+            self._posts_by_count[new] = self._posts_by_count.get(new, 0) + 1
+    
+    def find(self, post_id: int, user_id: str) -> Optional[int]:
+        """投稿とユーザーの組み合わせからいいねIDを取得"""
+        with self._lock:
+            return self._like_by_pair.get(_pair(post_id, user_id))
+    
+    def users_for_post(self, post_id: int) -> Set[str]:
+        """投稿にいいねしたユーザーIDを取得"""
+        with self._lock:
+            return set(self._users_by_post.get(int(post_id), ()))
+    
+    def like_ids_for_post(self, post_id: int) -> List[int]:
+        """投稿のいいねIDをID順に取得"""
+        with self._lock:
+            post_id = int(post_id)
+            return sorted(self._like_by_pair[(post_id, user_id)] for user_id in self._users_by_post.get(post_id, ()))
+    
+    def like_ids_for_user(self, user_id: str) -> List[int]:
+        """ユーザーのいいねIDをID順に取得"""
+        with self._lock:
+            return sorted(self._likes_by_user.get(str(user_id), ()))
+    
+    def count_for_post(self, post_id: int) -> int:
+        """投稿のいいね数を取得"""
+        return len(self._users_by_post.get(int(post_id), ()))
+    
+    def max_count(self) -> int:
+        """最も多くいいねされた投稿のいいね数を取得"""
+        with self._lock:
+            return max(self._posts_by_count, default=0)
+    
+    def ids(self) -> List[int]:
+        """インデックス内の全いいねIDを取得"""
+        with self._lock:
+            return list(self._pair_by_like.keys())
+    
+    def __len__(self) -> int:
+        return len(self._pair_by_like)
+
+def get_like_index(storage: StorageBackend, build: bool = True) -> LikeIndex:
+    """ストレージごとに共有されるいいねインデックスを取得"""
+    key = (os.path.abspath(storage.base_dir), storage.name)
+    index = _shared_indexes.get(key)
+    
+    if index is None:
+        index = LikeIndex(storage)
+        _shared_indexes[key] = index
+    
+    # build=Falseなら構築は初回アクセス時（ensure_built）まで遅らせる
+    if build:
+        index.ensure_built()
+    
+    return index
@@ -1,9 +1,14 @@
-import json
 import os
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from managers.storage import create_storage
+from managers.id_allocator import get_id_allocator
+from managers.like_index import LikeIndex, get_like_index
+from managers.query_cache import get_query_cache
+from utils.metrics import count_scanned
+
 logger = logging.getLogger(__name__)
 
 class LikeManager:
@@ -12,23 +17,34 @@ class LikeManager:
     def __init__(self, base_dir: str = "data"):
         self.base_dir = base_dir
         self.likes_dir = os.path.join(base_dir, "likes")
-        os.makedirs(self.likes_dir, exist_ok=True)
-    
-    def get_next_like_id(self) -> int:
-        """次のいいねIDを取得"""
-        existing_likes = [f for f in os.listdir(self.likes_dir) if f.endswith('.json')]
-        if not existing_likes:
-            return 1
         
-        max_id = 0
-        for filename in existing_likes:
-            try:
-                like_id = int(filename.replace('.json', '').replace('like_', ''))
-                max_id = max(max_id, like_id)
-            except ValueError:
-                continue
+        # レコードの保存先（STORAGE_BACKENDで切り替え）
+        self.storage = create_storage(base_dir)
+        self.id_allocator = get_id_allocator(base_dir)
         
-        return max_id + 1
+        # いいねインデックス（起動を遅らせないよう構築は初回アクセスかwarm_upまで遅らせる）
+        self._index = get_like_index(self.storage, build=False)
+        
+        # いいね数は関連度順検索の補正に使うため、変更時は検索結果のキャッシュも無効化
+        self.query_cache = get_query_cache(base_dir)
+    
+    @property
+    def index(self) -> LikeIndex:
+        """いいねインデックス（未構築なら構築してから返す）"""
+        self._index.ensure_built()
+        return self._index
+    
+    def warm_up(self) -> None:
+        """インデックスを構築しておく（起動後のバックグラウンド処理用）"""
+        self._index.ensure_built()
+    
+    def _key(self, like_id) -> str:
+        """いいねの保存位置を取得"""
+        return self.storage.key_for("likes", {"id": like_id})
+    
+    def get_next_like_id(self) -> int:
+        """次のいいねIDを予約して取得（ディレクトリ走査はプロセス起動後の初回のみ）"""
+        return self.id_allocator.allocate("like", seed=lambda: max(self.index.ids(), default=0))
     
     def save_like(self, post_id: int, user_id: str, display_name: str) -> int:
         """いいねを保存"""
@@ -42,91 +58,82 @@ class LikeManager:
             "created_at": datetime.now().isoformat()
         }
         
-        filename = os.path.join(self.likes_dir, f"like_{like_id}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(like_data, f, ensure_ascii=False, indent=2)
+        self.storage.write(self._key(like_id), like_data)
+        self.index.add(like_id, post_id, user_id)
+        self.query_cache.invalidate()
         
         logger.info(f"いいねを保存しました: like_id={like_id}, post_id={post_id}, user_id={user_id}")
         return like_id
     
-    def get_likes(self, post_id: int) -> List[Dict[str, Any]]:
-        """投稿のいいねを取得"""
+    def _read_likes(self, like_ids: List[int]) -> List[Dict[str, Any]]:
+        """いいねIDのリストからいいねデータを読み込む"""
         likes = []
         
-        for filename in sorted(os.listdir(self.likes_dir)):
-            if filename.startswith('like_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.likes_dir, filename), 'r', encoding='utf-8') as f:
-                        like = json.load(f)
-                    
-                    if like.get('post_id') == post_id:
-                        likes.append(like)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
+        for like_id in like_ids:
+            like_data = self.storage.read(self._key(like_id))
+            if like_data is None:
+                # 外部で削除・破損したレコードはインデックスからも外す
+                self.index.remove(like_id)
+                continue
+            likes.append(like_data)
         
+        count_scanned("likes", len(like_ids))
         return likes
     
+    def get_likes(self, post_id: int) -> List[Dict[str, Any]]:
+        """投稿のいいねを取得"""
+        return self._read_likes(self.index.like_ids_for_post(post_id))
+    
+    def get_like_count(self, post_id: int) -> int:
+        """投稿のいいね数を取得（ファイルを読まずにインデックスから数える）"""
+        return self.index.count_for_post(post_id)
+    
+    def get_max_like_count(self) -> int:
+        """最も多くいいねされた投稿のいいね数を取得"""
+        return self.index.max_count()
+    
     def get_likes_by_user(self, user_id: str) -> List[Dict[str, Any]]:
         """ユーザーのいいねを取得"""
-        user_likes = []
-        
-        for filename in sorted(os.listdir(self.likes_dir)):
-            if filename.startswith('like_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.likes_dir, filename), 'r', encoding='utf-8') as f:
-                        like_data = json.load(f)
-                    
-                    if like_data.get('user_id') == user_id:
-                        user_likes.append(like_data)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        
-        return user_likes
+        return self._read_likes(self.index.like_ids_for_user(user_id))
+    
+    def has_liked(self, post_id: int, user_id: str) -> bool:
+        """ユーザーが投稿にいいね済みか判定"""
+        return self.index.find(post_id, user_id) is not None
     
     def get_like_by_user_and_post(self, post_id: int, user_id: str) -> Optional[Dict[str, Any]]:
         """ユーザーといいねされた投稿IDからいいねデータを取得"""
-        for filename in os.listdir(self.likes_dir):
-            if filename.startswith('like_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.likes_dir, filename), 'r', encoding='utf-8') as f:
-                        like_data = json.load(f)
-                    
-                    if (like_data.get('post_id') == post_id and 
-                        like_data.get('user_id') == user_id):
-                        return like_data
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        return None
+        like_id = self.index.find(post_id, user_id)
+        if like_id is None:
+            return None
+        
+        likes = self._read_likes([like_id])
+        return likes[0] if likes else None
     
     def delete_like(self, post_id: int, user_id: str) -> bool:
         """いいねを削除"""
-        like_data = self.get_like_by_user_and_post(post_id, user_id)
-        if not like_data:
+        like_id = self.index.find(post_id, user_id)
+        if like_id is None:
             return False
         
-        filename = os.path.join(self.likes_dir, f"like_{like_data['id']}.json")
-        try:
-            os.remove(filename)
-            return True
-        except FileNotFoundError:
-            return False
+        self.index.remove(like_id)
+        removed = self.storage.remove(self._key(like_id))
+        self.query_cache.invalidate()
+        return removed
     
     def update_like_message_id(self, like_id: int, message_id: str, channel_id: str, forwarded_message_id: str = None) -> None:
         """いいねファイルにメッセージIDを更新"""
-        filename = os.path.join(self.likes_dir, f"like_{like_id}.json")
+        key = self._key(like_id)
+        like_data = self.storage.read(key)
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                like_data = json.load(f)
-            
-            like_data['message_id'] = message_id
-            like_data['channel_id'] = channel_id
-            if forwarded_message_id:
-                like_data['forwarded_message_id'] = forwarded_message_id
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(like_data, f, ensure_ascii=False, indent=2)
-                
-            logger.info(f"いいねメッセージIDを更新しました: like_id={like_id}")
-        except (json.JSONDecodeError, FileNotFoundError):
+        if like_data is None:
             logger.warning(f"いいねメッセージID更新失敗: like_id={like_id}")
+            return
+        
+        like_data['message_id'] = message_id
+        like_data['channel_id'] = channel_id
+        if forwarded_message_id:
+            like_data['forwarded_message_id'] = forwarded_message_id
+        
+        self.storage.write(key, like_data)
+        
+        logger.info(f"いいねメッセージIDを更新しました: like_id={like_id}")
@@ -0,0 +1,145 @@
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from managers.storage import StorageBackend
+from managers.time_index import TimeOrderedIndex
+
+logger = logging.getLogger(__name__)
+
+# 同一ストレージのインデックスはプロセス内で共有する
+_shared_indexes: Dict[Tuple[str, str], "PostIndex"] = {}
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """ISO形式の日時文字列をUNIX時刻に変換（解析できなければNone）"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+class PostIndex:
+    """投稿IDから保存位置とメタデータを引くためのインメモリインデックス"""
+    
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        # 作成日時順の二次インデックス（新しい順の上位K件取得用）
+        self._by_date = TimeOrderedIndex()
+        self.is_built = False
+        # スレッドプールからの並行更新に備えたロック
+        self._lock = threading.RLock()
+    
+    def build(self) -> None:
+        """ストレージを一度だけ走査してインデックスを構築"""
+        with self._lock:
+            entries: Dict[int, Dict[str, Any]] = {}
+            
+            for key, post_data in self.storage.load("posts"):
+                try:
+                    post_id = int(post_data['id'])
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"⚠️ IDのない投稿をスキップ: {key}")
+                    continue
+                
+                if post_id not in entries:
+                    entries[post_id] = self._make_entry(key, post_data)
+            
+            self._entries = entries
+            self._by_date.rebuild((post_id, entry['created_ts']) for post_id, entry in entries.items())
+            self.is_built = True
+            logger.info(f"投稿インデックスを構築しました: {len(entries)}件")
+    
+    def ensure_built(self) -> None:
+        """未構築なら構築（複数のスレッドから同時に呼ばれても構築は一度だけ）"""
+        if self.is_built:
+            return
+        with self._lock:
+            if not self.is_built:
+                self.build()
+    
+    @staticmethod
+    def _make_entry(key: str, post_data: Dict[str, Any]) -> Dict[str, Any]:
+        """インデックスエントリを作成（pathはストレージ上の保存位置）
+
+        検索の絞り込みをファイルを読まずに行えるよう、作成日時は解析済みの値も保持する。
+        """
+        created_at = post_data.get('created_at') or ''
+        return {
+            "path": key,
+            "is_private": bool(post_data.get('is_private')),
+            "is_anonymous": bool(post_data.get('is_anonymous', False)),
+            "user_id": post_data.get('user_id'),
+            "category": (post_data.get('category') or '').lower(),
+            "created_at": created_at,
+            "created_ts": parse_timestamp(created_at)
+        }
+    
+    def add(self, post_id: int, key: str, post_data: Dict[str, Any]) -> None:
+        """投稿をインデックスに追加（既存なら上書き）"""
+        with self._lock:
+            entry = self._make_entry(key, post_data)
+            self._entries[post_id] = entry
+            self._by_date.add(post_id, entry['created_ts'])
+    
+    def remove(self, post_id: int) -> None:
+        """投稿をインデックスから削除"""
+        with self._lock:
+            self._entries.pop(post_id, None)
+            self._by_date.remove(post_id)
+    
+    def get(self, post_id: int) -> Optional[Dict[str, Any]]:
+        """投稿のインデックスエントリを取得"""
+        return self._entries.get(post_id)
+    
+    def ids(self) -> List[int]:
+        """インデックス内の全投稿IDを取得"""
+        with self._lock:
+            return list(self._entries.keys())
+    
+    def items(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """投稿IDとエントリの組をID順に取得"""
+        with self._lock:
+            return sorted(self._entries.items())
+    
+    def iter_by_date(self, post_ids: Iterable[int] = None, older_than: Tuple[float, int] = None,
+                     newer_than: Tuple[float, int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """投稿IDとエントリの組を作成日時の新しい順に返す（日時が不正な投稿は末尾）
+
+        post_idsを指定した場合はそのIDのみを対象にする。
+        older_thanを指定するとその並び順キーより古いものを新しい順に、
+        newer_thanを指定するとそのキーより新しいものを古い順（キーに近い順）に返す。
+        """
+        if newer_than is not None:
+            ordered_ids = self._by_date.iter_oldest(post_ids, newer_than)
+        else:
+            ordered_ids = self._by_date.iter_newest(post_ids, older_than)
+        
+        for post_id in ordered_ids:
+            entry = self._entries.get(post_id)
+            if entry is not None:
+                yield post_id, entry
+    
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def get_post_index(storage: StorageBackend, build: bool = True) -> PostIndex:
+    """ストレージごとに共有される投稿インデックスを取得"""
+    key = (os.path.abspath(storage.base_dir), storage.name)
+    index = _shared_indexes.get(key)
+    
+    if index is None:
+        index = PostIndex(storage)
+        _shared_indexes[key] = index
+    
+    # build=Falseなら構築は初回アクセス時（ensure_built）まで遅らせる
+    if build:
+        index.ensure_built()
+    
+    return index
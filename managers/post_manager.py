@@ -1,14 +1,24 @@
-import json
 import os
 import logging
 import hashlib
 import base64
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
 from datetime import datetime
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from managers.post_index import PostIndex, get_post_index
+from managers.storage import create_storage
+from managers.id_allocator import get_id_allocator
+from managers.access_logger import get_access_logger
+from managers.decrypt_cache import get_decrypt_cache
+from managers.search_index import SearchIndex, get_search_index
+from managers.post_query import Predicate, order_predicates
+from managers.query_cache import get_query_cache
+from utils.metrics import count_scanned
+from utils.search_trace import current_trace
+
 logger = logging.getLogger(__name__)
 
 class PostManager:
@@ -22,13 +32,44 @@ class PostManager:
         self.access_log_dir = os.path.join(base_dir, "logs", "access")
         
         # ディレクトリを作成
-        os.makedirs(self.public_posts_dir, exist_ok=True)
-        os.makedirs(self.private_posts_dir, exist_ok=True)
         os.makedirs(self.access_log_dir, exist_ok=True)
+        self.access_logger = get_access_logger(self.access_log_dir)
+        
+        # レコードの保存先（STORAGE_BACKENDで切り替え）
+        self.storage = create_storage(base_dir)
+        self.id_allocator = get_id_allocator(base_dir)
         
         # 暗号化キーを生成
         self.encryption_key = self._get_or_create_encryption_key()
         self.cipher = Fernet(self.encryption_key)
+        
+        # 復号済み本文のキャッシュ（メモリ上のみ）
+        self.decrypt_cache = get_decrypt_cache(base_dir)
+        
+        # 投稿インデックスと公開投稿のキーワード検索用インデックス
+        # （起動を遅らせないよう構築は初回アクセスかwarm_upまで遅らせる）
+        self._index = get_post_index(self.storage, build=False)
+        self._search_index = get_search_index(self.storage, build=False)
+        
+        # 検索結果のキャッシュ（投稿を変更するたびに無効化）
+        self.query_cache = get_query_cache(base_dir)
+    
+    @property
+    def index(self) -> PostIndex:
+        """投稿インデックス（未構築なら構築してから返す）"""
+        self._index.ensure_built()
+        return self._index
+    
+    @property
+    def search_index(self) -> SearchIndex:
+        """公開投稿の検索インデックス（未構築なら構築してから返す）"""
+        self._search_index.ensure_built()
+        return self._search_index
+    
+    def warm_up(self) -> None:
+        """インデックスを構築しておく（起動後のバックグラウンド処理用）"""
+        self._index.ensure_built()
+        self._search_index.ensure_built()
     
     def _get_or_create_encryption_key(self) -> bytes:
         """暗号化キーを取得または生成"""
@@ -63,62 +104,22 @@ class PostManager:
         """コンテンツを復号"""
         return self.cipher.decrypt(encrypted_content.encode()).decode()
     
+    def _get_decrypted_content(self, post_id: int, post_data: Dict[str, Any]) -> str:
+        """非公開投稿の本文を復号（キャッシュがあれば復号を省略）"""
+        updated_at = post_data.get('updated_at') or ''
+        content = self.decrypt_cache.get(post_id, updated_at)
+        if content is None:
+            content = self._decrypt_content(post_data['content'])
+            self.decrypt_cache.put(post_id, updated_at, content)
+        return content
+    
     def _log_access(self, user_id: str, post_id: int, action: str, is_private: bool = False):
-        """アクセスログを記録"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "user_id": user_id,
-            "post_id": post_id,
-            "action": action,
-            "is_private": is_private
-        }
-        
-        log_file = os.path.join(self.access_log_dir, f"access_{datetime.now().strftime('%Y%m%d')}.json")
-        
-        # 既存のログを読み込む
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-        
-        # 新しいログを追加
-        logs.append(log_entry)
-        
-        # ログを保存
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
+        """アクセスログを記録（バッファ経由でまとめて追記）"""
+        self.access_logger.log(user_id, post_id, action, is_private)
     
     def get_next_post_id(self) -> int:
-        """次の投稿IDを取得"""
-        # 公開・非公開両方のディレクトリをチェック
-        all_posts = []
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            if os.path.exists(directory):
-                all_posts.extend([f for f in os.listdir(directory) if f.endswith('.json')])
-        
-        if not all_posts:
-            return 1
-        
-        max_id = 0
-        for filename in all_posts:
-            try:
-                # post_public_1.json や post_private_1.json からIDを抽出
-                if filename.startswith('public_post_'):
-                    post_id = int(filename.replace('public_post_', '').replace('.json', ''))
-                elif filename.startswith('private_post_'):
-                    post_id = int(filename.replace('private_post_', '').replace('.json', ''))
-                else:
-                    # 旧形式のファイル名対応
-                    post_id = int(filename.replace('.json', ''))
-                max_id = max(max_id, post_id)
-            except ValueError:
-                continue
-        
-        return max_id + 1
+        """次の投稿IDを予約して取得（ディレクトリ走査はプロセス起動後の初回のみ）"""
+        return self.id_allocator.allocate("post", seed=lambda: max(self.index.ids(), default=0))
     
     def save_post(self, user_id: str, content: str, category: str = None, 
                   is_anonymous: bool = False, is_private: bool = False,
@@ -147,14 +148,14 @@ class PostManager:
             "image_url": image_url
         }
         
-        # 公開・非公開でディレクトリを分けて保存
-        if is_private:
-            filename = os.path.join(self.private_posts_dir, f"private_post_{post_id}.json")
-        else:
-            filename = os.path.join(self.public_posts_dir, f"public_post_{post_id}.json")
+        # 公開・非公開で保存先を分けて保存
+        key = self.storage.key_for("posts", post_data)
+        self.storage.write(key, post_data)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(post_data, f, ensure_ascii=False, indent=2)
+        # インデックスを更新
+        self.index.add(post_id, key, post_data)
+        self.search_index.add(post_id, post_data)
+        self.query_cache.invalidate()
         
         # アクセスログを記録
         self._log_access(user_id, post_id, "create", is_private)
@@ -164,231 +165,286 @@ class PostManager:
     def update_post_message_ref(self, post_id: int, message_id: str, channel_id: str) -> bool:
         """投稿のmessage_idとchannel_idを更新"""
         try:
-            # 公開・非公開両方のディレクトリをチェック
-            filenames_to_try = [
-                f"public_post_{post_id}.json",
-                f"private_post_{post_id}.json"
-            ]
+            entry = self.index.get(post_id)
+            if not entry:
+                return False
             
-            updated = False
-            for filename in filenames_to_try:
-                filepath = None
-                if os.path.exists(os.path.join(self.public_posts_dir, filename)):
-                    filepath = os.path.join(self.public_posts_dir, filename)
-                elif os.path.exists(os.path.join(self.private_posts_dir, filename)):
-                    filepath = os.path.join(self.private_posts_dir, filename)
-                
-                if filepath:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        post_data = json.load(f)
-                    
-                    # message_idとchannel_idを更新
-                    post_data['message_id'] = message_id
-                    post_data['channel_id'] = channel_id
-                    post_data['updated_at'] = datetime.now().isoformat()
-                    
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(post_data, f, ensure_ascii=False, indent=2)
-                    
-                    updated = True
-                    break
+            post_data = self.storage.read(entry['path'])
+            if post_data is None:
+                self.index.remove(post_id)
+                return False
+            
+            # message_idとchannel_idを更新
+            post_data['message_id'] = message_id
+            post_data['channel_id'] = channel_id
+            post_data['updated_at'] = datetime.now().isoformat()
+            
+            self.storage.write(entry['path'], post_data)
+            self.query_cache.invalidate()
             
-            return updated
+            return True
         except Exception as e:
             logger.error(f"投稿のmessage_ref更新中にエラー: {e}")
             return False
     
+    def _can_access(self, entry: Dict[str, Any], user_id: str = None) -> bool:
+        """インデックスのメタデータだけで非公開投稿のアクセス可否を判定"""
+        if entry.get('is_private'):
+            return bool(user_id) and entry.get('user_id') == user_id
+        return True
+    
+    def _read_post(self, post_id: int, entry: Dict[str, Any], user_id: str = None) -> Optional[Dict[str, Any]]:
+        """インデックスエントリから投稿を読み込む"""
+        post_data = self.storage.read(entry['path'])
+        count_scanned("posts")
+        if post_data is None:
+            # 外部で削除・破損したレコードはインデックスからも外す
+            self.index.remove(post_id)
+            return None
+        
+        # 非公開投稿のアクセス制御
+        if post_data.get('is_private'):
+            if not user_id or post_data.get('user_id') != user_id:
+                return None
+            
+            # 非公開投稿は復号（同じ版の本文はキャッシュから取得）
+            post_data['content'] = self._get_decrypted_content(post_id, post_data)
+        
+        # アクセスログを記録
+        self._log_access(user_id or "anonymous", post_id, "read", post_data.get('is_private', False))
+        
+        return post_data
+    
     def get_post(self, post_id: int, user_id: str = None) -> Optional[Dict[str, Any]]:
         """投稿を取得"""
-        # 公開・非公開両方のディレクトリをチェック
-        # 新形式のファイル名を試す
-        filenames_to_try = [
-            f"public_post_{post_id}.json",
-            f"private_post_{post_id}.json",
-            f"{post_id}.json"  # 旧形式対応
-        ]
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            for filename in filenames_to_try:
-                filepath = os.path.join(directory, filename)
-                
-                if os.path.exists(filepath):
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            post_data = json.load(f)
-                        
-                        # 非公開投稿のアクセス制御
-                        if post_data.get('is_private'):
-                            if not user_id or post_data.get('user_id') != user_id:
-                                return None
-                            
-                            # 非公開投稿は復号
-                            post_data['content'] = self._decrypt_content(post_data['content'])
-                        
-                        # アクセスログを記録
-                        self._log_access(user_id or "anonymous", post_id, "read", post_data.get('is_private', False))
-                        
-                        return post_data
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
-        
-        return None
+        entry = self.index.get(post_id)
+        if not entry or not self._can_access(entry, user_id):
+            return None
+        
+        return self._read_post(post_id, entry, user_id)
+    
+    def get_posts(self, post_ids: Iterable[int], user_id: str = None) -> Dict[int, Dict[str, Any]]:
+        """複数の投稿をまとめて取得（見つからない・アクセスできない投稿は含めない）"""
+        posts = {}
+        for post_id in dict.fromkeys(int(post_id) for post_id in post_ids):
+            post = self.get_post(post_id, user_id)
+            if post:
+                posts[post_id] = post
+        return posts
     
     def get_all_posts(self, user_id: str = None) -> List[Dict[str, Any]]:
         """全投稿を取得"""
         posts = []
+        trace = current_trace()
         
-        logger.info(f"🔍 PostManager.get_all_posts: user_id={user_id}")
-        logger.info(f"  - 公開ディレクトリ: {self.public_posts_dir}")
-        logger.info(f"  - 非公開ディレクトリ: {self.private_posts_dir}")
-        
-        # 公開・非公開両方のディレクトリをチェック
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            logger.info(f"🔍 ディレクトリチェック: {directory}")
-            
-            if not os.path.exists(directory):
-                logger.warning(f"  ⚠️ ディレクトリが存在しません: {directory}")
-                continue
-            
-            files = [f for f in os.listdir(directory) if f.endswith('.json')]
-            logger.info(f"  📁 JSONファイル数: {len(files)}")
-            
-            for filename in sorted(files):
+        with trace.stage("load_posts"):
+            # インデックスを一度だけ走査し、アクセスできる投稿のみ読み込む
+            for post_id, entry in self.index.items():
+                if not self._can_access(entry, user_id):
+                    trace.count("skipped_private")
+                    continue
+                
                 try:
-                    # public_post_1.json や private_post_1.json からIDを抽出
-                    if filename.startswith('public_post_'):
-                        post_id = int(filename.replace('public_post_', '').replace('.json', ''))
-                    elif filename.startswith('private_post_'):
-                        post_id = int(filename.replace('private_post_', '').replace('.json', ''))
-                    else:
-                        # 旧形式のファイル名対応
-                        post_id = int(filename.replace('.json', ''))
-                    
-                    logger.info(f"  📄 ファイル読み込み: {filename} (ID: {post_id})")
-                    
-                    post = self.get_post(post_id, user_id)
+                    post = self._read_post(post_id, entry, user_id)
                     if post:
                         posts.append(post)
-                        logger.info(f"    ✅ 投稿読み込み成功: ID={post_id}")
                     else:
-                        logger.warning(f"    ❌ 投稿読み込み失敗: ID={post_id}")
-                        
-                except ValueError as e:
-                    logger.error(f"    ❌ ファイル名解析エラー: {filename} - {e}")
+                        trace.count("load_failed")
+                except Exception as e:
+                    logger.error(f"投稿処理エラー: {entry['path']} - {e}")
+                    trace.count("load_errors")
+        
+        trace.count("loaded", len(posts))
+        return posts
+    
+    def query_posts(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                    user_id: str = None, limit: int = None, older_than: Tuple[float, int] = None,
+                    newer_than: Tuple[float, int] = None) -> List[Dict[str, Any]]:
+        """条件に一致する投稿を作成日時の新しい順に取得
+
+        絞り込みはインデックスのメタデータだけで行い、条件を満たした投稿のみ読み込む。
+        limit件そろった時点で走査を打ち切る。
+        older_than・newer_thanには並び順キーを渡し、その位置の前後のページを取得する
+        （newer_thanの場合もキーに近いlimit件を新しい順で返す）。
+        """
+        posts = []
+        trace = current_trace()
+        post_ids = None
+        
+        # キーワードは転置インデックスで候補IDを先に求める
+        if keyword:
+            with trace.stage("index_lookup"):
+                post_ids = self.search_index.search(keyword)
+            trace.count("index_matches", len(post_ids))
+            if not post_ids:
+                return posts
+        
+        pipeline = order_predicates(predicates)
+        
+        with trace.stage("load_posts"):
+            for post_id, entry in self.index.iter_by_date(post_ids, older_than, newer_than):
+                if not self._can_access(entry, user_id):
+                    trace.count("skipped_private")
+                    continue
+                
+                rejected = next((p for p in pipeline if not p.test(post_id, entry)), None)
+                if rejected is not None:
+                    trace.count(f"rejected_{rejected.name}")
                     continue
+                
+                try:
+                    post = self._read_post(post_id, entry, user_id)
                 except Exception as e:
-                    logger.error(f"    ❌ ファイル処理エラー: {filename} - {e}")
+                    logger.error(f"投稿処理エラー: {entry['path']} - {e}")
+                    trace.count("load_errors")
                     continue
+                
+                if post:
+                    posts.append(post)
+                    if limit and len(posts) >= limit:
+                        trace.set(stopped_early=True)
+                        break
+                else:
+                    trace.count("load_failed")
         
-        logger.info(f"🔍 get_all_posts完了: 全{len(posts)}件の投稿を取得")
+        trace.count("loaded", len(posts))
+        if newer_than is not None:
+            posts.reverse()
         return posts
     
+    def rank_posts(self, keyword: str, predicates: Iterable[Predicate] = (), user_id: str = None,
+                   limit: int = None, offset: int = 0, boost: Callable[[int], float] = None,
+                   max_boost: float = 1.0) -> List[Dict[str, Any]]:
+        """キーワードとの関連度（BM25）が高い順に投稿を取得
+
+        boostには投稿IDからスコアに掛ける倍率を返す関数（いいね数による補正など）を、
+        max_boostにはその倍率の上限を渡す。インデックスから上位offset+limit件だけを
+        打ち切り付きで選んでから読み込む。limitを省略すると一致した全件を採点する。
+        """
+        posts = []
+        trace = current_trace()
+        pipeline = order_predicates(predicates)
+        
+        def accept(post_id: int) -> bool:
+            entry = self.index.get(post_id)
+            if not entry or not self._can_access(entry, user_id):
+                trace.count("skipped_private")
+                return False
+            for predicate in pipeline:
+                if not predicate.test(post_id, entry):
+                    trace.count(f"rejected_{predicate.name}")
+                    return False
+            return True
+        
+        with trace.stage("rank"):
+            k = offset + limit if limit else len(self.search_index)
+            top = self.search_index.top_k(keyword, k, accept=accept, boost=boost, max_boost=max_boost)[offset:]
+            trace.count("ranked", len(top))
+        
+        with trace.stage("load_posts"):
+            for _, post_id in top:
+                entry = self.index.get(post_id)
+                post = self._read_post(post_id, entry, user_id) if entry else None
+                if post:
+                    posts.append(post)
+        
+        trace.count("loaded", len(posts))
+        return posts
+    
+    def count_posts(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                    user_id: str = None, ranked: bool = False) -> int:
+        """条件に一致するアクセス可能な投稿数をインデックスのメタデータだけで数える
+
+        rankedの場合はrank_postsと同じく、空白区切りの語のいずれかを含む投稿を数える。
+        """
+        post_ids = None
+        if keyword:
+            post_ids = self.search_index.search_any(keyword) if ranked else self.search_index.search(keyword)
+            if not post_ids:
+                return 0
+        
+        pipeline = order_predicates(predicates)
+        return sum(
+            1 for post_id, entry in self.index.iter_by_date(post_ids)
+            if self._can_access(entry, user_id) and all(p.test(post_id, entry) for p in pipeline)
+        )
+    
     def update_post(self, post_id: int, content: str = None, category: str = None, 
                    image_url: str = None, user_id: str = None, message_id: str = None, channel_id: str = None) -> bool:
         """投稿を更新"""
-        # 公開・非公開両方のディレクトリをチェック
-        # 新形式のファイル名を試す
-        filenames_to_try = [
-            f"public_post_{post_id}.json",
-            f"private_post_{post_id}.json",
-            f"{post_id}.json"  # 旧形式対応
-        ]
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            for filename in filenames_to_try:
-                filepath = os.path.join(directory, filename)
-                
-                if os.path.exists(filepath):
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            post_data = json.load(f)
-                        
-                        # 非公開投稿のアクセス制御
-                        if post_data.get('is_private'):
-                            if not user_id or post_data.get('user_id') != user_id:
-                                return False
-                        
-                        if content is not None:
-                            if post_data.get('is_private'):
-                                post_data['content'] = self._encrypt_content(content)
-                            else:
-                                post_data['content'] = content
-                        
-                        if category is not None:
-                            post_data['category'] = category
-                        
-                        if image_url is not None:
-                            post_data['image_url'] = image_url
-                        
-                        if message_id is not None:
-                            post_data['message_id'] = message_id
-                        
-                        if channel_id is not None:
-                            post_data['channel_id'] = channel_id
-                        
-                        post_data['updated_at'] = datetime.now().isoformat()
-                        
-                        with open(filepath, 'w', encoding='utf-8') as f:
-                            json.dump(post_data, f, ensure_ascii=False, indent=2)
-                        
-                        # アクセスログを記録
-                        self._log_access(user_id or "anonymous", post_id, "update", post_data.get('is_private', False))
-                        
-                        return True
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
-        
-        return False
+        entry = self.index.get(post_id)
+        if not entry:
+            return False
+        
+        key = entry['path']
+        post_data = self.storage.read(key)
+        if post_data is None:
+            self.index.remove(post_id)
+            return False
+        
+        # 非公開投稿のアクセス制御
+        if post_data.get('is_private'):
+            if not user_id or post_data.get('user_id') != user_id:
+                return False
+        
+        if content is not None:
+            if post_data.get('is_private'):
+                post_data['content'] = self._encrypt_content(content)
+            else:
+                post_data['content'] = content
+        
+        if category is not None:
+            post_data['category'] = category
+        
+        if image_url is not None:
+            post_data['image_url'] = image_url
+        
+        if message_id is not None:
+            post_data['message_id'] = message_id
+        
+        if channel_id is not None:
+            post_data['channel_id'] = channel_id
+        
+        post_data['updated_at'] = datetime.now().isoformat()
+        
+        self.storage.write(key, post_data)
+        
+        # インデックスを更新
+        self.index.add(post_id, key, post_data)
+        self.search_index.add(post_id, post_data)
+        self.decrypt_cache.invalidate(post_id)
+        self.query_cache.invalidate()
+        
+        # アクセスログを記録
+        self._log_access(user_id or "anonymous", post_id, "update", post_data.get('is_private', False))
+        
+        return True
     
     def delete_post(self, post_id: int, user_id: str = None) -> bool:
         """投稿を削除"""
-        # 公開・非公開両方のディレクトリをチェック
-        # 新形式のファイル名を試す
-        filenames_to_try = [
-            f"public_post_{post_id}.json",
-            f"private_post_{post_id}.json",
-            f"{post_id}.json"  # 旧形式対応
-        ]
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            for filename in filenames_to_try:
-                filepath = os.path.join(directory, filename)
-                
-                if os.path.exists(filepath):
-                    try:
-                        # アクセス制御チェック
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            post_data = json.load(f)
-                        
-                        if post_data.get('is_private'):
-                            if not user_id or post_data.get('user_id') != user_id:
-                                return False
-                        
-                        # 削除実行
-                        os.remove(filepath)
-                        
-                        # アクセスログを記録
-                        self._log_access(user_id or "anonymous", post_id, "delete", post_data.get('is_private', False))
-                        
-                        return True
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
-        
-        return False
-    
-    def search_posts(self, keyword: str = None, category: str = None, 
-                     user_id: str = None) -> List[Dict[str, Any]]:
-        """投稿を検索"""
-        posts = self.get_all_posts(user_id)
+        entry = self.index.get(post_id)
+        if not entry:
+            return False
         
-        if keyword:
-            keyword = keyword.lower()
-            posts = [p for p in posts if keyword in p.get('content', '').lower()]
+        # アクセス制御チェック
+        key = entry['path']
+        post_data = self.storage.read(key)
+        if post_data is None:
+            self.index.remove(post_id)
+            return False
         
-        if category:
-            posts = [p for p in posts if p.get('category') == category]
+        if post_data.get('is_private'):
+            if not user_id or post_data.get('user_id') != user_id:
+                return False
         
-        if user_id:
-            posts = [p for p in posts if p.get('user_id') == user_id]
+        # 削除実行
+        self.storage.remove(key)
+        self.index.remove(post_id)
+        self.search_index.remove(post_id)
+        self.decrypt_cache.invalidate(post_id)
+        self.query_cache.invalidate()
         
-        return posts
+        # アクセスログを記録
+        self._log_access(user_id or "anonymous", post_id, "delete", post_data.get('is_private', False))
+        
+        return True
@@ -0,0 +1,60 @@
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 評価コスト（小さいほど先に評価する）
+COST_EQUALITY = 0
+COST_RANGE = 1
+COST_SUBSTRING = 2
+
+class Predicate(NamedTuple):
+    """投稿インデックスのエントリに対する絞り込み条件
+
+    test(post_id, entry)はインデックスのメタデータだけで判定し、ファイルは読まない。
+    """
+    name: str
+    cost: int
+    test: Callable[[int, Dict[str, Any]], bool]
+
+def author_is(user_id: str) -> Predicate:
+    """投稿者が一致する投稿"""
+    return Predicate("author", COST_EQUALITY, lambda post_id, entry: entry.get('user_id') == user_id)
+
+def anonymity_is(is_anonymous: bool) -> Predicate:
+    """匿名・非匿名が一致する投稿"""
+    return Predicate("anonymous", COST_EQUALITY, lambda post_id, entry: entry.get('is_anonymous', False) == is_anonymous)
+
+def id_in(post_ids: Set[int], name: str = "ids") -> Predicate:
+    """IDが集合に含まれる投稿（キーワード検索の結果など）"""
+    return Predicate(name, COST_EQUALITY, lambda post_id, entry: post_id in post_ids)
+
+def created_between(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Predicate:
+    """作成日時が範囲内の投稿（日時を解析できない投稿は除外）"""
+    ts_from = date_from.timestamp() if date_from else None
+    ts_to = date_to.timestamp() if date_to else None
+    
+    def test(post_id: int, entry: Dict[str, Any]) -> bool:
+        created_ts = entry.get('created_ts')
+        if created_ts is None:
+            return False
+        if ts_from is not None and created_ts < ts_from:
+            return False
+        if ts_to is not None and created_ts > ts_to:
+            return False
+        return True
+    
+    return Predicate("date", COST_RANGE, test)
+
+def category_contains(category: str) -> Predicate:
+    """カテゴリーに文字列を含む投稿（大文字小文字は区別しない）"""
+    needle = category.lower()
+    return Predicate("category", COST_SUBSTRING, lambda post_id, entry: needle in entry.get('category', ''))
+
+def order_predicates(predicates: Iterable[Predicate]) -> List[Predicate]:
+    """安く判定できる条件から順に並べる
+
+    一致判定は最も安く、投稿者やIDの条件は絞り込み効果も大きいため先頭に来る。
+    """
+    return sorted(predicates, key=lambda predicate: predicate.cost)
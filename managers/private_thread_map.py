@@ -0,0 +1,107 @@
+import json
+import os
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class PrivateThreadMap:
+    """ユーザーIDから非公開投稿用プライベートスレッドのIDを引く対応表
+
+    スレッド一覧のAPIを走査せずに済むよう、作成・発見したスレッドを記録してファイルに保存する。
+    backfilledは既存のアーカイブ済みスレッドを一度走査して取り込み済みかどうか。
+    """
+    
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+        self.map_file = os.path.join(base_dir, ".private_threads.json")
+        self._lock = threading.Lock()
+        self._threads: Dict[str, int] = {}
+        self._users: Dict[int, str] = {}
+        self.backfilled = False
+        self._load()
+    
+    def _load(self) -> None:
+        """対応表ファイルを読み込む"""
+        if not os.path.exists(self.map_file):
+            return
+        
+        try:
+            with open(self.map_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._threads = {str(k): int(v) for k, v in data.get('threads', {}).items()}
+            self.backfilled = bool(data.get('backfilled', False))
+        except (json.JSONDecodeError, ValueError, AttributeError) as e:
+            # 壊れている場合はスレッドの走査から作り直させる
+            logger.warning(f"⚠️ プライベートスレッド対応表を読み込めません。作り直します: {e}")
+            self._threads = {}
+            self.backfilled = False
+        
+        self._users = {thread_id: user_id for user_id, thread_id in self._threads.items()}
+    
+    def _persist(self) -> None:
+        """対応表を一時ファイル経由でアトミックに保存"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_file = self.map_file + ".tmp"
+        
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"backfilled": self.backfilled, "threads": self._threads},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        os.replace(tmp_file, self.map_file)
+    
+    def get_thread_id(self, user_id: str) -> Optional[int]:
+        """ユーザーのスレッドIDを取得（未登録ならNone）"""
+        return self._threads.get(str(user_id))
+    
+    def set_thread(self, user_id: str, thread_id: int) -> None:
+        """ユーザーのスレッドを登録（既存の登録は置き換え）"""
+        user_id, thread_id = str(user_id), int(thread_id)
+        with self._lock:
+            if self._threads.get(user_id) == thread_id:
+                return
+            
+            old_thread_id = self._threads.get(user_id)
+            if old_thread_id is not None:
+                self._users.pop(old_thread_id, None)
+            old_user_id = self._users.get(thread_id)
+            if old_user_id is not None:
+                self._threads.pop(old_user_id, None)
+            
+            self._threads[user_id] = thread_id
+            self._users[thread_id] = user_id
+            self._persist()
+        
+        logger.info(f"プライベートスレッドを登録しました: user_id={user_id}, thread_id={thread_id}")
+    
+    def merge_threads(self, threads: Dict[str, int]) -> None:
+        """走査で見つけたスレッドを未登録のユーザー分だけまとめて登録し、走査済みにする"""
+        with self._lock:
+            for user_id, thread_id in threads.items():
+                if str(user_id) not in self._threads and int(thread_id) not in self._users:
+                    self._threads[str(user_id)] = int(thread_id)
+                    self._users[int(thread_id)] = str(user_id)
+            self.backfilled = True
+            self._persist()
+        
+        logger.info(f"プライベートスレッド対応表を取り込みました: {len(threads)}件 (登録数={len(self._threads)})")
+    
+    def remove_thread(self, thread_id: int) -> Optional[str]:
+        """削除されたスレッドの登録を外し、対応していたユーザーIDを返す"""
+        with self._lock:
+            user_id = self._users.pop(int(thread_id), None)
+            if user_id is None:
+                return None
+            
+            self._threads.pop(user_id, None)
+            self._persist()
+        
+        logger.info(f"プライベートスレッドの登録を削除しました: user_id={user_id}, thread_id={thread_id}")
+        return user_id
+    
+    def stats(self) -> Dict[str, Any]:
+        """登録数などの統計を取得"""
+        return {"threads": len(self._threads), "backfilled": self.backfilled}
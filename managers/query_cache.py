@@ -0,0 +1,111 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# キャッシュする検索結果の最大件数（0で無効）
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '512'))
+
+# 同一データディレクトリのキャッシュはプロセス内で共有する
+_shared_caches: Dict[str, "QueryCache"] = {}
+
+def make_query_key(kind: str, **params: Any) -> Tuple:
+    """検索条件から正規化したキャッシュキーを作成
+
+    文字列は前後の空白を除き、空文字は未指定（None）と同じ扱いにする。
+    大文字小文字などの正規化は検索の照合方法に合わせて呼び出し側で行う。
+    """
+    items = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, str):
+            value = value.strip() or None
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        items.append((name, value))
+    return (kind, tuple(items))
+
+class QueryCache:
+    """検索結果のLRUキャッシュ
+
+    投稿・リプライが変更されるたびに世代番号を進め、古い世代で作られた結果は使わない。
+    書き込みの間に繰り返される同じ検索だけがメモリから返される。
+    """
+    
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any, int]:
+        """(ヒットしたか, 結果, 現在の世代)を取得
+
+        ミスした場合の世代はputにそのまま渡す。検索中に書き込みがあれば世代がずれ、
+        その結果は保存されない。
+        """
+        with self._lock:
+            generation = self.generation
+            cached = self._entries.get(key)
+            if cached is not None:
+                if cached[0] == generation:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, cached[1], generation
+                del self._entries[key]
+            
+            self.misses += 1
+            return False, None, generation
+    
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """検索開始時の世代とともに結果を保存"""
+        if self.max_entries <= 0:
+            return
+        
+        with self._lock:
+            if generation != self.generation:
+                return
+            
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self) -> None:
+        """世代を進めて全ての結果を無効化（投稿・リプライの変更時）"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """ヒット・ミス数などの統計を取得"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "generation": self.generation,
+                "invalidations": self.invalidations,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+def get_query_cache(base_dir: str = "data") -> QueryCache:
+    """データディレクトリごとに共有される検索結果キャッシュを取得"""
+    key = os.path.abspath(base_dir)
+    cache = _shared_caches.get(key)
+    
+    if cache is None:
+        cache = QueryCache()
+        _shared_caches[key] = cache
+    
+    return cache
@@ -0,0 +1,156 @@
+import os
+import logging
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+from managers.storage import StorageBackend
+from managers.post_index import parse_timestamp
+from managers.time_index import TimeOrderedIndex
+
+logger = logging.getLogger(__name__)
+
+# 同一ストレージのインデックスはプロセス内で共有する
+_shared_indexes: Dict[Tuple[str, str], "ReplyIndex"] = {}
+
+class ReplyIndex:
+    """リプライID・投稿ID・投稿者からリプライを引くためのインメモリインデックス"""
+    
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._by_post: Dict[int, Set[int]] = {}
+        self._by_user: Dict[str, Set[int]] = {}
+        # 作成日時順の二次インデックス（新しい順の上位K件取得用）
+        self._by_date = TimeOrderedIndex()
+        self.is_built = False
+        # スレッドプールからの並行更新に備えたロック
+        self._lock = threading.RLock()
+    
+    def build(self) -> None:
+        """ストレージを一度だけ走査してインデックスを構築"""
+        with self._lock:
+            self._entries = {}
+            self._by_post = {}
+            self._by_user = {}
+            self._by_date = TimeOrderedIndex()
+            
+            for key, reply_data in self.storage.load("replies"):
+                try:
+                    reply_id = int(reply_data['id'])
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"⚠️ IDのないリプライをスキップ: {key}")
+                    continue
+                
+                self.remove(reply_id)
+                self._index_entry(reply_id, reply_data)
+            
+            # 日時順の索引は1件ずつ挿入せず、最後にまとめて並び替える
+            self._by_date.rebuild((reply_id, entry['created_ts']) for reply_id, entry in self._entries.items())
+            self.is_built = True
+            logger.info(f"リプライインデックスを構築しました: {len(self._entries)}件")
+    
+    def ensure_built(self) -> None:
+        """未構築なら構築（複数のスレッドから同時に呼ばれても構築は一度だけ）"""
+        if self.is_built:
+            return
+        with self._lock:
+            if not self.is_built:
+                self.build()
+    
+    def _index_entry(self, reply_id: int, reply_data: Dict[str, Any]) -> Dict[str, Any]:
+        """日時順以外の索引にリプライを登録"""
+        created_at = reply_data.get('created_at') or ''
+        entry = {
+            "post_id": reply_data.get('post_id'),
+            "user_id": reply_data.get('user_id'),
+            "created_at": created_at,
+            "created_ts": parse_timestamp(created_at)
+        }
+        self._entries[reply_id] = entry
+        self._by_post.setdefault(entry['post_id'], set()).add(reply_id)
+        self._by_user.setdefault(entry['user_id'], set()).add(reply_id)
+        return entry
+    
+    def add(self, reply_id: int, reply_data: Dict[str, Any]) -> None:
+        """リプライをインデックスに追加（既存なら上書き）"""
+        with self._lock:
+            self.remove(reply_id)
+            entry = self._index_entry(reply_id, reply_data)
+            self._by_date.add(reply_id, entry['created_ts'])
+    
+    def remove(self, reply_id: int) -> None:
+        """リプライをインデックスから削除"""
+        with self._lock:
+            entry = self._entries.pop(reply_id, None)
+            if entry is None:
+                return
+            self._by_date.remove(reply_id)
+            
+            for mapping, value in ((self._by_post, entry['post_id']), (self._by_user, entry['user_id'])):
+                reply_ids = mapping.get(value)
+                if reply_ids is not None:
+                    reply_ids.discard(reply_id)
+                    if not reply_ids:
+                        del mapping[value]
+    
+    def get(self, reply_id: int) -> Optional[Dict[str, Any]]:
+        """リプライのインデックスエントリを取得"""
+        return self._entries.get(reply_id)
+    
+    def ids_for_post(self, post_id: int) -> List[int]:
+        """投稿のリプライIDをID順に取得"""
+        with self._lock:
+            return sorted(self._by_post.get(post_id, ()))
+    
+    def ids_for_user(self, user_id: str) -> List[int]:
+        """ユーザーのリプライIDをID順に取得"""
+        with self._lock:
+            return sorted(self._by_user.get(user_id, ()))
+    
+    def iter_by_date(self, reply_ids: Iterable[int] = None, older_than: Tuple[float, int] = None,
+                     newer_than: Tuple[float, int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """リプライIDとエントリの組を作成日時の新しい順に返す（日時が不正なリプライは末尾）
+
+        reply_idsを指定した場合はそのIDのみを対象にする。
+        older_thanを指定するとその並び順キーより古いものを新しい順に、
+        newer_thanを指定するとそのキーより新しいものを古い順（キーに近い順）に返す。
+        """
+        if newer_than is not None:
+            ordered_ids = self._by_date.iter_oldest(reply_ids, newer_than)
+        else:
+            ordered_ids = self._by_date.iter_newest(reply_ids, older_than)
+        
+        for reply_id in ordered_ids:
+            entry = self._entries.get(reply_id)
+            if entry is not None:
+                yield reply_id, entry
+    
+    def count_for_post(self, post_id: int) -> int:
+        """投稿のリプライ数を取得"""
+        return len(self._by_post.get(post_id, ()))
+    
+    def ids(self) -> List[int]:
+        """インデックス内の全リプライIDをID順に取得"""
+        with self._lock:
+            return sorted(self._entries.keys())
+    
+    def __contains__(self, reply_id: int) -> bool:
+        return reply_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def get_reply_index(storage: StorageBackend, build: bool = True) -> ReplyIndex:
+    """ストレージごとに共有されるリプライインデックスを取得"""
+    key = (os.path.abspath(storage.base_dir), storage.name)
+    index = _shared_indexes.get(key)
+    
+    if index is None:
+        index = ReplyIndex(storage)
+        _shared_indexes[key] = index
+    
+    # build=Falseなら構築は初回アクセス時（ensure_built）まで遅らせる
+    if build:
+        index.ensure_built()
+    
+    return index
\ No newline at end of file
@@ -1,9 +1,18 @@
-import json
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Iterator, Set, Tuple
 from datetime import datetime
 
+from managers.storage import create_storage
+from managers.id_allocator import get_id_allocator
+from managers.reply_index import ReplyIndex, get_reply_index
+from managers.post_index import PostIndex, get_post_index
+from managers.search_index import SearchIndex, get_search_index
+from managers.post_query import Predicate, order_predicates
+from managers.query_cache import get_query_cache
+from utils.metrics import count_scanned
+from utils.search_trace import current_trace
+
 logger = logging.getLogger(__name__)
 
 class ReplyManager:
@@ -12,23 +21,51 @@ class ReplyManager:
     def __init__(self, base_dir: str = "data"):
         self.base_dir = base_dir
         self.replies_dir = os.path.join(base_dir, "replies")
-        os.makedirs(self.replies_dir, exist_ok=True)
+        
+        # レコードの保存先（STORAGE_BACKENDで切り替え）
+        self.storage = create_storage(base_dir)
+        self.id_allocator = get_id_allocator(base_dir)
+        
+        # リプライインデックス、本文の転置インデックスと、親投稿のメタデータを引くための投稿インデックス
+        # （起動を遅らせないよう構築は初回アクセスかwarm_upまで遅らせる）
+        self._index = get_reply_index(self.storage, build=False)
+        self._search_index = get_search_index(self.storage, "replies", build=False)
+        self._post_index = get_post_index(self.storage, build=False)
+        
+        # 検索結果のキャッシュ（投稿と共有し、リプライを変更するたびに無効化）
+        self.query_cache = get_query_cache(base_dir)
+    
+    @property
+    def index(self) -> ReplyIndex:
+        """リプライインデックス（未構築なら構築してから返す）"""
+        self._index.ensure_built()
+        return self._index
+    
+    @property
+    def search_index(self) -> SearchIndex:
+        """リプライ本文の検索インデックス（未構築なら構築してから返す）"""
+        self._search_index.ensure_built()
+        return self._search_index
+    
+    @property
+    def post_index(self) -> PostIndex:
+        """親投稿の投稿インデックス（未構築なら構築してから返す）"""
+        self._post_index.ensure_built()
+        return self._post_index
+    
+    def warm_up(self) -> None:
+        """インデックスを構築しておく（起動後のバックグラウンド処理用）"""
+        self._index.ensure_built()
+        self._search_index.ensure_built()
+        self._post_index.ensure_built()
+    
+    def _key(self, reply_id) -> str:
+        """リプライの保存位置を取得"""
+        return self.storage.key_for("replies", {"id": reply_id})
     
     def get_next_reply_id(self) -> int:
-        """次のリプライIDを取得"""
-        existing_replies = [f for f in os.listdir(self.replies_dir) if f.endswith('.json')]
-        if not existing_replies:
-            return 1
-        
-        max_id = 0
-        for filename in existing_replies:
-            try:
-                reply_id = int(filename.replace('.json', '').replace('reply_', ''))
-                max_id = max(max_id, reply_id)
-            except ValueError:
-                continue
-        
-        return max_id + 1
+        """次のリプライIDを予約して取得（ディレクトリ走査はプロセス起動後の初回のみ）"""
+        return self.id_allocator.allocate("reply", seed=lambda: max(self.index.ids(), default=0))
     
     def save_reply(self, post_id: int, user_id: str, content: str, display_name: str) -> int:
         """リプライを保存"""
@@ -43,65 +80,159 @@ class ReplyManager:
             "created_at": datetime.now().isoformat()
         }
         
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(reply_data, f, ensure_ascii=False, indent=2)
+        self.storage.write(self._key(reply_id), reply_data)
+        self.index.add(reply_id, reply_data)
+        self.search_index.add(reply_id, reply_data)
+        self.query_cache.invalidate()
         
         logger.info(f"リプライを保存しました: reply_id={reply_id}, post_id={post_id}, user_id={user_id}")
         return reply_id
     
+    def _read_reply(self, reply_id: int) -> Optional[Dict[str, Any]]:
+        """リプライを読み込む"""
+        reply_data = self.storage.read(self._key(reply_id))
+        count_scanned("replies")
+        if reply_data is None:
+            # 外部で削除・破損したレコードはインデックスからも外す
+            self.index.remove(reply_id)
+            self.search_index.remove(reply_id)
+        return reply_data
+    
+    def _read_replies(self, reply_ids: List[int]) -> Iterator[Dict[str, Any]]:
+        """リプライIDのリストからリプライを順に読み込む"""
+        for reply_id in reply_ids:
+            reply_data = self._read_reply(reply_id)
+            if reply_data is not None:
+                yield reply_data
+    
     def get_replies(self, post_id: int) -> List[Dict[str, Any]]:
         """投稿のリプライを取得"""
+        return list(self._read_replies(self.index.ids_for_post(post_id)))
+    
+    def get_replies_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーのリプライを取得"""
+        return list(self._read_replies(self.index.ids_for_user(user_id)))
+    
+    def get_replies_by_post_id(self, post_id: int) -> List[Dict[str, Any]]:
+        """投稿IDから全リプライを取得"""
+        return self.get_replies(post_id)
+    
+    def get_all_replies(self) -> Iterator[Dict[str, Any]]:
+        """全リプライをID順に1件ずつ返す"""
+        return self._read_replies(self.index.ids())
+    
+    def _candidate_ids(self, keyword: str = None, author_id: str = None) -> Optional[Set[int]]:
+        """キーワードと投稿者で走査対象のリプライIDを絞り込む（条件がなければNone）"""
+        reply_ids = None
+        if keyword:
+            reply_ids = self.search_index.search(keyword)
+        if author_id:
+            author_ids = self.index.ids_for_user(author_id)
+            reply_ids = set(author_ids) if reply_ids is None else reply_ids.intersection(author_ids)
+        return reply_ids
+    
+    def _parent_matches(self, entry: Dict[str, Any], post_predicates: List[Predicate],
+                        user_id: str = None) -> bool:
+        """親投稿のメタデータを投稿インデックスから引いて条件を判定（投稿ファイルは読まない）
+
+        削除済みの投稿や、閲覧できない非公開投稿へのリプライは対象外にする。
+        """
+        try:
+            post_id = int(entry['post_id'])
+        except (TypeError, ValueError):
+            return False
+        
+        post_entry = self.post_index.get(post_id)
+        if post_entry is None:
+            return False
+        if post_entry.get('is_private') and not (user_id and post_entry.get('user_id') == user_id):
+            return False
+        return all(predicate.test(post_id, post_entry) for predicate in post_predicates)
+    
+    def query_replies(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                      author_id: str = None, limit: int = None, older_than: Tuple[float, int] = None,
+                      newer_than: Tuple[float, int] = None, post_predicates: Iterable[Predicate] = (),
+                      user_id: str = None) -> List[Dict[str, Any]]:
+        """条件に一致するリプライを作成日時の新しい順に取得
+
+        キーワードは本文の転置インデックス、投稿者はリプライインデックスで候補を絞り、
+        候補だけを日時順に走査してlimit件そろった時点で打ち切る。
+        predicatesはリプライの、post_predicatesは親投稿のメタデータに対する条件。
+        older_than・newer_thanの扱いはPostManager.query_postsと同じ。
+        """
         replies = []
+        trace = current_trace()
+        pipeline = order_predicates(predicates)
+        post_pipeline = order_predicates(post_predicates)
+        
+        with trace.stage("candidates"):
+            reply_ids = self._candidate_ids(keyword, author_id)
+            if reply_ids is not None:
+                trace.count("candidates", len(reply_ids))
+                if not reply_ids:
+                    return []
         
-        for filename in sorted(os.listdir(self.replies_dir)):
-            if filename.startswith('reply_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.replies_dir, filename), 'r', encoding='utf-8') as f:
-                        reply = json.load(f)
-                    
-                    if reply.get('post_id') == post_id:
-                        replies.append(reply)
-                except (json.JSONDecodeError, FileNotFoundError):
+        with trace.stage("scan"):
+            for reply_id, entry in self.index.iter_by_date(reply_ids, older_than, newer_than):
+                trace.count("scanned")
+                if not all(predicate.test(reply_id, entry) for predicate in pipeline):
+                    trace.count("rejected")
                     continue
+                if not self._parent_matches(entry, post_pipeline, user_id):
+                    trace.count("rejected_parent")
+                    continue
+                
+                reply_data = self._read_reply(reply_id)
+                if reply_data is None:
+                    trace.count("load_failed")
+                    continue
+                
+                replies.append(reply_data)
+                if limit and len(replies) >= limit:
+                    break
         
+        trace.count("loaded", len(replies))
+        if newer_than is not None:
+            replies.reverse()
         return replies
     
-    def get_replies_by_user(self, user_id: str) -> List[Dict[str, Any]]:
-        """ユーザーのリプライを取得"""
-        user_replies = []
-        
-        for filename in sorted(os.listdir(self.replies_dir)):
-            if filename.startswith('reply_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.replies_dir, filename), 'r', encoding='utf-8') as f:
-                        reply_data = json.load(f)
-                    
-                    if reply_data.get('user_id') == user_id:
-                        user_replies.append(reply_data)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
+    def count_replies(self, predicates: Iterable[Predicate] = (), keyword: str = None,
+                      author_id: str = None, post_predicates: Iterable[Predicate] = (),
+                      user_id: str = None) -> int:
+        """条件に一致するリプライ数をインデックスのメタデータだけで数える"""
+        reply_ids = self._candidate_ids(keyword, author_id)
+        if reply_ids is None:
+            reply_ids = self.index.ids()
         
-        return user_replies
+        pipeline = order_predicates(predicates)
+        post_pipeline = order_predicates(post_predicates)
+        count = 0
+        for reply_id in reply_ids:
+            entry = self.index.get(reply_id)
+            if entry is None or not all(predicate.test(reply_id, entry) for predicate in pipeline):
+                continue
+            if self._parent_matches(entry, post_pipeline, user_id):
+                count += 1
+        return count
     
-    def get_replies_by_post_id(self, post_id: int) -> List[Dict[str, Any]]:
-        """投稿IDから全リプライを取得"""
-        return self.get_replies(post_id)
+    def get_reply_count(self, post_id: int = None) -> int:
+        """リプライ数を取得（post_id省略時は全件）"""
+        if post_id is None:
+            return len(self.index)
+        return self.index.count_for_post(post_id)
     
     def get_reply_by_id_and_user(self, reply_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """リプライIDとユーザーIDからリプライデータを取得"""
-        for filename in os.listdir(self.replies_dir):
-            if filename.startswith('reply_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.replies_dir, filename), 'r', encoding='utf-8') as f:
-                        reply_data = json.load(f)
-                    
-                    if (str(reply_data.get('id')) == str(reply_id) and 
-                        reply_data.get('user_id') == user_id):
-                        return reply_data
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        return None
+        try:
+            reply_id = int(reply_id)
+        except (TypeError, ValueError):
+            return None
+        
+        entry = self.index.get(reply_id)
+        if not entry or entry['user_id'] != user_id:
+            return None
+        
+        return self._read_reply(reply_id)
     
     def delete_reply(self, reply_id: str, user_id: str) -> bool:
         """リプライを削除"""
@@ -109,69 +240,61 @@ class ReplyManager:
         if not reply_data:
             return False
         
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
-        try:
-            os.remove(filename)
-            return True
-        except FileNotFoundError:
-            return False
+        self.index.remove(int(reply_data['id']))
+        self.search_index.remove(int(reply_data['id']))
+        removed = self.storage.remove(self._key(reply_data['id']))
+        self.query_cache.invalidate()
+        return removed
     
     def update_reply(self, post_id: int, reply_id: int, content: str) -> bool:
         """リプライを更新"""
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
+        key = self._key(reply_id)
+        reply_data = self.storage.read(key)
         
-        if not os.path.exists(filename):
+        if reply_data is None:
             return False
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                reply_data = json.load(f)
-            
-            if reply_data.get('post_id') != post_id:
-                return False
-            
-            reply_data['content'] = content
-            reply_data['updated_at'] = datetime.now().isoformat()
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(reply_data, f, ensure_ascii=False, indent=2)
-            
-            return True
-        except (json.JSONDecodeError, FileNotFoundError):
+        if reply_data.get('post_id') != post_id:
             return False
+        
+        reply_data['content'] = content
+        reply_data['updated_at'] = datetime.now().isoformat()
+        
+        self.storage.write(key, reply_data)
+        self.index.add(reply_id, reply_data)
+        self.search_index.add(reply_id, reply_data)
+        self.query_cache.invalidate()
+        
+        return True
     
     def update_reply_message_id(self, reply_id: int, message_id: str, channel_id: str, forwarded_message_id: str = None) -> None:
         """リプライファイルにメッセージIDを更新"""
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
+        key = self._key(reply_id)
+        reply_data = self.storage.read(key)
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                reply_data = json.load(f)
-            
-            reply_data['message_id'] = message_id
-            reply_data['channel_id'] = channel_id
-            if forwarded_message_id:
-                reply_data['forwarded_message_id'] = forwarded_message_id
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(reply_data, f, ensure_ascii=False, indent=2)
-                
-            logger.info(f"リプライメッセージIDを更新しました: reply_id={reply_id}")
-        except (json.JSONDecodeError, FileNotFoundError):
+        if reply_data is None:
             logger.warning(f"リプライメッセージID更新失敗: reply_id={reply_id}")
+            return
+        
+        reply_data['message_id'] = message_id
+        reply_data['channel_id'] = channel_id
+        if forwarded_message_id:
+            reply_data['forwarded_message_id'] = forwarded_message_id
+        
+        self.storage.write(key, reply_data)
+        self.query_cache.invalidate()
+        
+        logger.info(f"リプライメッセージIDを更新しました: reply_id={reply_id}")
     
     def get_reply_message_ref(self, reply_id: int) -> Optional[Dict[str, Any]]:
         """リプライのmessage_refを取得"""
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
+        reply_data = self.storage.read(self._key(reply_id))
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                reply_data = json.load(f)
-            
-            return {
-                'message_id': reply_data.get('message_id'),
-                'channel_id': reply_data.get('channel_id'),
-                'forwarded_message_id': reply_data.get('forwarded_message_id')
-            }
-        except (json.JSONDecodeError, FileNotFoundError):
+        if reply_data is None:
             return None
+        
+        return {
+            'message_id': reply_data.get('message_id'),
+            'channel_id': reply_data.get('channel_id'),
+            'forwarded_message_id': reply_data.get('forwarded_message_id')
+        }
@@ -0,0 +1,333 @@
+import os
+import math
+import heapq
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+from managers.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# BM25のパラメータ（語の出現回数の飽和度と文書長の正規化の強さ）
+BM25_K1 = float(os.getenv('BM25_K1', '1.2'))
+BM25_B = float(os.getenv('BM25_B', '0.75'))
+# 関連度順に並べたポスティングリストを保持するトークン数の上限
+SEARCH_IMPACT_CACHE_TOKENS = int(os.getenv('SEARCH_IMPACT_CACHE_TOKENS', '512'))
+# 平均文書長がこの割合以上ずれたら関連度順のリストを作り直す
+_AVG_LENGTH_DRIFT = 0.1
+
+# 同一ストレージのインデックスはプロセス内で共有する
+_shared_indexes: Dict[Tuple[str, str, str], "SearchIndex"] = {}
+
+def normalize_text(text: Optional[str]) -> str:
+    """検索用に文字列を正規化（全角半角の統一・小文字化）"""
+    if not text:
+        return ""
+    return unicodedata.normalize('NFKC', text).lower()
+
+def token_counts(text: str) -> Dict[str, int]:
+    """正規化済み文字列の1文字と2文字（bigram）のトークンごとの出現回数
+
+    日本語は空白で区切られないため、単語ではなく文字n-gramで索引する。
+    """
+    counts: Dict[str, int] = {}
+    for i in range(len(text)):
+        for token in (text[i], text[i:i + 2]):
+            counts[token] = counts.get(token, 0) + 1
+    # 末尾の1文字はbigramとしても数えられているため差し引く
+    if text:
+        counts[text[-1]] -= 1
+        if not counts[text[-1]]:
+            del counts[text[-1]]
+    counts.pop(" ", None)
+    return counts
+
+def query_tokens(keyword: str) -> Set[str]:
+    """検索キーワードから候補の絞り込みに使うトークンを取得"""
+    if len(keyword) == 1:
+        return {keyword}
+    return {keyword[i:i + 2] for i in range(len(keyword) - 1)}
+
+class SearchIndex:
+    """公開投稿（またはリプライ）の本文とカテゴリーに対する転置インデックス
+
+    非公開投稿は平文を保持しないよう索引しない。
+    トークンごとに投稿内の出現回数を、投稿ごとに文書長を保持し、BM25の採点に使う。
+    collectionでストレージ上の対象（"posts"・"replies"）を指定する。
+    """
+    
+    def __init__(self, storage: StorageBackend, collection: str = "posts"):
+        self.storage = storage
+        self.collection = collection
+        # トークン -> {投稿ID: 出現回数}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        # 候補の検証用に正規化済みの本文・カテゴリーを保持
+        self._texts: Dict[int, Tuple[str, str]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        # 検索されたトークンのポスティングを寄与の大きい順に並べたもの（-寄与, 投稿ID）
+        self._impact_lists: "OrderedDict[str, List[Tuple[float, int]]]" = OrderedDict()
+        self._impact_avg_length = 0.0
+        self._lock = threading.RLock()
+        self.is_built = False
+    
+    def build(self) -> None:
+        """ストレージを一度だけ走査してインデックスを構築"""
+        with self._lock:
+            self._postings = {}
+            self._doc_tokens = {}
+            self._texts = {}
+            self._lengths = {}
+            self._total_length = 0
+            self._impact_lists.clear()
+            
+            for key, post_data in self.storage.load(self.collection):
+                try:
+                    post_id = int(post_data['id'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                
+                if post_id not in self._texts:
+                    self.add(post_id, post_data)
+            
+            self.is_built = True
+            logger.info(f"検索インデックスを構築しました: {self.collection} {len(self._texts)}件 トークン数={len(self._postings)}")
+    
+    def ensure_built(self) -> None:
+        """未構築なら構築（複数のスレッドから同時に呼ばれても構築は一度だけ）"""
+        if self.is_built:
+            return
+        with self._lock:
+            if not self.is_built:
+                self.build()
+    
+    @staticmethod
+    def _impact(tf: int, length: int, avg_length: float) -> float:
+        """1トークンのBM25の寄与（IDFを除く部分）"""
+        return tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+    
+    def add(self, post_id: int, post_data: Dict[str, Any]) -> None:
+        """投稿をインデックスに追加（既存なら置き換え、非公開なら削除）"""
+        with self._lock:
+            self.remove(post_id)
+            
+            if post_data.get('is_private'):
+                return
+            
+            content = normalize_text(post_data.get('content'))
+            category = normalize_text(post_data.get('category'))
+            counts = token_counts(content)
+            for token, tf in token_counts(category).items():
+                counts[token] = counts.get(token, 0) + tf
+            length = len(content) + len(category)
+            
+            for token, tf in counts.items():
+                self._postings.setdefault(token, {})[post_id] = tf
+                impacts = self._impact_lists.get(token)
+                if impacts is not None:
+                    insort(impacts, (-self._impact(tf, length, self._impact_avg_length), post_id))
+            self._doc_tokens[post_id] = set(counts)
+            self._texts[post_id] = (content, category)
+            self._lengths[post_id] = length
+            self._total_length += length
+    
+    def remove(self, post_id: int) -> None:
+        """投稿をインデックスから削除"""
+        with self._lock:
+            tokens = self._doc_tokens.pop(post_id, None)
+            self._texts.pop(post_id, None)
+            length = self._lengths.pop(post_id, 0)
+            self._total_length -= length
+            if not tokens:
+                return
+            
+            for token in tokens:
+                post_ids = self._postings.get(token)
+                if post_ids is None:
+                    continue
+                
+                tf = post_ids.pop(post_id, None)
+                impacts = self._impact_lists.get(token)
+                if impacts is not None and tf is not None:
+                    item = (-self._impact(tf, length, self._impact_avg_length), post_id)
+                    i = bisect_left(impacts, item)
+                    if i < len(impacts) and impacts[i] == item:
+                        del impacts[i]
+                if not post_ids:
+                    del self._postings[token]
+                    self._impact_lists.pop(token, None)
+    
+    def _match(self, keyword: str) -> Set[int]:
+        """正規化済みキーワードを本文またはカテゴリーに含む投稿IDを取得（ロック取得済みで呼ぶ）"""
+        # 件数の少ないポスティングリストから順に積集合を取る
+        postings = []
+        for token in query_tokens(keyword):
+            post_ids = self._postings.get(token)
+            if not post_ids:
+                return set()
+            postings.append(post_ids)
+        postings.sort(key=len)
+        
+        candidates = set(postings[0])
+        for post_ids in postings[1:]:
+            candidates = {post_id for post_id in candidates if post_id in post_ids}
+            if not candidates:
+                return set()
+        
+        # n-gramが揃っていても連続しているとは限らないため、候補のみ部分一致で確認
+        return {
+            post_id for post_id in candidates
+            if keyword in self._texts[post_id][0] or keyword in self._texts[post_id][1]
+        }
+    
+    def search(self, keyword: str) -> Set[int]:
+        """キーワードを本文またはカテゴリーに含む公開投稿のIDを取得"""
+        keyword = normalize_text(keyword).strip()
+        if not keyword:
+            return set()
+        
+        with self._lock:
+            return self._match(keyword)
+    
+    def search_any(self, keyword: str) -> Set[int]:
+        """空白区切りの語のいずれかを含む公開投稿のIDを取得（関連度順検索の対象）"""
+        with self._lock:
+            matches: Set[int] = set()
+            for term in dict.fromkeys(normalize_text(keyword).split()):
+                matches |= self._match(term)
+            return matches
+    
+    def _impact_list(self, token: str) -> List[Tuple[float, int]]:
+        """トークンのポスティングを寄与の大きい順に並べたリストを取得（ロック取得済みで呼ぶ）"""
+        impacts = self._impact_lists.get(token)
+        if impacts is not None:
+            self._impact_lists.move_to_end(token)
+            return impacts
+        
+        avg_length = self._impact_avg_length
+        impacts = sorted(
+            (-self._impact(tf, self._lengths[post_id], avg_length), post_id)
+            for post_id, tf in self._postings.get(token, {}).items()
+        )
+        self._impact_lists[token] = impacts
+        while len(self._impact_lists) > SEARCH_IMPACT_CACHE_TOKENS:
+            self._impact_lists.popitem(last=False)
+        return impacts
+    
+    def _refresh_avg_length(self) -> None:
+        """平均文書長が大きくずれていれば関連度順のリストを破棄（ロック取得済みで呼ぶ）"""
+        avg_length = self._total_length / len(self._texts) or 1.0
+        if abs(avg_length - self._impact_avg_length) > self._impact_avg_length * _AVG_LENGTH_DRIFT:
+            self._impact_avg_length = avg_length
+            self._impact_lists.clear()
+    
+    def top_k(self, keyword: str, k: int, accept: Callable[[int], bool] = None,
+              boost: Callable[[int], float] = None, max_boost: float = 1.0) -> List[Tuple[float, int]]:
+        """空白区切りの語のいずれかを含む公開投稿をBM25スコアの上位k件だけ取得
+
+        各トークンのポスティングを寄与の大きい順に並べたリストを並行して辿り、
+        未確認の投稿が取りうる最大スコアが上位k件の最低点を下回った時点で打ち切る
+        （Threshold Algorithm）。acceptで対象外にする投稿を判定し、
+        boostで投稿ごとの倍率を掛ける場合はmax_boostにその上限を渡す。
+        戻り値は(スコア, 投稿ID)の高い順のリスト。
+        """
+        terms = list(dict.fromkeys(normalize_text(keyword).split()))
+        if not terms or k <= 0:
+            return []
+        
+        with self._lock:
+            total_docs = len(self._texts)
+            if not total_docs:
+                return []
+            self._refresh_avg_length()
+            avg_length = self._impact_avg_length
+            
+            tokens = set()
+            for term in terms:
+                tokens.update(token for token in query_tokens(term) if token in self._postings)
+            if not tokens:
+                return []
+            
+            idf = {}
+            for token in tokens:
+                df = len(self._postings[token])
+                idf[token] = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            lists = [(token, self._impact_list(token)) for token in tokens]
+            positions = [0] * len(lists)
+            
+            top: List[Tuple[float, int]] = []
+            seen: Set[int] = set()
+            
+            while True:
+                progressed = False
+                for i, (token, impacts) in enumerate(lists):
+                    if positions[i] >= len(impacts):
+                        continue
+                    post_id = impacts[positions[i]][1]
+                    positions[i] += 1
+                    progressed = True
+                    
+                    if post_id in seen:
+                        continue
+                    seen.add(post_id)
+                    
+                    content, category = self._texts[post_id]
+                    if not any(term in content or term in category for term in terms):
+                        continue
+                    if accept is not None and not accept(post_id):
+                        continue
+                    
+                    length = self._lengths[post_id]
+                    score = 0.0
+                    for other in tokens:
+                        tf = self._postings[other].get(post_id)
+                        if tf:
+                            score += idf[other] * self._impact(tf, length, avg_length)
+                    if boost is not None:
+                        score *= boost(post_id)
+                    
+                    if len(top) < k:
+                        heapq.heappush(top, (score, post_id))
+                    elif (score, post_id) > top[0]:
+                        heapq.heapreplace(top, (score, post_id))
+                
+                if not progressed:
+                    break
+                
+                # 未確認の投稿が取りうるスコアの上限
+                threshold = max_boost * sum(
+                    idf[token] * -impacts[positions[i]][0]
+                    for i, (token, impacts) in enumerate(lists) if positions[i] < len(impacts)
+                )
+                # 同点の未確認の投稿はIDの大小で上位に入りうるため、上限を上回るまで続ける
+                # （同点で打ち切るとkによって上位に入る投稿が変わり、ページ送りで重複・欠落する）
+                if len(top) >= k and top[0][0] > threshold:
+                    break
+            
+            return sorted(top, reverse=True)
+    
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self._texts
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+
+def get_search_index(storage: StorageBackend, collection: str = "posts", build: bool = True) -> SearchIndex:
+    """ストレージと対象ごとに共有される検索インデックスを取得"""
+    key = (os.path.abspath(storage.base_dir), storage.name, collection)
+    index = _shared_indexes.get(key)
+    
+    if index is None:
+        index = SearchIndex(storage, collection)
+        _shared_indexes[key] = index
+    
+    # build=Falseなら構築は初回アクセス時（ensure_built）まで遅らせる
+    if build:
+        index.ensure_built()
+    
+    return index
@@ -0,0 +1,410 @@
+import json
+import os
+import sys
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 保存対象のコレクション
+COLLECTIONS = ("posts", "replies", "likes")
+
+# 同一データディレクトリのストレージはプロセス内で共有する
+_shared_storages: Dict[Tuple[str, str], "StorageBackend"] = {}
+
+class StorageBackend(ABC):
+    """投稿・リプライ・いいねのレコード保存先の共通インターフェース
+
+    keyはバックエンドごとのレコード位置（ファイルパスやログ上のキー）を表す。
+    """
+    
+    name = "base"
+    
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+    
+    @abstractmethod
+    def key_for(self, collection: str, record: Dict[str, Any]) -> str:
+        """レコードの保存位置を決定"""
+    
+    @abstractmethod
+    def ids(self, collection: str) -> List[int]:
+        """コレクション内の全IDを取得"""
+    
+    @abstractmethod
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """コレクション内の全レコードを(key, record)で順に返す"""
+    
+    @abstractmethod
+    def read(self, key: str) -> Optional[Dict[str, Any]]:
+        """レコードを読み込む（存在しない・壊れている場合はNone）"""
+    
+    @abstractmethod
+    def write(self, key: str, record: Dict[str, Any]) -> None:
+        """レコードを書き込む（既存なら上書き）"""
+    
+    @abstractmethod
+    def remove(self, key: str) -> bool:
+        """レコードを削除"""
+    
+    def close(self) -> None:
+        """保留中の処理を完了して閉じる"""
+        pass
+
+class FileStorage(StorageBackend):
+    """1レコード1ファイルの従来レイアウト（data/posts/public/*.json など）"""
+    
+    name = "file"
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(base_dir)
+        self.public_posts_dir = os.path.join(base_dir, "posts", "public")
+        self.private_posts_dir = os.path.join(base_dir, "posts", "private")
+        self.replies_dir = os.path.join(base_dir, "replies")
+        self.likes_dir = os.path.join(base_dir, "likes")
+        
+        for directory in [self.public_posts_dir, self.private_posts_dir, self.replies_dir, self.likes_dir]:
+            os.makedirs(directory, exist_ok=True)
+    
+    def _directories(self, collection: str) -> List[Tuple[str, str]]:
+        """コレクションのディレクトリとファイル名プレフィックスを取得"""
+        if collection == "posts":
+            return [(self.public_posts_dir, "public_post_"), (self.private_posts_dir, "private_post_")]
+        if collection == "replies":
+            return [(self.replies_dir, "reply_")]
+        if collection == "likes":
+            return [(self.likes_dir, "like_")]
+        raise ValueError(f"未知のコレクションです: {collection}")
+    
+    @staticmethod
+    def _parse_id(filename: str, prefix: str) -> Optional[int]:
+        """ファイル名からIDを抽出（投稿は旧形式の {id}.json にも対応）"""
+        if not filename.endswith('.json'):
+            return None
+        
+        name = filename[:-len('.json')]
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+        elif prefix not in ("public_post_", "private_post_"):
+            return None
+        
+        try:
+            return int(name)
+        except ValueError:
+            return None
+    
+    def key_for(self, collection: str, record: Dict[str, Any]) -> str:
+        record_id = int(record['id'])
+        if collection == "posts":
+            if record.get('is_private'):
+                return os.path.join(self.private_posts_dir, f"private_post_{record_id}.json")
+            return os.path.join(self.public_posts_dir, f"public_post_{record_id}.json")
+        
+        directory, prefix = self._directories(collection)[0]
+        return os.path.join(directory, f"{prefix}{record_id}.json")
+    
+    def _list(self, collection: str) -> Iterator[Tuple[int, str]]:
+        """(ID, ファイルパス)を列挙（新形式のファイル名を旧形式より先に返す）"""
+        for directory, prefix in self._directories(collection):
+            if not os.path.exists(directory):
+                continue
+            
+            filenames = sorted(os.listdir(directory), key=lambda f: (not f.startswith(prefix), f))
+            for filename in filenames:
+                record_id = self._parse_id(filename, prefix)
+                if record_id is not None:
+                    yield record_id, os.path.join(directory, filename)
+    
+    def ids(self, collection: str) -> List[int]:
+        return [record_id for record_id, _ in self._list(collection)]
+    
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        seen = set()
+        for record_id, filepath in self._list(collection):
+            if record_id in seen:
+                continue
+            
+            record = self.read(filepath)
+            if record is None:
+                logger.warning(f"⚠️ 読み込めないレコードをスキップ: {filepath}")
+                continue
+            
+            seen.add(record_id)
+            yield filepath, record
+    
+    def read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(key, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+    
+    def write(self, key: str, record: Dict[str, Any]) -> None:
+        # 並行して読み込むスレッドが書きかけのファイルを見ないよう一時ファイルから置き換える
+        tmp_path = f"{key}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, key)
+    
+    def remove(self, key: str) -> bool:
+        try:
+            os.remove(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+class JsonlStorage(StorageBackend):
+    """コレクションごとの追記専用JSONLログ（data/store/*.jsonl）
+
+    起動時にログを一度だけ順に読み込んでメモリ上に再構成し、
+    以降の書き込みは1行追記のみ。無効になった行が増えたら圧縮する。
+    """
+    
+    name = "jsonl"
+    
+    # 無効行がこの数を超え、かつ有効レコード数を上回ったら圧縮
+    COMPACT_MIN_DEAD = 500
+    
+    def __init__(self, base_dir: str = "data"):
+        super().__init__(base_dir)
+        self.store_dir = os.path.join(base_dir, "store")
+        os.makedirs(self.store_dir, exist_ok=True)
+        
+        self._records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dead: Dict[str, int] = {}
+        # スレッドプールから並行して呼ばれるため、メモリ上の状態とログ追記を保護する
+        self._lock = threading.RLock()
+    
+    def _log_path(self, collection: str) -> str:
+        return os.path.join(self.store_dir, f"{collection}.jsonl")
+    
+    @staticmethod
+    def _collection_of(key: str) -> str:
+        return key.split('/', 1)[0]
+    
+    def _ensure_loaded(self, collection: str) -> Dict[str, Dict[str, Any]]:
+        """ログを先頭から再生してコレクションを復元"""
+        with self._lock:
+            if collection in self._records:
+                return self._records[collection]
+            
+            if collection not in COLLECTIONS:
+                raise ValueError(f"未知のコレクションです: {collection}")
+            
+            records: Dict[str, Dict[str, Any]] = {}
+            dead = 0
+            log_path = self._log_path(collection)
+            
+            if os.path.exists(log_path):
+                self._repair_tail(log_path)
+                with open(log_path, 'r', encoding='utf-8') as f:
+                    for line_no, line in enumerate(f, start=1):
+                        if not line.strip():
+                            continue
+                        try:
+                            op = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 書き込み途中で停止した末尾行などは無視
+                            logger.warning(f"⚠️ 壊れたログ行をスキップ: {log_path}:{line_no}")
+                            dead += 1
+                            continue
+                        
+                        key = op.get('key')
+                        if op.get('op') == 'put':
+                            if key in records:
+                                dead += 1
+                            records[key] = op.get('record') or {}
+                        elif op.get('op') == 'del':
+                            if records.pop(key, None) is not None:
+                                dead += 1
+                            dead += 1
+            
+            self._records[collection] = records
+            self._dead[collection] = dead
+            logger.info(f"JSONLストレージを読み込みました: {collection} {len(records)}件")
+            return records
+    
+    @staticmethod
+    def _repair_tail(log_path: str) -> None:
+        """追記の途中で停止して改行で終わっていない末尾行を修復
+
+        そのままだと次の追記がその行に連結され、追記したレコードも読めなくなる。
+        末尾行が完全なJSONなら改行を補い、壊れていれば直前の改行まで切り詰める。
+        """
+        with open(log_path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            
+            # 末尾から最後の改行を探す
+            tail_start = 0
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    tail_start = start + newline + 1
+                    break
+                end = start
+            
+            f.seek(tail_start)
+            try:
+                json.loads(f.read())
+            except ValueError:
+                f.truncate(tail_start)
+                logger.warning(f"⚠️ 途中で途切れた末尾行を切り詰めました: {log_path} ({size - tail_start}バイト)")
+                return
+            
+            f.seek(0, os.SEEK_END)
+            f.write(b"\n")
+            logger.warning(f"⚠️ 改行のない末尾行に改行を補いました: {log_path}")
+    
+    def _append(self, collection: str, op: Dict[str, Any]) -> None:
+        with open(self._log_path(collection), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+    
+    def key_for(self, collection: str, record: Dict[str, Any]) -> str:
+        return f"{collection}/{int(record['id'])}"
+    
+    def ids(self, collection: str) -> List[int]:
+        with self._lock:
+            return [int(key.split('/', 1)[1]) for key in self._ensure_loaded(collection)]
+    
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        # 走査中の書き込みに影響されないようスナップショットを取る
+        with self._lock:
+            records = self._ensure_loaded(collection)
+            snapshot = [(key, dict(records[key])) for key in sorted(records, key=lambda k: int(k.split('/', 1)[1]))]
+        yield from snapshot
+    
+    def read(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._ensure_loaded(self._collection_of(key)).get(key)
+            # 呼び出し側での変更がメモリ上の状態に波及しないようコピーを返す
+            return dict(record) if record is not None else None
+    
+    def write(self, key: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            collection = self._collection_of(key)
+            records = self._ensure_loaded(collection)
+            
+            self._append(collection, {"op": "put", "key": key, "record": record})
+            if key in records:
+                self._dead[collection] += 1
+            records[key] = dict(record)
+            
+            self._maybe_compact(collection)
+    
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            collection = self._collection_of(key)
+            records = self._ensure_loaded(collection)
+            
+            if key not in records:
+                return False
+            
+            self._append(collection, {"op": "del", "key": key})
+            del records[key]
+            self._dead[collection] += 2
+            
+            self._maybe_compact(collection)
+            return True
+    
+    def _maybe_compact(self, collection: str) -> None:
+        dead = self._dead.get(collection, 0)
+        if dead >= self.COMPACT_MIN_DEAD and dead > len(self._records[collection]):
+            self.compact(collection)
+    
+    def compact(self, collection: str) -> None:
+        """有効なレコードだけでログを書き直す"""
+        with self._lock:
+            records = self._ensure_loaded(collection)
+            log_path = self._log_path(collection)
+            tmp_path = log_path + ".tmp"
+            
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for key, record in self.load(collection):
+                    f.write(json.dumps({"op": "put", "key": key, "record": record}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            
+            os.replace(tmp_path, log_path)
+            logger.info(f"JSONLストレージを圧縮しました: {collection} 無効行={self._dead[collection]} 有効={len(records)}")
+            self._dead[collection] = 0
+    
+    def close(self) -> None:
+        with self._lock:
+            for collection in list(self._records):
+                if self._dead.get(collection):
+                    self.compact(collection)
+
+BACKENDS = {
+    FileStorage.name: FileStorage,
+    JsonlStorage.name: JsonlStorage,
+}
+
+def create_storage(base_dir: str = "data", backend: str = None) -> StorageBackend:
+    """ストレージを取得（STORAGE_BACKEND環境変数で file / jsonl を切り替え）"""
+    backend = backend or os.getenv('STORAGE_BACKEND', FileStorage.name)
+    if backend not in BACKENDS:
+        raise ValueError(f"未知のストレージバックエンドです: {backend}")
+    
+    key = (os.path.abspath(base_dir), backend)
+    storage = _shared_storages.get(key)
+    if storage is None:
+        storage = BACKENDS[backend](base_dir)
+        _shared_storages[key] = storage
+    
+    return storage
+
+def migrate_to_jsonl(base_dir: str = "data", overwrite: bool = False) -> Dict[str, int]:
+    """従来のファイルレイアウトからJSONLストレージへ一括移行（元ファイルは残す）"""
+    source = FileStorage(base_dir)
+    target = JsonlStorage(base_dir)
+    counts = {}
+    
+    for collection in COLLECTIONS:
+        log_path = target._log_path(collection)
+        if os.path.exists(log_path) and not overwrite:
+            raise FileExistsError(f"移行先が既に存在します: {log_path}")
+        
+        # IDのないレコードは保存位置を決められないため移行しない
+        records = []
+        for source_key, record in source.load(collection):
+            try:
+                records.append((int(record['id']), record))
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"⚠️ IDのないレコードをスキップ: {source_key}")
+        
+        tmp_path = log_path + ".tmp"
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for _, record in sorted(records, key=lambda item: item[0]):
+                key = target.key_for(collection, record)
+                f.write(json.dumps({"op": "put", "key": key, "record": record}, ensure_ascii=False) + "\n")
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        
+        os.replace(tmp_path, log_path)
+        counts[collection] = count
+        logger.info(f"✅ {collection} を移行しました: {count}件 -> {log_path}")
+    
+    return counts
+
+if __name__ == "__main__":
+    # 使い方: python -m managers.storage migrate [data_dir]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("使い方: python -m managers.storage migrate [data_dir]")
+        sys.exit(1)
+    
+    migrated = migrate_to_jsonl(sys.argv[2] if len(sys.argv) > 2 else "data")
+    print(f"移行完了: {migrated}")
@@ -0,0 +1,117 @@
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 作成日時を解析できないレコードは最も古い扱いにする
+_MISSING_TS = float('-inf')
+
+class TimeOrderedIndex:
+    """レコードIDを作成日時順に保持する二次インデックス
+
+    並び順のリストは更新時に作り直して差し替えるため、読み取り側はロックなしで
+    その時点のスナップショットを新しい順に途中まで走査できる。
+    """
+    
+    def __init__(self):
+        self._keys: Dict[int, Tuple[float, int]] = {}
+        self._order: List[Tuple[float, int]] = []
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def sort_key(record_id: int, created_ts: Optional[float]) -> Tuple[float, int]:
+        """並び替えキー（作成日時が同じならIDの大きい方を新しいとみなす）
+
+        ページングのカーソルはこのキーを「最後に表示した位置」として保持する。
+        """
+        return (_MISSING_TS if created_ts is None else created_ts, record_id)
+    
+    def rebuild(self, items: Iterable[Tuple[int, Optional[float]]]) -> None:
+        """(ID, 作成日時)の組からまとめて構築"""
+        keys = {record_id: self.sort_key(record_id, created_ts) for record_id, created_ts in items}
+        with self._lock:
+            self._keys = keys
+            self._order = sorted(keys.values())
+    
+    def add(self, record_id: int, created_ts: Optional[float]) -> None:
+        """レコードを追加（既存なら位置を更新）"""
+        key = self.sort_key(record_id, created_ts)
+        with self._lock:
+            order = list(self._order)
+            old_key = self._keys.get(record_id)
+            if old_key is not None:
+                del order[bisect_left(order, old_key)]
+            insort(order, key)
+            self._keys[record_id] = key
+            self._order = order
+    
+    def remove(self, record_id: int) -> None:
+        """レコードを削除"""
+        with self._lock:
+            old_key = self._keys.pop(record_id, None)
+            if old_key is None:
+                return
+            order = list(self._order)
+            del order[bisect_left(order, old_key)]
+            self._order = order
+    
+    def iter_newest(self, record_ids: Iterable[int] = None,
+                    older_than: Tuple[float, int] = None) -> Iterator[int]:
+        """IDを新しい順に返すイテレータ（older_thanを指定するとそのキーより古いものだけ）
+
+        全件の場合は並び順のスナップショットを末尾から辿るだけなので、
+        先頭K件で打ち切れば並び替えは発生しない。
+        record_idsで対象を絞った場合はヒープで新しい順に取り出す（M件からK件でO(M + K log M)）。
+        """
+        if record_ids is None:
+            order = self._order
+            end = len(order) if older_than is None else bisect_left(order, older_than)
+            for i in range(end - 1, -1, -1):
+                yield order[i][1]
+            return
+        
+        with self._lock:
+            heap = [
+                (-key[0], -key[1]) for key in map(self._keys.get, record_ids)
+                if key is not None and (older_than is None or key < older_than)
+            ]
+        heapq.heapify(heap)
+        
+        while heap:
+            _, neg_id = heapq.heappop(heap)
+            yield -neg_id
+    
+    def iter_oldest(self, record_ids: Iterable[int] = None,
+                    newer_than: Tuple[float, int] = None) -> Iterator[int]:
+        """IDを古い順に返すイテレータ（newer_thanを指定するとそのキーより新しいものだけ）
+
+        ページングで前のページへ戻るときに、カーソル位置に近い順に取り出すために使う。
+        """
+        if record_ids is None:
+            order = self._order
+            start = 0 if newer_than is None else bisect_right(order, newer_than)
+            for i in range(start, len(order)):
+                yield order[i][1]
+            return
+        
+        with self._lock:
+            heap = [
+                key for key in map(self._keys.get, record_ids)
+                if key is not None and (newer_than is None or key > newer_than)
+            ]
+        heapq.heapify(heap)
+        
+        while heap:
+            yield heapq.heappop(heap)[1]
+    
+    def newest(self, k: int, record_ids: Iterable[int] = None) -> List[int]:
+        """新しい順に最大k件のIDを取得"""
+        if record_ids is None:
+            return [record_id for _, record_id in reversed(self._order[-k:])] if k > 0 else []
+        
+        with self._lock:
+            keys = [key for key in map(self._keys.get, record_ids) if key is not None]
+        return [record_id for _, record_id in heapq.nlargest(k, keys)]
+    
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,7 @@
+"""
+テスト共通の設定
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+"""
+いいねインデックスの保存・削除・再構築での整合性のテスト
+"""
+import pytest
+
+from managers.like_manager import LikeManager
+
+def _snapshot(manager: LikeManager, post_ids, user_ids):
+    """インデックスから引ける内容（投稿ごと・ユーザーごと・最大いいね数）"""
+    index = manager.index
+    return {
+        "posts": {post_id: (index.users_for_post(post_id), index.like_ids_for_post(post_id)) for post_id in post_ids},
+        "users": {user_id: index.like_ids_for_user(user_id) for user_id in user_ids},
+        "max": manager.get_max_like_count(),
+        "size": len(index),
+    }
+
+@pytest.fixture
+def like_manager(tmp_path):
+    return LikeManager(str(tmp_path))
+
+def test_string_and_int_post_ids_resolve_to_same_like(like_manager):
+    """文字列の投稿IDで保存したいいねを数値の投稿IDで引ける（再構築後も同じ）"""
+    like_id = like_manager.save_like("1", "100", "名無し")
+    
+    assert like_manager.get_like_by_user_and_post(1, "100")["id"] == like_id
+    assert like_manager.has_liked("1", "100")
+    assert like_manager.get_like_count(1) == 1
+    
+    like_manager.index.build()
+    assert like_manager.has_liked(1, "100")
+    assert like_manager.has_liked("1", "100")
+    
+    assert like_manager.delete_like(1, "100")
+    assert not like_manager.has_liked("1", "100")
+    assert like_manager.get_like_count(1) == 0
+
+def test_index_matches_rebuild_after_saves_and_deletes(like_manager):
+    """保存・削除を重ねたインデックスがストレージから再構築したものと一致する"""
+    post_ids = [1, 2, 3]
+    user_ids = ["100", "200", "300"]
+    for post_id in post_ids:
+        for user_id in user_ids[:post_id]:
+            like_manager.save_like(post_id, user_id, "名無し")
+    like_manager.delete_like(3, "200")
+    like_manager.delete_like(1, "100")
+    like_manager.save_like(1, "300", "名無し")
+    
+    incremental = _snapshot(like_manager, post_ids, user_ids)
+    like_manager.index.build()
+    rebuilt = _snapshot(like_manager, post_ids, user_ids)
+    
+    assert incremental == rebuilt
+    assert incremental["posts"][3][0] == {"100", "300"}
+    assert incremental["max"] == 2
+    assert incremental["size"] == 5
+
+def test_duplicate_pair_replaces_older_like(like_manager):
+    """同じ投稿とユーザーの組のいいねは新しいものに置き換わり、数は重複しない"""
+    index = like_manager.index
+    index.add(1, 5, "100")
+    index.add(2, "5", "100")
+    
+    assert index.find(5, "100") == 2
+    assert index.count_for_post(5) == 1
+    assert index.like_ids_for_user("100") == [2]
+    assert index.like_ids_for_post(5) == [2]
+    assert len(index) == 1
+    assert index.max_count() == 1
+
+def test_duplicate_pair_in_storage_keeps_one_like_on_rebuild(like_manager):
+    """ストレージに同じ組のいいねが残っていても再構築後の数は1件"""
+    for like_id in (1, 2):
+        record = {"id": like_id, "post_id": 7, "user_id": "100", "display_name": "名無し"}
+        like_manager.storage.write(like_manager._key(like_id), record)
+    
+    like_manager.index.build()
+    
+    assert like_manager.get_like_count(7) == 1
+    assert like_manager.index.find(7, "100") == 2
+
+def test_max_like_count_follows_saves_and_deletes(like_manager):
+    """最大いいね数がいいねの追加・削除に追従する"""
+    assert like_manager.get_max_like_count() == 0
+    
+    for user_id in ("100", "200", "300"):
+        like_manager.save_like(1, user_id, "名無し")
+    for user_id in ("100", "200"):
+        like_manager.save_like(2, user_id, "名無し")
+    assert like_manager.get_max_like_count() == 3
+    
+    like_manager.delete_like(1, "300")
+    like_manager.delete_like(1, "200")
+    assert like_manager.get_max_like_count() == 2
+    
+    for post_id, user_id in ((1, "100"), (2, "100"), (2, "200")):
+        like_manager.delete_like(post_id, user_id)
+    assert like_manager.get_max_like_count() == 0
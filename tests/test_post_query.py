@@ -0,0 +1,86 @@
+"""
+投稿の条件検索（query_posts・count_posts）の並び順・件数・ページングのテスト
+"""
+import pytest
+
+from managers.post_index import parse_timestamp
+from managers.post_manager import PostManager
+from managers.post_query import author_is, category_contains
+from managers.time_index import TimeOrderedIndex
+
+AUTHOR = "100"
+OTHER = "200"
+
+def _key(post):
+    return TimeOrderedIndex.sort_key(int(post['id']), parse_timestamp(post['created_at']))
+
+def _ids(posts):
+    return [post['id'] for post in posts]
+
+@pytest.fixture
+def post_manager(tmp_path):
+    manager = PostManager(str(tmp_path))
+    # 作成順にIDが振られるので、新しい順はIDの降順になる
+    for n in range(1, 31):
+        manager.save_post(
+            user_id=AUTHOR if n % 3 else OTHER,
+            content=f"猫の話 {n}" if n % 2 else f"犬の話 {n}",
+            category="日常" if n % 5 else "仕事",
+            is_private=(n % 10 == 0)
+        )
+    yield manager
+    manager.access_logger.close()
+
+def test_query_posts_returns_newest_first_with_limit(post_manager):
+    """新しい順に並び、limit件で打ち切る（非公開投稿は他人には見えない）"""
+    posts = post_manager.query_posts(limit=5)
+    
+    assert _ids(posts) == [29, 28, 27, 26, 25]
+    assert all(not post['is_private'] for post in post_manager.query_posts())
+
+def test_private_posts_are_visible_to_owner_only(post_manager):
+    """非公開投稿は投稿者本人の検索にだけ含まれる"""
+    owner_ids = _ids(post_manager.query_posts([author_is(AUTHOR)], user_id=AUTHOR))
+    other_ids = _ids(post_manager.query_posts([author_is(AUTHOR)], user_id=OTHER))
+    
+    assert 20 in owner_ids and 10 in owner_ids
+    assert 20 not in other_ids and 10 not in other_ids
+    assert owner_ids == sorted(owner_ids, reverse=True)
+
+@pytest.mark.parametrize("predicates, keyword, user_id", [
+    ((), None, None),
+    ([author_is(AUTHOR)], None, AUTHOR),
+    ([author_is(OTHER)], None, None),
+    ([category_contains("仕事")], "猫", None),
+    ((), "犬", AUTHOR),
+])
+def test_count_posts_matches_unlimited_query(post_manager, predicates, keyword, user_id):
+    """件数はインデックスだけで数えても、全件を取得した件数と一致する"""
+    posts = post_manager.query_posts(predicates, keyword=keyword, user_id=user_id)
+    
+    assert post_manager.count_posts(predicates, keyword=keyword, user_id=user_id) == len(posts)
+    assert _ids(posts) == sorted(_ids(posts), reverse=True)
+
+def test_older_than_pages_cover_full_result_once(post_manager):
+    """older_thanで続きを取得すると、全件の結果を重複・欠落なく順に辿れる"""
+    full = _ids(post_manager.query_posts([author_is(AUTHOR)], user_id=AUTHOR))
+    
+    paged = []
+    older_than = None
+    while True:
+        page = post_manager.query_posts([author_is(AUTHOR)], user_id=AUTHOR, limit=4, older_than=older_than)
+        if not page:
+            break
+        paged.extend(_ids(page))
+        older_than = _key(page[-1])
+    
+    assert paged == full
+
+def test_newer_than_returns_closest_posts_newest_first(post_manager):
+    """newer_thanはキーに近いlimit件を新しい順で返す（前のページ）"""
+    full = post_manager.query_posts()
+    pivot = full[10]
+    
+    page = post_manager.query_posts(limit=4, newer_than=_key(pivot))
+    
+    assert _ids(page) == _ids(full[6:10])
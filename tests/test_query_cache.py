@@ -0,0 +1,90 @@
+"""
+検索結果キャッシュの世代管理と、投稿・リプライの書き込みによる無効化のテスト
+"""
+import asyncio
+
+import pytest
+
+from cogs.thoughts.search_posts import search_posts, count_posts
+from cogs.thoughts.search_replies import search_replies
+from managers.async_managers import AsyncPostManager, AsyncReplyManager
+from managers.query_cache import QueryCache, make_query_key
+
+USER_ID = "100"
+
+@pytest.fixture
+def managers(tmp_path):
+    post_manager = AsyncPostManager(str(tmp_path))
+    reply_manager = AsyncReplyManager(str(tmp_path))
+    
+    async def populate():
+        for n in range(1, 4):
+            post_id = await post_manager.save_post(USER_ID, f"猫の投稿 {n}")
+            await reply_manager.save_reply(post_id, USER_ID, f"猫のリプライ {n}", "名無し")
+    
+    asyncio.run(populate())
+    yield post_manager, reply_manager
+    post_manager.sync.access_logger.close()
+
+def _search_all(post_manager, reply_manager):
+    """投稿検索・件数・リプライ検索をまとめて実行"""
+    async def run():
+        posts = await search_posts(keyword="猫", post_manager=post_manager)
+        total = await count_posts(keyword="猫", post_manager=post_manager)
+        replies = await search_replies(keyword="猫", reply_manager=reply_manager)
+        return [post['id'] for post in posts], total, [reply['id'] for reply in replies]
+    return asyncio.run(run())
+
+def test_put_from_stale_generation_is_dropped():
+    """検索中に無効化されたら、古い世代の結果は保存しない"""
+    cache = QueryCache()
+    key = make_query_key("search_posts", keyword="猫")
+    
+    hit, _, generation = cache.get(key)
+    assert not hit
+    cache.invalidate()
+    cache.put(key, [1], generation)
+    
+    assert cache.get(key)[0] is False
+    assert cache.generation == generation + 1
+
+def test_post_and_reply_managers_share_cache(managers):
+    """同じデータディレクトリの投稿・リプライは1つのキャッシュを共有する"""
+    post_manager, reply_manager = managers
+    assert post_manager.query_cache is reply_manager.query_cache
+
+def test_repeated_search_hits_cache(managers):
+    """書き込みがなければ2回目の検索はキャッシュから返す"""
+    post_manager, reply_manager = managers
+    cache = post_manager.query_cache
+    
+    first = _search_all(post_manager, reply_manager)
+    hits = cache.hits
+    
+    assert _search_all(post_manager, reply_manager) == first
+    assert cache.hits == hits + 3
+
+@pytest.mark.parametrize("write", [
+    lambda posts, replies: posts.save_post(USER_ID, "猫の新しい投稿"),
+    lambda posts, replies: posts.update_post(1, content="犬の投稿", user_id=USER_ID),
+    lambda posts, replies: posts.delete_post(2, USER_ID),
+    lambda posts, replies: replies.save_reply(1, USER_ID, "猫の新しいリプライ", "名無し"),
+    lambda posts, replies: replies.update_reply(1, 1, "犬のリプライ"),
+    lambda posts, replies: replies.delete_reply(2, USER_ID),
+], ids=["save_post", "update_post", "delete_post", "save_reply", "update_reply", "delete_reply"])
+def test_write_bumps_generation_and_invalidates_results(managers, write):
+    """投稿・リプライの書き込みで世代が進み、キャッシュ済みの検索結果を使わなくなる"""
+    post_manager, reply_manager = managers
+    cache = post_manager.query_cache
+    
+    before = _search_all(post_manager, reply_manager)
+    generation = cache.generation
+    
+    assert asyncio.run(write(post_manager, reply_manager))
+    assert cache.generation > generation
+    
+    hits = cache.hits
+    after = _search_all(post_manager, reply_manager)
+    
+    assert cache.hits == hits
+    assert after != before
@@ -0,0 +1,92 @@
+"""
+リプライインデックスの投稿ID・投稿者・リプライIDの索引と全件取得のテスト
+"""
+import pytest
+
+from managers.reply_manager import ReplyManager
+
+POST_IDS = [1, 2, 3]
+USER_IDS = ["100", "200"]
+
+def _snapshot(manager: ReplyManager):
+    """インデックスから引ける内容（投稿ごと・投稿者ごと・IDごと・日時順）"""
+    index = manager.index
+    return {
+        "posts": {post_id: index.ids_for_post(post_id) for post_id in POST_IDS},
+        "users": {user_id: index.ids_for_user(user_id) for user_id in USER_IDS},
+        "entries": {reply_id: (index.get(reply_id)['post_id'], index.get(reply_id)['user_id'])
+                    for reply_id in index.ids()},
+        "by_date": [reply_id for reply_id, _ in index.iter_by_date()],
+        "counts": {post_id: manager.get_reply_count(post_id) for post_id in POST_IDS},
+    }
+
+@pytest.fixture
+def reply_manager(tmp_path):
+    manager = ReplyManager(str(tmp_path))
+    # 投稿1〜3に2人のユーザーが交互にリプライする（リプライID 1〜6）
+    for n in range(6):
+        manager.save_reply(POST_IDS[n % 3], USER_IDS[n % 2], f"リプライ {n + 1}", "名無し")
+    return manager
+
+def test_indexes_after_save(reply_manager):
+    """保存したリプライを投稿・投稿者・IDのそれぞれから引ける"""
+    assert reply_manager.index.ids_for_post(1) == [1, 4]
+    assert reply_manager.index.ids_for_user("100") == [1, 3, 5]
+    assert reply_manager.index.get(5)['post_id'] == 2
+    assert reply_manager.get_reply_count() == 6
+    assert [reply['id'] for reply in reply_manager.get_replies(2)] == [2, 5]
+    assert [reply['id'] for reply in reply_manager.get_replies_by_user("200")] == [2, 4, 6]
+
+def test_update_keeps_indexes_and_rejects_other_post(reply_manager):
+    """更新しても索引は変わらず、別の投稿IDを指定した更新は失敗する"""
+    before = _snapshot(reply_manager)
+    
+    assert reply_manager.update_reply(1, 4, "更新後のリプライ")
+    assert not reply_manager.update_reply(2, 1, "別の投稿への更新")
+    
+    assert _snapshot(reply_manager) == before
+    assert reply_manager.get_reply_by_id_and_user(4, "200")['content'] == "更新後のリプライ"
+    assert reply_manager.get_reply_by_id_and_user(1, "100")['content'] == "リプライ 1"
+
+def test_delete_removes_from_every_index(reply_manager):
+    """削除したリプライは全ての索引から消え、空になった投稿・投稿者のキーも残らない"""
+    assert not reply_manager.delete_reply("3", "200")
+    assert reply_manager.delete_reply("3", "100")
+    assert reply_manager.delete_reply("6", "200")
+    
+    index = reply_manager.index
+    assert 3 not in index and 6 not in index
+    assert index.ids_for_post(3) == []
+    assert 3 not in index._by_post
+    assert index.ids_for_user("100") == [1, 5]
+    assert [reply_id for reply_id, _ in index.iter_by_date()] == [5, 4, 2, 1]
+    assert reply_manager.get_reply_by_id_and_user("3", "100") is None
+
+def test_index_matches_rebuild_after_writes(reply_manager):
+    """保存・更新・削除を重ねたインデックスがストレージから再構築したものと一致する"""
+    reply_manager.update_reply(2, 2, "更新後のリプライ")
+    reply_manager.delete_reply("1", "100")
+    reply_manager.save_reply(3, "200", "追加のリプライ", "名無し")
+    
+    incremental = _snapshot(reply_manager)
+    reply_manager.index.build()
+    
+    assert _snapshot(reply_manager) == incremental
+
+def test_get_reply_by_id_and_user_rejects_invalid_id(reply_manager):
+    """数値でないリプライIDや他人のリプライはNone"""
+    assert reply_manager.get_reply_by_id_and_user("abc", "100") is None
+    assert reply_manager.get_reply_by_id_and_user(None, "100") is None
+    assert reply_manager.get_reply_by_id_and_user("2", "100") is None
+    assert reply_manager.get_reply_by_id_and_user("2", "200")['id'] == 2
+
+def test_get_all_replies_in_id_order_skips_missing_records(reply_manager):
+    """全件取得はID順で、外部で消えたレコードは飛ばしてインデックスからも外す"""
+    assert [reply['id'] for reply in reply_manager.get_all_replies()] == [1, 2, 3, 4, 5, 6]
+    
+    reply_manager.storage.remove(reply_manager._key(4))
+    
+    assert [reply['id'] for reply in reply_manager.get_all_replies()] == [1, 2, 3, 5, 6]
+    assert 4 not in reply_manager.index
+    assert reply_manager.index.ids_for_post(1) == [1]
+    assert reply_manager.get_reply_count() == 5
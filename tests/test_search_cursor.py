@@ -0,0 +1,142 @@
+"""
+検索結果のサーバー側カーソルのページングのテスト
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cogs.thoughts.search_cursor import SearchCursor
+from cogs.thoughts.search_embed import ITEMS_PER_PAGE
+from cogs.thoughts.search_posts import search_posts
+from managers.async_managers import AsyncLikeManager, AsyncPostManager, AsyncReplyManager
+
+POST_COUNT = 10
+USER_ID = "100"
+
+def _ids(items):
+    return [item['id'] for item in items]
+
+def _chunks(ids):
+    return [ids[i:i + ITEMS_PER_PAGE] for i in range(0, len(ids), ITEMS_PER_PAGE)]
+
+@pytest.fixture
+def cog(tmp_path):
+    cog = SimpleNamespace(
+        post_manager=AsyncPostManager(str(tmp_path)),
+        like_manager=AsyncLikeManager(str(tmp_path)),
+        reply_manager=AsyncReplyManager(str(tmp_path))
+    )
+    
+    async def populate():
+        for n in range(1, POST_COUNT + 1):
+            # 関連度に差がつくよう、キーワードの出現回数と本文の長さを変える
+            content = "猫 " * (n % 4 + 1) + "今日は" + "とても" * (n % 3)
+            await cog.post_manager.save_post(USER_ID, content)
+    
+    asyncio.run(populate())
+    yield cog
+    cog.post_manager.sync.access_logger.close()
+
+def _walk_forward(cursor, cog):
+    """最初のページから続きがなくなるまで進んだ各ページ"""
+    async def walk():
+        pages = [_ids(await cursor.first_page(cog))]
+        while cursor.has_next:
+            pages.append(_ids(await cursor.next_page(cog)))
+        return pages
+    return asyncio.run(walk())
+
+def test_next_pages_walk_all_posts_newest_first(cog):
+    """次のページを辿ると全件を新しい順に重複・欠落なく返し、最後で止まる"""
+    cursor = SearchCursor("投稿", {"keyword": "猫"})
+    
+    pages = _walk_forward(cursor, cog)
+    
+    assert pages == _chunks(list(range(POST_COUNT, 0, -1)))
+    assert cursor.page == len(pages) == cursor.total_pages
+    assert asyncio.run(cursor.next_page(cog)) == []
+    assert not cursor.has_next
+
+def test_prev_pages_return_same_pages_backwards(cog):
+    """最後のページから前のページへ戻ると、進んだときと同じページを逆順に返す"""
+    cursor = SearchCursor("投稿", {"keyword": "猫"})
+    forward = _walk_forward(cursor, cog)
+    
+    async def walk_back():
+        pages = []
+        while cursor.page > 1:
+            pages.append(_ids(await cursor.prev_page(cog)))
+        return pages
+    
+    backward = asyncio.run(walk_back())
+    
+    assert backward == forward[-2::-1]
+    assert cursor.page == 1
+    assert cursor.has_next
+
+def test_prev_from_second_page_lands_on_first_page(cog):
+    """2ページ目から戻ると、前が1ページ分ちょうどでも1ページ目になる（1件多く取れない境界）"""
+    cursor = SearchCursor("投稿", {"keyword": "猫"})
+    
+    async def run():
+        first = _ids(await cursor.first_page(cog))
+        await cursor.next_page(cog)
+        return first, _ids(await cursor.prev_page(cog))
+    
+    first, back = asyncio.run(run())
+    
+    assert back == first
+    assert cursor.page == 1
+
+def test_ranked_pages_match_single_ranked_search(cog):
+    """関連度順はoffsetで進み・戻り、1回で取得した順位と一致する"""
+    params = {"keyword": "猫 とても", "ranked": True}
+    cursor = SearchCursor("投稿", params)
+    
+    async def full_ranking():
+        return _ids(await search_posts(**params, post_manager=cog.post_manager,
+                                       like_manager=cog.like_manager, limit=POST_COUNT))
+    
+    forward = _walk_forward(cursor, cog)
+    expected = asyncio.run(full_ranking())
+    
+    assert [post_id for page in forward for post_id in page] == expected
+    
+    async def back():
+        return _ids(await cursor.prev_page(cog))
+    
+    assert asyncio.run(back()) == forward[-2]
+    assert cursor.page == len(forward) - 1
+
+def test_write_between_pages_does_not_shift_next_page(cog):
+    """ページ送りの間に投稿・削除があっても、続きは表示中のページの末尾から取得する"""
+    cursor = SearchCursor("投稿", {"keyword": "猫"})
+    
+    async def run():
+        first = _ids(await cursor.first_page(cog))
+        # 先頭に新しい投稿が増え、次のページの投稿が1件削除される
+        await cog.post_manager.save_post(USER_ID, "猫 新しい投稿")
+        await cog.post_manager.delete_post(first[-1] - 1, USER_ID)
+        second = _ids(await cursor.next_page(cog))
+        back = _ids(await cursor.prev_page(cog))
+        return first, second, back
+    
+    first, second, back = asyncio.run(run())
+    
+    assert first == [10, 9, 8]
+    assert second == [6, 5, 4]
+    assert back == first
+
+def test_reply_cursor_pages_forward_and_back(cog):
+    """リプライ検索もカーソル位置の前後で進み・戻る"""
+    async def populate():
+        for n in range(1, 8):
+            await cog.reply_manager.save_reply(1, USER_ID, f"猫のリプライ {n}", "名無し")
+    asyncio.run(populate())
+    
+    cursor = SearchCursor("リプライ", {"keyword": "猫"})
+    forward = _walk_forward(cursor, cog)
+    
+    assert forward == _chunks(list(range(7, 0, -1)))
+    assert _ids(asyncio.run(cursor.prev_page(cog))) == forward[-2]
@@ -0,0 +1,39 @@
+"""
+検索インデックスの関連度順の取得のテスト
+"""
+import pytest
+
+from benchmarks.datagen import generate_dataset
+from managers.post_manager import PostManager
+
+PAGE_SIZE = 5
+PAGES = 12
+
+@pytest.fixture(scope="module")
+def post_manager(tmp_path_factory):
+    base_dir = str(tmp_path_factory.mktemp("search"))
+    generate_dataset(base_dir, posts=800, likes=0, replies=0, seed=0)
+    manager = PostManager(base_dir)
+    yield manager
+    manager.access_logger.close()
+
+@pytest.mark.parametrize("keyword", ["猫", "今日 映画", "コーヒー"])
+def test_rank_posts_pages_match_full_ranking(post_manager, keyword):
+    """同点の投稿があってもページ送りの結果が全件の順位と一致する（重複・欠落しない）"""
+    full = [post['id'] for post in post_manager.rank_posts(keyword, limit=PAGE_SIZE * PAGES)]
+    
+    paged = []
+    for page in range(PAGES):
+        posts = post_manager.rank_posts(keyword, limit=PAGE_SIZE, offset=page * PAGE_SIZE)
+        paged.extend(post['id'] for post in posts)
+    
+    assert paged == full
+    assert len(set(paged)) == len(paged)
+
+def test_top_k_matches_exhaustive_ranking(post_manager):
+    """打ち切り付きの上位k件が全件を採点した場合の先頭k件と一致する"""
+    index = post_manager.search_index
+    exhaustive = index.top_k("猫", len(index))
+    
+    for k in (1, 7, 20, 61):
+        assert index.top_k("猫", k) == exhaustive[:k]
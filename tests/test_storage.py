@@ -0,0 +1,126 @@
+"""
+JSONLストレージの再生・削除・圧縮・末尾行の修復・移行のテスト
+"""
+import json
+import os
+
+from managers.storage import FileStorage, JsonlStorage, migrate_to_jsonl
+
+def _record(record_id: int, content: str = "本文"):
+    return {"id": record_id, "content": content}
+
+def _put(storage: JsonlStorage, record_id: int, content: str = "本文") -> str:
+    key = storage.key_for("posts", _record(record_id))
+    storage.write(key, _record(record_id, content))
+    return key
+
+def _log_lines(storage: JsonlStorage):
+    with open(storage._log_path("posts"), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_replay_restores_latest_records(tmp_path):
+    """再起動後もログの再生で最後に書いた内容が復元される"""
+    storage = JsonlStorage(str(tmp_path))
+    _put(storage, 1, "最初")
+    _put(storage, 2)
+    _put(storage, 1, "更新後")
+    
+    reopened = JsonlStorage(str(tmp_path))
+    assert reopened.ids("posts") == [1, 2]
+    assert reopened.read("posts/1")["content"] == "更新後"
+    assert [key for key, _ in reopened.load("posts")] == ["posts/1", "posts/2"]
+
+def test_remove_survives_replay(tmp_path):
+    """削除したレコードは再起動後も復元されない"""
+    storage = JsonlStorage(str(tmp_path))
+    _put(storage, 1)
+    key = _put(storage, 2)
+    
+    assert storage.remove(key)
+    assert not storage.remove(key)
+    assert storage.read(key) is None
+    
+    reopened = JsonlStorage(str(tmp_path))
+    assert reopened.ids("posts") == [1]
+    assert reopened.read(key) is None
+
+def test_compact_keeps_only_live_records(tmp_path):
+    """圧縮後のログは有効なレコードだけになり、再生結果は変わらない"""
+    storage = JsonlStorage(str(tmp_path))
+    for record_id in range(1, 6):
+        _put(storage, record_id, "最初")
+    _put(storage, 3, "更新後")
+    storage.remove("posts/5")
+    
+    storage.compact("posts")
+    
+    lines = _log_lines(storage)
+    assert [line["key"] for line in lines] == ["posts/1", "posts/2", "posts/3", "posts/4"]
+    assert all(line["op"] == "put" for line in lines)
+    
+    reopened = JsonlStorage(str(tmp_path))
+    assert reopened.ids("posts") == [1, 2, 3, 4]
+    assert reopened.read("posts/3")["content"] == "更新後"
+
+def test_compacts_automatically_when_dead_lines_dominate(tmp_path):
+    """無効行が閾値と有効レコード数を超えたら書き込み時に圧縮される"""
+    storage = JsonlStorage(str(tmp_path))
+    storage.COMPACT_MIN_DEAD = 4
+    _put(storage, 1)
+    for _ in range(4):
+        _put(storage, 1, "更新")
+    
+    assert len(_log_lines(storage)) == 1
+    assert JsonlStorage(str(tmp_path)).read("posts/1")["content"] == "更新"
+
+def test_torn_last_line_does_not_swallow_next_write(tmp_path):
+    """追記途中で停止した末尾行の後に書いたレコードが再起動後も読める"""
+    storage = JsonlStorage(str(tmp_path))
+    _put(storage, 1)
+    with open(storage._log_path("posts"), 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "key": "posts/2", "rec')
+    
+    restarted = JsonlStorage(str(tmp_path))
+    assert restarted.ids("posts") == [1]
+    _put(restarted, 3)
+    
+    reopened = JsonlStorage(str(tmp_path))
+    assert reopened.ids("posts") == [1, 3]
+
+def test_complete_last_line_without_newline_is_kept(tmp_path):
+    """改行だけが書けなかった末尾行はレコードとして残す"""
+    storage = JsonlStorage(str(tmp_path))
+    _put(storage, 1)
+    with open(storage._log_path("posts"), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"op": "put", "key": "posts/2", "record": _record(2)}))
+    
+    restarted = JsonlStorage(str(tmp_path))
+    _put(restarted, 3)
+    
+    reopened = JsonlStorage(str(tmp_path))
+    assert reopened.ids("posts") == [1, 2, 3]
+
+def test_torn_only_line_truncates_to_empty(tmp_path):
+    """改行を1つも含まない壊れたログは空にしてから追記する"""
+    storage = JsonlStorage(str(tmp_path))
+    os.makedirs(storage.store_dir, exist_ok=True)
+    with open(storage._log_path("posts"), 'w', encoding='utf-8') as f:
+        f.write('{"op": "pu')
+    
+    _put(storage, 1)
+    assert JsonlStorage(str(tmp_path)).ids("posts") == [1]
+
+def test_migrate_skips_records_without_id(tmp_path):
+    """移行ではIDのないレコードを飛ばし、残りをID順に書き出す"""
+    source = FileStorage(str(tmp_path))
+    for record_id in (3, 1):
+        source.write(source.key_for("posts", _record(record_id)), _record(record_id))
+    # ファイル名にはIDがあるが、中身にIDがないレコード
+    source.write(source.key_for("posts", _record(2)), {"content": "IDなし"})
+    
+    counts = migrate_to_jsonl(str(tmp_path))
+    
+    assert counts["posts"] == 2
+    migrated = JsonlStorage(str(tmp_path))
+    assert migrated.ids("posts") == [1, 3]
+    assert [line["key"] for line in _log_lines(migrated)] == ["posts/1", "posts/3"]
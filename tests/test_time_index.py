@@ -0,0 +1,80 @@
+"""
+作成日時順の二次インデックスのテスト
+"""
+from managers.time_index import TimeOrderedIndex
+
+def _index(items):
+    index = TimeOrderedIndex()
+    index.rebuild(items)
+    return index
+
+def test_iter_newest_orders_by_time_then_id():
+    """新しい順に並び、同時刻はIDの大きい方が新しく、日時不明は最後"""
+    index = _index([(1, 100.0), (2, 300.0), (3, 200.0), (4, 200.0), (5, None)])
+    
+    assert list(index.iter_newest()) == [2, 4, 3, 1, 5]
+    assert list(index.iter_oldest()) == [5, 1, 3, 4, 2]
+
+def test_add_moves_existing_record_and_remove_drops_it():
+    """追加済みのIDを追加し直すと位置が変わり、削除すると走査から消える"""
+    index = _index([(1, 100.0), (2, 200.0), (3, 300.0)])
+    
+    index.add(1, 400.0)
+    index.add(4, 250.0)
+    assert list(index.iter_newest()) == [1, 3, 4, 2]
+    assert len(index) == 4
+    
+    index.remove(3)
+    index.remove(99)
+    assert list(index.iter_newest()) == [1, 4, 2]
+    assert len(index) == 3
+
+def test_subset_heap_merge_matches_full_order():
+    """IDを絞った場合（ヒープ）も全件の並びから絞ったものと同じ順になる"""
+    items = [(record_id, float(record_id % 7)) for record_id in range(1, 60)]
+    index = _index(items)
+    subset = {3, 10, 17, 24, 5, 12, 58, 1000}
+    
+    expected = [record_id for record_id in index.iter_newest() if record_id in subset]
+    assert list(index.iter_newest(subset)) == expected
+    assert list(index.iter_oldest(subset)) == expected[::-1]
+    assert index.newest(3, subset) == expected[:3]
+
+def test_older_than_and_newer_than_bounds_are_exclusive():
+    """older_than・newer_thanに渡したキーの投稿自体は含まない（全件・絞り込みの両方）"""
+    index = _index([(record_id, 100.0 * record_id) for record_id in range(1, 8)])
+    cursor = TimeOrderedIndex.sort_key(4, 400.0)
+    subset = [1, 2, 4, 6, 7]
+    
+    assert list(index.iter_newest(older_than=cursor)) == [3, 2, 1]
+    assert list(index.iter_newest(subset, older_than=cursor)) == [2, 1]
+    assert list(index.iter_oldest(newer_than=cursor)) == [5, 6, 7]
+    assert list(index.iter_oldest(subset, newer_than=cursor)) == [6, 7]
+
+def test_same_timestamp_cursor_splits_by_id():
+    """同時刻の投稿が並んでもIDでページの境界が決まり、重複・欠落しない"""
+    index = _index([(record_id, 100.0) for record_id in range(1, 6)])
+    cursor = TimeOrderedIndex.sort_key(3, 100.0)
+    
+    assert list(index.iter_newest(older_than=cursor)) == [2, 1]
+    assert list(index.iter_oldest(newer_than=cursor)) == [4, 5]
+
+def test_newest_limits():
+    """newestは最大k件、k=0なら空"""
+    index = _index([(1, 1.0), (2, 2.0), (3, 3.0)])
+    
+    assert index.newest(2) == [3, 2]
+    assert index.newest(10) == [3, 2, 1]
+    assert index.newest(0) == []
+
+def test_iteration_uses_snapshot_during_updates():
+    """走査中に追加・削除されても走査開始時点の並びを最後まで返す"""
+    index = _index([(1, 1.0), (2, 2.0), (3, 3.0)])
+    
+    iterator = index.iter_newest()
+    first = next(iterator)
+    index.add(4, 4.0)
+    index.remove(2)
+    
+    assert [first, *iterator] == [3, 2, 1]
+    assert list(index.iter_newest()) == [4, 3, 1]
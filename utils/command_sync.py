@@ -0,0 +1,84 @@
+"""
+スラッシュコマンドの同期（コマンド定義が変わったときだけ同期する）
+
+コマンドツリーを同期用の辞書に変換してハッシュ（フィンガープリント）を取り、
+前回同期したときの値と同じなら同期のAPIを呼ばない。フィンガープリントは
+アプリケーションと範囲（グローバル・サーバー）ごとにファイルへ保存し、
+Actionsの新しいランナーでも省略できるようGitHubへ同期する。
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+from utils.github_sync import get_sync_queue
+
+logger = logging.getLogger(__name__)
+
+# 前回同期したフィンガープリントの保存先
+COMMAND_SYNC_FILE = os.path.join("data", ".command_sync.json")
+
+def _scope_key(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake]) -> str:
+    """保存用のキー（アプリケーションIDと同期範囲）"""
+    scope = f"guild:{guild.id}" if guild is not None else "global"
+    return f"{tree.client.application_id}:{scope}"
+
+def command_fingerprint(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """同期範囲のコマンド定義からフィンガープリントを計算"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda data: (data.get('type', 1), data['name'])
+    )
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+def _load_fingerprints(path: str) -> Dict[str, str]:
+    """保存済みのフィンガープリントを読み込む（読めなければ空）"""
+    if not os.path.exists(path):
+        return {}
+    
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"⚠️ コマンド同期の記録を読み込めません。次回は同期します: {e}")
+        return {}
+
+def _save_fingerprint(path: str, key: str, fingerprint: str) -> None:
+    """フィンガープリントを一時ファイル経由でアトミックに保存"""
+    fingerprints = _load_fingerprints(path)
+    fingerprints[key] = fingerprint
+    
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+async def sync_commands(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None,
+                        force: bool = False, path: str = COMMAND_SYNC_FILE) -> Optional[List[app_commands.AppCommand]]:
+    """コマンド定義が前回の同期から変わっていれば同期する
+
+    同期した場合は同期したコマンドの一覧を、変更がなく省略した場合はNoneを返す。
+    forceを指定すると変更の有無にかかわらず同期する。
+    """
+    key = _scope_key(tree, guild)
+    fingerprint = command_fingerprint(tree, guild)
+    
+    if not force and _load_fingerprints(path).get(key) == fingerprint:
+        logger.info(f"スラッシュコマンドに変更がないため同期を省略しました: {key}")
+        return None
+    
+    synced = await tree.sync(guild=guild)
+    _save_fingerprint(path, key, fingerprint)
+    logger.info(f"スラッシュコマンドを同期しました: {key} {len(synced)}個 (fingerprint={fingerprint[:12]})")
+    
+    # 次に起動するランナーが同期を省略できるよう、記録をGitHubへ反映する
+    if path == COMMAND_SYNC_FILE:
+        get_sync_queue().enqueue("command sync")
+    return synced
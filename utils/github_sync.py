@@ -1,127 +1,310 @@
 """
 GitHub同期機能の共通モジュール
+
+データ変更はキューに積むだけで即座に戻り、バックグラウンドのワーカーが同期する。
+同期中でなければすぐにプッシュし、同期中に積まれた変更は次の1回のコミット・プッシュに
+まとめる。プロセスはシグナルで停止されるため、未同期の変更を溜め込まないようにしている。
 """
-import subprocess
+import asyncio
+import inspect
 import os
 import logging
+import time
+from collections import Counter
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import GIT_SECONDS, GIT_SYNC_CHANGES, GIT_SYNC_SECONDS
 
 logger = logging.getLogger(__name__)
 
-async def sync_to_github(action_description: str, user_name: str = None, post_id: int = None):
-    """
-    ファイルベースのデータ変更をGitHubに同期する
+# 最後の変更からこの秒数だけ新しい変更がなければ同期する（0なら待たずに同期）
+GITHUB_SYNC_DEBOUNCE = float(os.getenv('GITHUB_SYNC_DEBOUNCE', '0'))
+# 変更が続いても最初の変更からこの秒数経過したら同期する
+GITHUB_SYNC_MAX_WAIT = float(os.getenv('GITHUB_SYNC_MAX_WAIT', '5'))
+
+# 同期対象のパス（リポジトリルートからの相対パス）
+SYNC_PATHS = [
+    'data/posts/public/',
+    'data/posts/private/',
+    'data/replies/',
+    'data/likes/',
+    'data/store/',
+    'data/actions/',
+    'data/message_refs/',
+    'data/logs/access/',
+    'data/.encryption_key',
+    'data/.last_sync',
+    'data/.id_counters.json',
+    'data/.private_threads.json',
+    'data/.command_sync.json',
+    'data/.gitkeep',
+]
+
+MAX_RETRIES = 3
+RETRY_DELAY_SECONDS = 2
+
+# 同期結果を受け取るコールバック（結果メッセージ, まとめた変更の一覧）
+ResultCallback = Callable[[str, List[Dict[str, Any]]], Any]
+
+class GitHubSyncQueue:
+    """データ変更をまとめてGitHubへ同期するバックグラウンドキュー"""
     
-    Args:
-        action_description: アクションの説明 (例: "edit", "delete", "like")
-        user_name: 実行ユーザー名 (オプション)
-        post_id: 投稿ID (オプション)
+    def __init__(self, repo_dir: str = None, debounce: float = GITHUB_SYNC_DEBOUNCE,
+                 max_wait: float = GITHUB_SYNC_MAX_WAIT):
+        self.repo_dir = repo_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.data_dir = os.path.join(self.repo_dir, 'data')
+        self.debounce = debounce
+        self.max_wait = max_wait
+        
+        self._pending: List[Dict[str, Any]] = []
+        self._first_enqueued_at: Optional[float] = None
+        self._last_enqueued_at: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self._callbacks: List[ResultCallback] = []
     
-    Returns:
-        str: GitHub同期の結果メッセージ
-    """
-    try:
-        # dataディレクトリのパスを取得
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    def add_result_callback(self, callback: ResultCallback) -> None:
+        """同期結果の通知先を追加（同期関数・コルーチン関数のどちらでも可）"""
+        self._callbacks.append(callback)
+    
+    @property
+    def pending_count(self) -> int:
+        """未同期の変更数"""
+        return len(self._pending)
+    
+    def enqueue(self, action_description: str, user_name: str = None, post_id: int = None) -> None:
+        """変更をキューに追加（実行中のイベントループが必要）"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        
+        self._pending.append({
+            "action": action_description,
+            "user_name": user_name,
+            "post_id": post_id,
+            "at": datetime.now()
+        })
+        if self._first_enqueued_at is None:
+            self._first_enqueued_at = now
+        self._last_enqueued_at = now
+        
+        self._ensure_worker()
+        self._wakeup.set()
+    
+    def _ensure_worker(self) -> None:
+        """ワーカータスクを起動（停止していれば再起動）"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._sync_lock = asyncio.Lock()
         
-        # 強制的に変更を検知させるための処理
-        # タイムスタンプファイルを作成
-        timestamp_file = os.path.join(data_dir, '.last_sync')
-        with open(timestamp_file, 'w') as f:
-            f.write(datetime.now().isoformat())
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="github-sync-worker")
+    
+    async def _run(self) -> None:
+        """変更を待ち、落ち着いたらまとめて同期する"""
+        loop = asyncio.get_running_loop()
         
-        # ファイルのタイムスタンプを更新
-        if os.path.exists(data_dir):
-            os.utime(data_dir)
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            
+            # デバウンス：新しい変更が来なくなるか、最大待ち時間に達するまで待つ
+            while self._pending:
+                now = loop.time()
+                quiet_until = self._last_enqueued_at + self.debounce
+                deadline = self._first_enqueued_at + self.max_wait
+                wake_at = min(quiet_until, deadline)
+                
+                if now >= wake_at:
+                    break
+                
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wake_at - now)
+                    self._wakeup.clear()
+                except asyncio.TimeoutError:
+                    pass
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"GitHub同期ワーカーでエラー: {e}", exc_info=True)
+    
+    async def flush(self) -> Optional[str]:
+        """未同期の変更を今すぐ同期（変更がなければNone）"""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
         
-        # コミットメッセージを作成
-        if post_id and user_name:
-            commit_message = f"🔄 {action_description.capitalize()} post #{post_id} by {user_name} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        elif user_name:
-            commit_message = f"🔄 {action_description.capitalize()} by {user_name} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        else:
-            commit_message = f"🔄 {action_description.capitalize()} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        async with self._sync_lock:
+            if not self._pending:
+                return None
+            
+            changes = self._pending
+            self._pending = []
+            self._first_enqueued_at = None
+            self._last_enqueued_at = None
+            
+            started = time.perf_counter()
+            result = await self._sync(changes)
+            GIT_SYNC_SECONDS.observe(time.perf_counter() - started, self._result_label(result))
+            GIT_SYNC_CHANGES.inc(len(changes))
         
-        # 全データディレクトリを網羅的に追加
-        subprocess.run(['git', 'add', 'data/posts/public/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/posts/private/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/replies/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/likes/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/actions/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/message_refs/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/logs/access/'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/.encryption_key'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/.last_sync'], 
-                     capture_output=True, text=True, check=False)
-        subprocess.run(['git', 'add', 'data/.gitkeep'], 
-                     capture_output=True, text=True, check=False)
+        await self._notify(result, changes)
+        return result
+    
+    async def close(self) -> None:
+        """未同期の変更を同期してワーカーを停止"""
+        await self.flush()
         
-        # 必ずコミット（変更チェックなし）
-        max_retries = 3  # 3回に減らして整理
-        for attempt in range(max_retries):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
             try:
-                # git commit
-                subprocess.run(['git', 'commit', '-m', commit_message], 
-                             capture_output=True, text=True, check=True)
-                
-                # git push（リトライ付き）
-                for push_attempt in range(max_retries):
-                    try:
-                        subprocess.run(['git', 'push', 'origin', 'main'], 
-                                     capture_output=True, text=True, check=True)
-                        
-                        success_msg = f"✅ GitHubに保存しました: {action_description}"
-                        logger.info(success_msg)
-                        return success_msg
-                        
-                    except subprocess.CalledProcessError as push_error:
-                        if push_attempt < max_retries - 1:
-                            logger.warning(f"Git push失敗、リトライします (試行 {push_attempt + 1}/{max_retries}): {push_error.stderr.strip()}")
-                            # リモートの変更を取得してリベース
-                            subprocess.run(['git', 'pull', '--rebase', 'origin', 'main'], 
-                                         capture_output=True, text=True, check=False)
-                            import time
-                            time.sleep(2)
-                        else:
-                            # 最終手段：クリーンな強制プッシュ
-                            logger.error("最終手段：クリーンな強制プッシュを実行します")
-                            subprocess.run(['git', 'push', 'origin', 'main', '--force'], 
-                                         capture_output=True, text=True, check=False)
-                            success_msg = f"🔄 強制プッシュでGitHubに保存しました: {action_description}"
-                            logger.info(success_msg)
-                            return success_msg
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+    
+    async def _notify(self, result: str, changes: List[Dict[str, Any]]) -> None:
+        """同期結果をコールバックへ通知"""
+        for callback in self._callbacks:
+            try:
+                ret = callback(result, changes)
+                if inspect.isawaitable(ret):
+                    await ret
+            except Exception as e:
+                logger.error(f"GitHub同期結果の通知に失敗しました: {e}")
+    
+    async def _git(self, *args: str) -> Tuple[int, str]:
+        """gitコマンドを非同期で実行して(終了コード, 標準エラー)を返す"""
+        started = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=self.repo_dir,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+        GIT_SECONDS.observe(time.perf_counter() - started, args[0], "ok" if proc.returncode == 0 else "error")
+        return proc.returncode, stderr.decode(errors='replace').strip()
+    
+    @staticmethod
+    def _result_label(result: str) -> str:
+        """同期結果のメッセージをメトリクスのラベルに変換"""
+        if result.startswith("✅"):
+            return "ok"
+        if result.startswith("🔄"):
+            return "forced"
+        return "error"
+    
+    @staticmethod
+    def _describe(change: Dict[str, Any]) -> str:
+        """1件の変更の説明文を作成"""
+        action = change['action'].capitalize()
+        if change['post_id'] and change['user_name']:
+            return f"{action} post #{change['post_id']} by {change['user_name']}"
+        if change['user_name']:
+            return f"{action} by {change['user_name']}"
+        return action
+    
+    def _commit_message(self, changes: List[Dict[str, Any]]) -> str:
+        """まとめた変更のコミットメッセージを作成"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        if len(changes) == 1:
+            return f"🔄 {self._describe(changes[0])} - {timestamp}"
+        
+        lines = [f"🔄 Sync {len(changes)} changes - {timestamp}", ""]
+        lines.extend(f"- {self._describe(change)}" for change in changes)
+        return "\n".join(lines)
+    
+    async def _sync(self, changes: List[Dict[str, Any]]) -> str:
+        """まとめた変更をコミットしてプッシュ"""
+        counts = Counter(change['action'] for change in changes)
+        summary = ", ".join(action if count == 1 else f"{action}×{count}" for action, count in counts.items())
+        
+        try:
+            # 強制的に変更を検知させるためのタイムスタンプファイルを更新
+            with open(os.path.join(self.data_dir, '.last_sync'), 'w') as f:
+                f.write(datetime.now().isoformat())
+            
+            # 存在するデータパスを一度にステージ（存在しないパスがあるとgit addが失敗するため除外）
+            paths = [p for p in SYNC_PATHS if os.path.exists(os.path.join(self.repo_dir, p))]
+            await self._git('add', '--', *paths)
+            
+            commit_message = self._commit_message(changes)
+            
+            for attempt in range(MAX_RETRIES):
+                code, stderr = await self._git('commit', '-m', commit_message)
+                if code == 0:
+                    break
                 
-            except subprocess.CalledProcessError as commit_error:
-                if attempt < max_retries - 1:
-                    logger.warning(f"Git commit失敗、リトライします (試行 {attempt + 1}/{max_retries}): {commit_error.stderr.strip()}")
-                    import time
-                    time.sleep(2)
+                if attempt < MAX_RETRIES - 1:
+                    logger.warning(f"Git commit失敗、リトライします (試行 {attempt + 1}/{MAX_RETRIES}): {stderr}")
+                    await asyncio.sleep(RETRY_DELAY_SECONDS)
                 else:
                     # 最終手段：クリーンな強制コミット
                     logger.error("最終手段：クリーンな強制コミットを実行します")
-                    subprocess.run(['git', 'add', '-A'], 
-                                 capture_output=True, text=True, check=False)
-                    subprocess.run(['git', 'commit', '-m', f'🔄 File sync - {action_description} - {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'], 
-                                 capture_output=True, text=True, check=False)
-                    subprocess.run(['git', 'push', 'origin', 'main', '--force'], 
-                                 capture_output=True, text=True, check=False)
-                    success_msg = f"🔄 強制コミットでGitHubに保存しました: {action_description}"
+                    await self._git('add', '-A')
+                    await self._git('commit', '-m', f'🔄 File sync - {summary} - {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+                    await self._git('push', 'origin', 'main', '--force')
+                    success_msg = f"🔄 強制コミットでGitHubに保存しました: {summary}"
                     logger.info(success_msg)
                     return success_msg
+            
+            # git push（リトライ付き）
+            for push_attempt in range(MAX_RETRIES):
+                code, stderr = await self._git('push', 'origin', 'main')
+                if code == 0:
+                    success_msg = f"✅ GitHubに保存しました: {summary}"
+                    logger.info(success_msg)
+                    return success_msg
+                
+                if push_attempt < MAX_RETRIES - 1:
+                    logger.warning(f"Git push失敗、リトライします (試行 {push_attempt + 1}/{MAX_RETRIES}): {stderr}")
+                    # リモートの変更を取得してリベース
+                    await self._git('pull', '--rebase', 'origin', 'main')
+                    await asyncio.sleep(RETRY_DELAY_SECONDS)
+            
+            # 最終手段：クリーンな強制プッシュ
+            logger.error("最終手段：クリーンな強制プッシュを実行します")
+            await self._git('push', 'origin', 'main', '--force')
+            success_msg = f"🔄 強制プッシュでGitHubに保存しました: {summary}"
+            logger.info(success_msg)
+            return success_msg
         
-    except subprocess.CalledProcessError as git_error:
-        error_msg = f"⚠️ GitHub保存に失敗: {git_error.stderr.strip()}"
-        logger.warning(f"GitHub保存失敗: {git_error}")
-        return error_msg
-    except Exception as git_error:
-        error_msg = f"⚠️ GitHub保存エラー: {str(git_error)}"
-        logger.warning(f"GitHub保存エラー: {git_error}")
-        return error_msg
+        except Exception as git_error:
+            error_msg = f"⚠️ GitHub保存エラー: {str(git_error)}"
+            logger.warning(f"GitHub保存エラー: {git_error}")
+            return error_msg
+
+# プロセス内で共有する同期キュー
+_sync_queue: Optional[GitHubSyncQueue] = None
+
+def get_sync_queue() -> GitHubSyncQueue:
+    """共有の同期キューを取得"""
+    global _sync_queue
+    if _sync_queue is None:
+        _sync_queue = GitHubSyncQueue()
+    return _sync_queue
+
+async def sync_to_github(action_description: str, user_name: str = None, post_id: int = None):
+    """
+    ファイルベースのデータ変更をGitHubへの同期キューに追加する
+
+    実際のコミット・プッシュはバックグラウンドでまとめて行うため、すぐに戻る。
+
+    Args:
+        action_description: アクションの説明 (例: "edit", "delete", "like")
+        user_name: 実行ユーザー名 (オプション)
+        post_id: 投稿ID (オプション)
+
+    Returns:
+        str: GitHub同期の受付メッセージ
+    """
+    try:
+        get_sync_queue().enqueue(action_description, user_name, post_id)
+        return f"🕒 GitHub同期を予約しました: {action_description}"
+    except Exception as e:
+        error_msg = f"⚠️ GitHub同期の予約に失敗: {str(e)}"
+        logger.warning(error_msg)
+        return error_msg
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+送信済みメッセージのハンドルキャッシュ
+
+転送・編集・削除はメッセージIDだけで行えるため、fetch_messageで取得せずに
+PartialMessageを作って使い回す。本文（Embedなど）が必要な場合のみ取得し、
+ボット自身が送信・編集したメッセージはその結果を保持して取得も省く。
+投稿IDからメッセージ参照（MessageRefManager）を引いた結果もメモリに保持する。
+"""
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# 保持するメッセージハンドルの最大件数
+MESSAGE_HANDLE_CACHE_SIZE = int(os.getenv('MESSAGE_HANDLE_CACHE_SIZE', '1024'))
+
+# 型定義
+MessageKey = Tuple[int, int]
+MessageHandle = Union[discord.Message, discord.PartialMessage]
+
+class MessageHandleCache:
+    """(チャンネルID, メッセージID)からメッセージハンドルを引くLRUキャッシュ
+
+    PartialMessageは.forward()・.edit()・.delete()に使える。取得済みのMessageも同じ表に
+    保持し、本文が必要な場合（fetch）はMessageが保持されていればAPIを呼ばない。
+    """
+    
+    def __init__(self, client: discord.Client, message_ref_manager=None,
+                 max_size: int = MESSAGE_HANDLE_CACHE_SIZE):
+        self.client = client
+        self.message_ref_manager = message_ref_manager
+        self.max_size = max_size
+        self._handles: "OrderedDict[MessageKey, MessageHandle]" = OrderedDict()
+        # 投稿ID -> (チャンネルID, メッセージID)
+        self._post_refs: "OrderedDict[int, MessageKey]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+    
+    @staticmethod
+    def _key(channel_id: Any, message_id: Any) -> Optional[MessageKey]:
+        """IDを整数の組に変換（不正なIDならNone）"""
+        try:
+            return int(channel_id), int(message_id)
+        except (TypeError, ValueError):
+            return None
+    
+    def _store(self, key: MessageKey, handle: MessageHandle) -> MessageHandle:
+        """ハンドルを保持し、上限を超えた分を古い順に破棄"""
+        self._handles[key] = handle
+        self._handles.move_to_end(key)
+        while len(self._handles) > self.max_size:
+            self._handles.popitem(last=False)
+        return handle
+    
+    def partial(self, channel_id: Any, message_id: Any) -> Optional[MessageHandle]:
+        """転送・編集・削除に使うハンドルを取得（APIは呼ばない）
+
+        チャンネルがゲートウェイのキャッシュにない場合はNone。
+        """
+        key = self._key(channel_id, message_id)
+        if key is None:
+            return None
+        
+        handle = self._handles.get(key)
+        if handle is not None:
+            self._handles.move_to_end(key)
+            self.hits += 1
+            return handle
+        
+        channel = self.client.get_channel(key[0])
+        if channel is None or not hasattr(channel, 'get_partial_message'):
+            return None
+        
+        self.misses += 1
+        return self._store(key, channel.get_partial_message(key[1]))
+    
+    async def fetch(self, channel_id: Any, message_id: Any) -> Optional[discord.Message]:
+        """本文を含むメッセージを取得（保持していなければAPIで取得）
+
+        チャンネルが見つからなければNone。削除済みならdiscord.NotFoundを送出する。
+        """
+        handle = self.partial(channel_id, message_id)
+        if handle is None:
+            return None
+        if isinstance(handle, discord.Message):
+            return handle
+        
+        self.fetches += 1
+        try:
+            message = await handle.fetch()
+        except discord.NotFound:
+            self.discard(channel_id, message_id)
+            raise
+        return self.remember(message)
+    
+    def remember(self, message: discord.Message) -> discord.Message:
+        """送信・編集・取得したメッセージを保持（以降の取得を省く）"""
+        self._store((message.channel.id, message.id), message)
+        return message
+    
+    def discard(self, channel_id: Any, message_id: Any) -> None:
+        """削除したメッセージのハンドルを破棄"""
+        key = self._key(channel_id, message_id)
+        if key is not None:
+            self._handles.pop(key, None)
+    
+    def remember_post(self, post_id: int, message: discord.Message) -> None:
+        """投稿メッセージを投稿IDと対応付けて保持"""
+        self._post_refs[int(post_id)] = (message.channel.id, message.id)
+        self._post_refs.move_to_end(int(post_id))
+        while len(self._post_refs) > self.max_size:
+            self._post_refs.popitem(last=False)
+        self.remember(message)
+    
+    async def post_message(self, post_id: int) -> Optional[MessageHandle]:
+        """投稿メッセージのハンドルを取得（メッセージ参照もメモリに保持する）"""
+        post_id = int(post_id)
+        key = self._post_refs.get(post_id)
+        
+        if key is None:
+            if self.message_ref_manager is None:
+                return None
+            ref = await self.message_ref_manager.get_message_ref(post_id)
+            if not ref:
+                logger.warning(f"メッセージ参照が見つかりません: post_id={post_id}")
+                return None
+            key = self._key(ref.get('channel_id'), ref.get('message_id'))
+            if key is None:
+                logger.warning(f"メッセージIDまたはチャンネルIDがありません: post_id={post_id}")
+                return None
+            self._post_refs[post_id] = key
+            while len(self._post_refs) > self.max_size:
+                self._post_refs.popitem(last=False)
+        
+        self._post_refs.move_to_end(post_id)
+        return self.partial(*key)
+    
+    def forget_post(self, post_id: int) -> None:
+        """削除した投稿のメッセージ参照とハンドルを破棄"""
+        key = self._post_refs.pop(int(post_id), None)
+        if key is not None:
+            self._handles.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """ヒット・ミス・取得回数などの統計を取得"""
+        return {
+            "size": len(self._handles),
+            "post_refs": len(self._post_refs),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches
+        }
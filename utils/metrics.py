@@ -0,0 +1,396 @@
+"""
+コマンドごとのレイテンシとストレージ・Discord API・Git同期の計測
+
+計測値はプロセス内のヒストグラムとカウンターに集計し、Prometheusのテキスト形式で
+出力する（METRICS_PORTを指定した場合のみローカルのHTTPで公開、/perfでも表示）。
+実行中のコマンド名をコンテキスト変数に持ち、スレッドプールでのストレージ処理や
+Discord APIの呼び出しをそのコマンドに紐付ける。モーダル・セレクトメニューの操作は
+最初の応答（defer・send_message・send_modal・edit_message）の時点で、元になった
+コマンドに紐付ける。
+"""
+import bisect
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import discord
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+# メトリクスを公開するアドレス（ポート0なら公開しない）
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# ヒストグラムの区切り（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# コマンドに紐付かない処理（バックグラウンド処理など）のラベル
+BACKGROUND = "background"
+
+# 紐付け用に保持するインタラクションとモーダルの最大件数
+_LABEL_CACHE_SIZE = 4096
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    """ラベル値をPrometheusの形式にエスケープ"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """ラベルごとの累積カウンター"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, *labelvalues: str) -> None:
+        """カウンターを加算"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+    
+    def values(self) -> Dict[LabelValues, float]:
+        """ラベルごとの値のスナップショット"""
+        with self._lock:
+            return dict(self._values)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+class Histogram:
+    """ラベルごとの累積ヒストグラム（区切りごとの件数・合計・件数）"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル -> [区切りごとの件数（累積でない）..., +Infの件数, 合計, 件数]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """値を1件記録"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [0] * (len(self.buckets) + 3)
+                self._series[labelvalues] = series
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+    
+    def series(self) -> Dict[LabelValues, List[float]]:
+        """ラベルごとの集計のスナップショット"""
+        with self._lock:
+            return {labelvalues: list(series) for labelvalues, series in self._series.items()}
+    
+    def quantile(self, series: List[float], q: float) -> float:
+        """区切りから分位点を近似（区切り内は線形補間、最後の区切りを超えたら最後の区切り）"""
+        count = series[-1]
+        if not count:
+            return 0.0
+        
+        target = q * count
+        seen = 0
+        lower = 0.0
+        for upper, n in zip(self.buckets, series):
+            if n and seen + n >= target:
+                return lower + (upper - lower) * (target - seen) / n
+            seen += n
+            lower = upper
+        return self.buckets[-1]
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in sorted(self.series().items()):
+            cumulative = 0
+            for upper, n in zip(self.buckets, series):
+                cumulative += n
+                le = f'le="{upper}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {series[-1]}")
+        return lines
+
+# ゲージを出力する関数（(メトリクス名, 説明, ラベル, 値)を返す）
+Collector = Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]
+
+class MetricsRegistry:
+    """メトリクスの登録とPrometheusテキスト形式への出力"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+    
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """カウンターを登録（登録済みなら既存のものを返す）"""
+        return self._register(Counter(name, help_text, labelnames))
+    
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """ヒストグラムを登録（登録済みなら既存のものを返す）"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+    
+    def register_collector(self, collector: Collector) -> None:
+        """出力のたびに値を取得するゲージ（キャッシュの統計など）を登録"""
+        with self._lock:
+            self._collectors.append(collector)
+    
+    def get(self, name: str) -> Any:
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        """全メトリクスをPrometheusのテキスト形式で出力"""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        
+        for metric in metrics:
+            lines.extend(metric.render())
+        
+        gauges: Dict[str, Tuple[str, List[str]]] = {}
+        for collector in collectors:
+            try:
+                for name, help_text, labels, value in collector():
+                    entry = gauges.setdefault(name, (help_text, []))
+                    entry[1].append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+            except Exception as e:
+                logger.error(f"❌ メトリクスの収集に失敗しました: {e}")
+        for name, (help_text, samples) in gauges.items():
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", *samples])
+        
+        return "\n".join(lines) + "\n"
+
+# プロセス内で共有するレジストリ
+REGISTRY = MetricsRegistry()
+
+def register_stats(cache: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """キャッシュなどのstats()の数値をゲージとして出力する"""
+    def collect():
+        for stat, value in stats().items():
+            if isinstance(value, (bool, int, float)):
+                yield ("thoughtbot_cache_stat", "キャッシュ・対応表の統計（stats()の値）",
+                       {"cache": cache, "stat": stat}, float(value))
+    REGISTRY.register_collector(collect)
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "thoughtbot_command_seconds", "スラッシュコマンドの処理時間", ("command", "status"))
+FIRST_RESPONSE_SECONDS = REGISTRY.histogram(
+    "thoughtbot_interaction_first_response_seconds", "インタラクション作成から最初の応答（defer等）までの時間",
+    ("command", "response"))
+STORAGE_SECONDS = REGISTRY.histogram(
+    "thoughtbot_storage_seconds", "マネージャー呼び出し1回の処理時間（スレッドプール内）",
+    ("command", "manager", "method"))
+STORAGE_WAIT_SECONDS = REGISTRY.histogram(
+    "thoughtbot_storage_wait_seconds", "マネージャー呼び出しがスレッドプールで待たされた時間", ("manager",))
+DISCORD_HTTP_SECONDS = REGISTRY.histogram(
+    "thoughtbot_discord_http_seconds", "Discord REST APIの呼び出し時間", ("command", "method", "route", "status"))
+GIT_SECONDS = REGISTRY.histogram(
+    "thoughtbot_git_seconds", "gitコマンド1回の実行時間", ("subcommand", "result"),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+GIT_SYNC_SECONDS = REGISTRY.histogram(
+    "thoughtbot_git_sync_seconds", "まとめた変更のGitHub同期1回の時間", ("result",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+GIT_SYNC_CHANGES = REGISTRY.counter(
+    "thoughtbot_git_sync_changes_total", "GitHubに同期した変更の件数")
+RECORDS_SCANNED = REGISTRY.counter(
+    "thoughtbot_records_scanned_total", "ストレージから読み込んだレコード数", ("command", "collection"))
+
+# 実行中のコマンド名（スレッドプールにもコンテキストごと引き継がれる）
+_current_command: contextvars.ContextVar = contextvars.ContextVar('metrics_command', default=BACKGROUND)
+
+# インタラクションID -> コマンド名、モーダルのcustom_id -> コマンド名
+_interaction_commands: "OrderedDict[int, str]" = OrderedDict()
+_modal_commands: "OrderedDict[str, str]" = OrderedDict()
+
+def _remember(table: "OrderedDict", key: Any, command: str) -> None:
+    table[key] = command
+    table.move_to_end(key)
+    while len(table) > _LABEL_CACHE_SIZE:
+        table.popitem(last=False)
+
+def current_command() -> str:
+    """実行中のコマンド名（コマンドの処理中でなければbackground）"""
+    return _current_command.get()
+
+def bind_command(interaction: discord.Interaction, command: str) -> None:
+    """以降の処理（同じタスク内）をコマンドに紐付ける"""
+    _current_command.set(command)
+    _remember(_interaction_commands, interaction.id, command)
+
+def observe_storage(manager: str, method: str, seconds: float, wait_seconds: float) -> None:
+    """マネージャー呼び出しの処理時間を記録"""
+    STORAGE_SECONDS.observe(seconds, current_command(), manager, method)
+    STORAGE_WAIT_SECONDS.observe(wait_seconds, manager)
+
+def count_scanned(collection: str, n: int = 1) -> None:
+    """ストレージから読み込んだレコード数を加算"""
+    if n:
+        RECORDS_SCANNED.inc(n, current_command(), collection)
+
+def _resolve_command(interaction: discord.Interaction) -> str:
+    """モーダル・セレクトメニューの操作を元になったコマンドに対応付ける"""
+    if interaction.type is discord.InteractionType.modal_submit:
+        custom_id = (interaction.data or {}).get('custom_id')
+        return _modal_commands.get(custom_id, "modal_submit")
+    
+    if interaction.type is discord.InteractionType.component:
+        metadata = interaction.message.interaction_metadata if interaction.message else None
+        if metadata is not None:
+            return _interaction_commands.get(metadata.id, "component")
+        return "component"
+    
+    return interaction.type.name
+
+class MetricsCommandTree(app_commands.CommandTree):
+    """コマンドの処理時間を記録するコマンドツリー（Botのtree_clsに指定する）"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.application_command:
+            command = interaction.command.qualified_name if interaction.command else (interaction.data or {}).get('name', 'unknown')
+            bind_command(interaction, command)
+            interaction.extras['metrics_started'] = time.perf_counter()
+        return True
+    
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
+        observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+def observe_command(interaction: discord.Interaction, status: str) -> None:
+    """コマンドの処理時間を記録（on_app_command_completion・エラー時に呼ぶ）"""
+    started = interaction.extras.pop('metrics_started', None)
+    if started is not None:
+        command = _interaction_commands.get(interaction.id, current_command())
+        COMMAND_SECONDS.observe(time.perf_counter() - started, command, status)
+
+def _wrap_response(method_name: str) -> None:
+    """InteractionResponseのメソッドを最初の応答までの時間を記録するものに置き換える"""
+    original = getattr(discord.InteractionResponse, method_name)
+    if getattr(original, '_metrics_wrapped', False):
+        return
+    
+    @functools.wraps(original)
+    async def wrapper(self, *args, **kwargs):
+        interaction = getattr(self, '_parent', None)
+        if interaction is None or self.is_done():
+            return await original(self, *args, **kwargs)
+        
+        # コマンド以外のインタラクションは元のコマンドに紐付け直す
+        if interaction.type is not discord.InteractionType.application_command:
+            bind_command(interaction, _resolve_command(interaction))
+        command = current_command()
+        if method_name == 'send_modal' and args:
+            _remember(_modal_commands, args[0].custom_id, command)
+        
+        elapsed = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+        FIRST_RESPONSE_SECONDS.observe(max(0.0, elapsed), command, method_name)
+        return await original(self, *args, **kwargs)
+    
+    wrapper._metrics_wrapped = True
+    setattr(discord.InteractionResponse, method_name, wrapper)
+
+def install_http_hook(client: discord.Client) -> None:
+    """クライアントのDiscord REST API呼び出しの時間を記録する"""
+    http = client.http
+    original = http.request
+    if getattr(original, '_metrics_wrapped', False):
+        return
+    
+    @functools.wraps(original)
+    async def request(route, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await original(route, **kwargs)
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            DISCORD_HTTP_SECONDS.observe(time.perf_counter() - started, current_command(),
+                                         route.method, route.path, status)
+    
+    request._metrics_wrapped = True
+    http.request = request
+
+def install(client: discord.Client) -> None:
+    """Discordの応答・REST APIの計測を組み込む（複数回呼んでも一度だけ）"""
+    for method_name in ('defer', 'send_message', 'send_modal', 'edit_message'):
+        _wrap_response(method_name)
+    install_http_hook(client)
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Prometheus形式のメトリクスを/metricsで公開するHTTPサーバーを起動（ポート0なら起動しない）"""
+    if not port:
+        return None
+    
+    from aiohttp import web
+    
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+    
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 メトリクスを公開しました: http://{host}:{port}/metrics")
+    return runner
+
+def summarize(histogram: Histogram, group_by: Sequence[str], limit: int = 10) -> List[Dict[str, Any]]:
+    """ヒストグラムをラベルでまとめ、合計時間の多い順に件数・平均・p95を返す（/perf用）"""
+    indexes = [histogram.labelnames.index(name) for name in group_by]
+    grouped: Dict[LabelValues, List[float]] = {}
+    for labelvalues, series in histogram.series().items():
+        key = tuple(labelvalues[i] for i in indexes)
+        merged = grouped.get(key)
+        grouped[key] = series if merged is None else [a + b for a, b in zip(merged, series)]
+    
+    rows = []
+    for key, series in grouped.items():
+        count, total = series[-1], series[-2]
+        rows.append({
+            "labels": key,
+            "count": int(count),
+            "total_s": total,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p95_ms": histogram.quantile(series, 0.95) * 1000
+        })
+    rows.sort(key=lambda row: row["total_s"], reverse=True)
+    return rows[:limit]
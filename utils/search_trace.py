@@ -0,0 +1,104 @@
+"""
+検索・読み込み処理のトレース機能
+
+通常は無効で、何も記録・整形しない。SEARCH_TRACE=1 で全件、
+SEARCH_TRACE_SAMPLE=0.1 のように指定すると一部のクエリだけを記録する。
+有効なクエリごとに件数と所要時間をまとめた1件のログを出力する。
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 全クエリをトレースするか
+SEARCH_TRACE = os.getenv('SEARCH_TRACE', '0').lower() in ('1', 'true', 'yes')
+# トレースするクエリの割合（0.0〜1.0）
+SEARCH_TRACE_SAMPLE = float(os.getenv('SEARCH_TRACE_SAMPLE', '0'))
+
+class SearchTrace:
+    """1回の検索の件数と段階ごとの所要時間を集計する"""
+    
+    enabled = True
+    
+    def __init__(self, name: str, **fields: Any):
+        self.name = name
+        self.fields: Dict[str, Any] = dict(fields)
+        self.counts: Dict[str, int] = {}
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+    
+    def count(self, key: str, n: int = 1) -> None:
+        """件数を加算"""
+        self.counts[key] = self.counts.get(key, 0) + n
+    
+    def set(self, **fields: Any) -> None:
+        """集計結果に項目を追加"""
+        self.fields.update(fields)
+    
+    @contextmanager
+    def stage(self, name: str):
+        """処理段階の所要時間を計測"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+    
+    def finish(self) -> Dict[str, Any]:
+        """集計結果を1件のログとして出力"""
+        record = {
+            "trace": self.name,
+            **self.fields,
+            "counts": self.counts,
+            "timings_ms": {k: round(v, 3) for k, v in self.timings.items()},
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3)
+        }
+        logger.info(f"🔍 trace {json.dumps(record, ensure_ascii=False, default=str)}")
+        return record
+
+class _NullTrace:
+    """トレース無効時に使う何もしないトレース"""
+    
+    enabled = False
+    
+    def count(self, key: str, n: int = 1) -> None:
+        pass
+    
+    def set(self, **fields: Any) -> None:
+        pass
+    
+    @contextmanager
+    def stage(self, name: str):
+        yield
+    
+    def finish(self) -> Optional[Dict[str, Any]]:
+        return None
+
+NULL_TRACE = _NullTrace()
+
+# 実行中の検索のトレース（スレッドプールにもコンテキストごと引き継がれる）
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('search_trace', default=NULL_TRACE)
+
+def _should_trace(enabled: Optional[bool]) -> bool:
+    """このクエリをトレースするか判定"""
+    if enabled is not None:
+        return enabled
+    if SEARCH_TRACE:
+        return True
+    return SEARCH_TRACE_SAMPLE > 0 and random.random() < SEARCH_TRACE_SAMPLE
+
+def start_trace(name: str, enabled: Optional[bool] = None, **fields: Any):
+    """トレースを開始して現在のコンテキストに設定（enabledで個別に有効・無効を指定）"""
+    trace = SearchTrace(name, **fields) if _should_trace(enabled) else NULL_TRACE
+    _current_trace.set(trace)
+    return trace
+
+def current_trace():
+    """現在のコンテキストのトレースを取得（なければ何もしないトレース）"""
+    return _current_trace.get()
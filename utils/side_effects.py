@@ -0,0 +1,92 @@
+"""
+Discordへの副作用（転送・送信・削除）の並行実行
+
+互いに依存しないAPI呼び出しをasyncio.gatherでまとめて実行し、処理時間を
+各呼び出しの合計から最も長い呼び出しの時間に縮める。同時に実行する呼び出し数は
+全Cogで共有するセマフォで制限し、一度に多数のリクエストを送ってレート制限に
+かからないようにする（各エンドポイントの制限の待機はdiscord.pyが行う）。
+順序に依存する処理は呼び出し側で順にawaitする。
+"""
+import asyncio
+import inspect
+import logging
+import os
+from typing import Any, Awaitable, Iterable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# 同時に実行するDiscord API呼び出しの上限
+DISCORD_EFFECT_CONCURRENCY = int(os.getenv('DISCORD_EFFECT_CONCURRENCY', '4'))
+
+# イベントループ上で初めて使うときに作成する
+_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_effect_semaphore() -> asyncio.Semaphore:
+    """全Cogで共有するAPI呼び出しのセマフォを取得"""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(max(1, DISCORD_EFFECT_CONCURRENCY))
+    return _semaphore
+
+async def run_effect(awaitable: Awaitable[Any]) -> Any:
+    """セマフォの枠内で1つのAPI呼び出しを実行"""
+    async with get_effect_semaphore():
+        return await awaitable
+
+async def gather_effects(*awaitables: Awaitable[Any]) -> List[Any]:
+    """互いに依存しないAPI呼び出しを並行して実行
+
+    1つが失敗しても他は実行を続け、失敗したものは結果の位置に例外を返す。
+    """
+    return await asyncio.gather(*(run_effect(awaitable) for awaitable in awaitables), return_exceptions=True)
+
+async def send_in_order(*awaitables: Awaitable[discord.Message]) -> List[discord.Message]:
+    """組になるメッセージを順に送信（1つでも失敗したら送信済みの分を削除）
+
+    転送メッセージとその通知メッセージのように、チャンネル上の並び順に意味があり、
+    片方だけ残ると不整合になる組に使う。失敗した場合はその例外を送出する。
+    """
+    pending = list(awaitables)
+    sent = []
+    try:
+        while pending:
+            sent.append(await run_effect(pending.pop(0)))
+    except Exception:
+        # 送信しなかった分のコルーチンは閉じておく
+        for awaitable in pending:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+        if sent:
+            await gather_effects(*(message.delete() for message in sent))
+            logger.warning(f"⚠️ 組になるメッセージの送信に失敗したため、送信済みの{len(sent)}件を削除しました")
+        raise
+    return sent
+
+async def delete_messages(message_cache, channel_id: Any,
+                          messages: Iterable[Tuple[str, Optional[str]]]) -> int:
+    """(表示名, メッセージID)の組のメッセージを並行して削除し、削除できた件数を返す
+
+    メッセージIDがNoneの組は無視する。メッセージは取得せずIDだけで削除する。
+    """
+    async def delete(label: str, message_id: str) -> bool:
+        try:
+            handle = message_cache.partial(channel_id, message_id)
+            if handle is None:
+                logger.error(f"❌ {label}のチャンネルが見つかりません: channel_id={channel_id}")
+                return False
+            await handle.delete()
+            message_cache.discard(channel_id, message_id)
+            logger.info(f"✅ {label}を削除しました: メッセージID={message_id}")
+            return True
+        except discord.NotFound:
+            logger.warning(f"⚠️ {label}が見つかりません: メッセージID={message_id}")
+        except discord.Forbidden:
+            logger.error(f"❌ {label}の削除権限がありません: メッセージID={message_id}")
+        except Exception as e:
+            logger.error(f"❌ {label}削除エラー: {e}")
+        return False
+    
+    results = await gather_effects(*(delete(label, message_id) for label, message_id in messages if message_id))
+    return sum(1 for result in results if result is True)
@@ -0,0 +1,124 @@
+"""
+起動処理（Cogの読み込みとインデックスのウォームアップ）と所要時間の集計
+
+読み込むCogはEXTENSIONSに明示し、依存のないものは並行して読み込む。
+インデックスの構築はゲートウェイ接続後のバックグラウンド処理に回し、
+起動のたびにCogごとのimport・初期化時間とウォームアップ時間の表をログに出力する。
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# 読み込むCog（拡張モジュール名 -> 先に読み込む必要がある拡張モジュール名）
+# ユーティリティ・モーダル・ビューなどのモジュールはここに載せない
+EXTENSIONS: Dict[str, Tuple[str, ...]] = {
+    "cogs.thoughts.post": (),
+    "cogs.thoughts.post_message": (),
+    "cogs.thoughts.post_thread": (),
+    "cogs.thoughts.edit": (),
+    "cogs.thoughts.edit_reply": (),
+    "cogs.thoughts.delete": (),
+    "cogs.thoughts.list": (),
+    "cogs.thoughts.search": (),
+    "cogs.thoughts.like": (),
+    "cogs.thoughts.unlike": (),
+    "cogs.thoughts.reply": (),
+    "cogs.thoughts.unreply": (),
+    "cogs.thoughts.help": (),
+    "cogs.thoughts.admin": (),
+}
+
+class StartupReport:
+    """起動処理の段階ごとの所要時間を集計して表にする"""
+    
+    def __init__(self):
+        self._started = time.perf_counter()
+        # (名前, import_ms, init_ms, 状態)
+        self.rows: List[Tuple[str, Optional[float], Optional[float], str]] = []
+    
+    def record(self, name: str, import_ms: Optional[float], init_ms: Optional[float], status: str = "ok") -> None:
+        """1行分の所要時間を記録"""
+        self.rows.append((name, import_ms, init_ms, status))
+    
+    def format_table(self, title: str) -> str:
+        """所要時間の表を作成"""
+        width = max([len(name) for name, _, _, _ in self.rows] + [len("name")])
+        
+        def ms(value: Optional[float]) -> str:
+            return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+        
+        lines = [title, f"{'name':<{width}}  {'import_ms':>9}  {'init_ms':>9}  状態"]
+        for name, import_ms, init_ms, status in self.rows:
+            lines.append(f"{name:<{width}}  {ms(import_ms)}  {ms(init_ms)}  {status}")
+        lines.append(f"合計: {(time.perf_counter() - self._started) * 1000:.1f}ms")
+        return "\n".join(lines)
+    
+    def log(self, title: str) -> None:
+        """所要時間の表をログに出力"""
+        logger.info(self.format_table(title))
+
+async def _import_extension(name: str) -> Tuple[Optional[float], Optional[Exception]]:
+    """拡張モジュールとその依存モジュールをスレッドで読み込む（所要ミリ秒と例外を返す）
+
+    load_extensionは拡張モジュール本体を読み込み直すが、依存モジュールは
+    ここで読み込んだものが使われるため、初期化時間はほぼsetup()の時間になる。
+    """
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(importlib.import_module, name)
+    except Exception as e:
+        return (time.perf_counter() - started) * 1000, e
+    return (time.perf_counter() - started) * 1000, None
+
+async def load_extensions(bot: commands.Bot, report: StartupReport,
+                          extensions: Dict[str, Tuple[str, ...]] = EXTENSIONS) -> List[str]:
+    """マニフェストのCogを依存順に、依存のないものは並行して読み込む
+
+    読み込みに失敗したCogはスキップし、それに依存するCogも読み込まない。
+    読み込めたCogの名前を返す。
+    """
+    # モジュールのimportは互いに独立しているため全て並行して行う
+    imports = dict(zip(extensions, await asyncio.gather(*(_import_extension(name) for name in extensions))))
+    
+    async def load(name: str) -> bool:
+        import_ms, error = imports[name]
+        if error is not None:
+            report.record(name, import_ms, None, f"失敗: {error}")
+            logger.error(f"Cogの読み込みに失敗しました: {name} - {error}")
+            return False
+        
+        started = time.perf_counter()
+        try:
+            await bot.load_extension(name)
+        except Exception as e:
+            report.record(name, import_ms, (time.perf_counter() - started) * 1000, f"失敗: {e}")
+            logger.error(f"Cogの読み込みに失敗しました: {name} - {e}")
+            return False
+        
+        report.record(name, import_ms, (time.perf_counter() - started) * 1000)
+        return True
+    
+    loaded: List[str] = []
+    pending = dict(extensions)
+    while pending:
+        # 依存するCogが全て読み込み済みのものをまとめて読み込む
+        ready = [name for name, requires in pending.items() if all(req in loaded for req in requires)]
+        if not ready:
+            for name, requires in pending.items():
+                report.record(name, imports[name][0], None, "スキップ: 依存するCogを読み込めません")
+                logger.error(f"依存するCogを読み込めないためスキップしました: {name} (依存: {', '.join(requires)})")
+            break
+        
+        for name in ready:
+            del pending[name]
+        results = await asyncio.gather(*(load(name) for name in ready))
+        loaded.extend(name for name, ok in zip(ready, results) if ok)
+    
+    logger.info(f"Cogを読み込みました: {len(loaded)}/{len(extensions)}個")
+    return loaded